@@ -0,0 +1,23 @@
+# apps/accounts/management/commands/accrue_rewards.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.accounts.rewards import accrue_rewards, ACCRUAL_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Credit reward points for completed transactions in micro-batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=ACCRUAL_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Keep accruing every --interval seconds')
+        parser.add_argument('--interval', type=int, default=30)
+
+    def handle(self, *args, **options):
+        while True:
+            processed = accrue_rewards(options['batch_size'])
+            self.stdout.write(f'Accrued rewards for {processed} transactions.')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+# apps/accounts/management/commands/recalculate_tiers.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.accounts.rewards import recalculate_tiers, TIER_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Recompute the rewards tier of every user from lifetime points (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=TIER_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        changed = recalculate_tiers(options['chunk_size'])
+        self.stdout.write(f'Changed {changed} tiers in {time.perf_counter() - started:.1f}s.')
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_notification_rewards'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['timestamp'], name='audit_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'created_at'], name='notif_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user', 'created_at'], name='notif_user_unread_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:14
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_rewards(apps, schema_editor):
+    """Fold extra rewards rows of a user into their oldest one"""
+    Rewards = apps.get_model('accounts', 'Rewards')
+    duplicated = (
+        Rewards.objects.values('user_id').annotate(rows=Count('id')).filter(rows__gt=1).values_list('user_id', flat=True)
+    )
+    for user_id in list(duplicated):
+        keep, *extra = Rewards.objects.filter(user_id=user_id).order_by('pk')
+        for row in extra:
+            keep.points += row.points
+            keep.points_earned += row.points_earned
+            keep.points_redeemed += row.points_redeemed
+        keep.save()
+        Rewards.objects.filter(pk__in=[row.pk for row in extra]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rewards, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='rewards',
+            constraint=models.UniqueConstraint(fields=('user',), name='rewards_user_uniq'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_rewards_user_unique'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notif_user_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='notif_user_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('is_read', True)), fields=['created_at'], name='notif_read_created_idx'),
+        ),
+    ]
@@ -101,6 +101,9 @@ class Rewards(models.Model):
     
     class Meta:
         db_table = 'rewards'
+        constraints = [
+            models.UniqueConstraint(fields=['user'], name='rewards_user_uniq'),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.points} points"
@@ -127,6 +130,14 @@ class Notification(models.Model):
     class Meta:
         db_table = 'notifications'
         ordering = ['-created_at']
+        indexes = [
+            # Inbox keyset pages on (created_at, id)
+            models.Index(fields=['user', 'created_at', 'id'], name='notif_user_created_id_idx'),
+            models.Index(fields=['user', 'created_at'], name='notif_user_unread_idx',
+                         condition=models.Q(is_read=False)),
+            # Retention only ever scans read notifications
+            models.Index(fields=['created_at'], name='notif_read_created_idx', condition=models.Q(is_read=True)),
+        ]
 
 class AuditLog(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
@@ -141,3 +152,6 @@ class AuditLog(models.Model):
     class Meta:
         db_table = 'audit_logs'
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp'], name='audit_timestamp_idx'),
+        ]
@@ -0,0 +1,119 @@
+# apps/accounts/rewards.py
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Max, Min, Sum, Value, When
+from django.db.models.functions import Floor
+from django.utils import timezone
+
+from .models import Rewards
+
+REWARD_TYPES = ('payment', 'transfer')
+# Lowest lifetime points of each tier, best tier first
+TIERS = [('platinum', 50000), ('gold', 20000), ('silver', 5000), ('bronze', 0)]
+ACCRUAL_BATCH_SIZE = 1000
+UPDATE_CHUNK_SIZE = 500
+TIER_CHUNK_SIZE = 10000
+
+
+class AccrualConflict(Exception):
+    """Another worker marked some of a batch's transactions first; the batch is rolled back"""
+
+
+def _invalidate(user_ids):
+    from apps.core.snapshots import invalidate_snapshots
+    if user_ids:
+        transaction.on_commit(lambda: invalidate_snapshots(user_ids))
+
+
+def _accrue_batch(batch_size):
+    from apps.transactions.models import Transaction
+
+    unaccrued = Transaction.objects.filter(status='completed', rewards_accrued=False)
+    candidates = unaccrued.order_by('pk')
+    if connection.features.has_select_for_update_skip_locked:
+        candidates = candidates.select_for_update(skip_locked=True)
+    ids = list(candidates.values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return 0
+    if unaccrued.filter(pk__in=ids).update(rewards_accrued=True) != len(ids):
+        # Another worker took some of these rows; roll back and take a fresh batch
+        raise AccrualConflict
+
+    rate = Decimal(str(getattr(settings, 'REWARDS_POINTS_PER_DOLLAR', 1)))
+    earned = {
+        user_id: int(points)
+        for user_id, points in Transaction.objects.filter(
+            pk__in=ids, transaction_type__in=REWARD_TYPES, from_account__isnull=False
+        ).values('from_account__user_id').annotate(points=Sum(Floor(F('amount') * rate)))
+        .values_list('from_account__user_id', 'points')
+        if points
+    }
+    user_ids = sorted(earned)
+    Rewards.objects.bulk_create([Rewards(user_id=user_id) for user_id in user_ids], ignore_conflicts=True)
+
+    now = timezone.now()
+    for i in range(0, len(user_ids), UPDATE_CHUNK_SIZE):
+        chunk = user_ids[i:i + UPDATE_CHUNK_SIZE]
+        points = Case(*[When(user_id=user_id, then=Value(earned[user_id])) for user_id in chunk],
+                      output_field=IntegerField())
+        Rewards.objects.filter(user_id__in=chunk).update(
+            points=F('points') + points, points_earned=F('points_earned') + points, last_updated=now
+        )
+    _invalidate(user_ids)
+    return len(ids)
+
+
+def accrue_rewards(batch_size=ACCRUAL_BATCH_SIZE):
+    """Credit points for completed transactions not yet accrued; return how many were processed.
+
+    Works in micro-batches taken in id order from a partial index of
+    unaccrued transactions. Each batch marks its transactions and credits
+    the points of every affected user with set-based updates in one
+    transaction, so a transaction is credited exactly once no matter how
+    it was completed.
+    """
+    from apps.transactions.services import run_with_retry
+
+    total = 0
+    while True:
+        try:
+            processed = run_with_retry(_accrue_batch, batch_size)
+        except AccrualConflict:
+            # Not a database failure: the other worker made progress, so
+            # retrying can't loop forever and needs no backoff
+            continue
+        if not processed:
+            return total
+        total += processed
+
+
+def recalculate_tiers(chunk_size=TIER_CHUNK_SIZE):
+    """Set every user's tier from their lifetime points; return how many changed.
+
+    Walks the table in primary key ranges. Each range costs one UPDATE per
+    tier that only touches rows whose tier actually changes.
+    """
+    bounds = Rewards.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return 0
+
+    changed = 0
+    for start in range(bounds['low'], bounds['high'] + 1, chunk_size):
+        with transaction.atomic():
+            rows = Rewards.objects.filter(pk__gte=start, pk__lt=start + chunk_size)
+            upper = None
+            moved = []
+            for position, (tier, minimum) in enumerate(TIERS):
+                band = rows.exclude(tier=tier)
+                if position < len(TIERS) - 1:
+                    band = band.filter(points_earned__gte=minimum)
+                if upper is not None:
+                    band = band.filter(points_earned__lt=upper)
+                moved += band.values_list('user_id', flat=True)
+                band.update(tier=tier)
+                upper = minimum
+            _invalidate(moved)
+            changed += len(moved)
+    return changed
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(fields=['user', 'status'], name='card_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='card',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['issued_date'], name='card_pending_issued_idx'),
+        ),
+    ]
@@ -40,6 +40,11 @@ class Card(models.Model):
     
     class Meta:
         db_table = 'cards'
+        indexes = [
+            models.Index(fields=['user', 'status'], name='card_user_status_idx'),
+            models.Index(fields=['issued_date'], name='card_pending_issued_idx',
+                         condition=models.Q(status='pending')),
+        ]
 
 class CardTransaction(models.Model):
     card = models.ForeignKey(Card, on_delete=models.CASCADE, related_name='transactions')
@@ -0,0 +1,119 @@
+# apps/core/approvals.py
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ApprovalTask
+
+QUEUE_MODELS = {
+    'transaction': 'transactions.Transaction',
+    'loan': 'loans.Loan',
+    'insurance': 'insurance.Insurance',
+}
+# Held customer payments are reviewed before applications
+PRIORITIES = {'transaction': 2, 'loan': 1, 'insurance': 0}
+EMPLOYEE_KINDS = ('transaction',)
+MANAGER_KINDS = ('transaction', 'loan', 'insurance')
+
+
+def queue_model(kind):
+    return apps.get_model(QUEUE_MODELS[kind])
+
+
+def kind_of(model):
+    return next(kind for kind in QUEUE_MODELS if queue_model(kind) is model)
+
+
+def enqueue(kind, object_id):
+    ApprovalTask.objects.get_or_create(kind=kind, object_id=object_id, defaults={'priority': PRIORITIES[kind]})
+
+
+def resolve(kind, object_id):
+    ApprovalTask.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def claim_tasks(user, kinds, limit=10):
+    """Lease up to limit tasks of the given kinds to user and return them in queue order.
+
+    Tasks the user already holds are renewed first and count towards the
+    limit. New ones are taken from the head of the queue with SKIP LOCKED
+    where the database has it, so concurrent reviewers get disjoint tasks
+    without waiting on each other. The claiming UPDATE re-checks that each
+    task is still free, which keeps databases without row locks correct too.
+    """
+    now = timezone.now()
+    until = now + timedelta(seconds=getattr(settings, 'APPROVAL_LEASE_SECONDS', 900))
+    with transaction.atomic():
+        renewed = ApprovalTask.objects.filter(
+            claimed_by=user, lease_expires_at__gt=now, kind__in=kinds
+        ).update(lease_expires_at=until)
+
+        if renewed < limit:
+            claimable = ApprovalTask.objects.filter(kind__in=kinds).filter(
+                Q(claimed_by__isnull=True) | Q(lease_expires_at__lte=now)
+            )
+            candidates = claimable.order_by('-priority', 'created_at')
+            if connection.features.has_select_for_update_skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            ids = list(candidates.values_list('pk', flat=True)[:limit - renewed])
+            claimable.filter(pk__in=ids).update(claimed_by=user, lease_expires_at=until)
+
+    return list(
+        ApprovalTask.objects.filter(claimed_by=user, lease_expires_at=until, kind__in=kinds)
+        .order_by('-priority', 'created_at')
+    )
+
+
+def release_tasks(user, task_ids=None):
+    """Hand the user's claimed tasks back to the queue"""
+    tasks = ApprovalTask.objects.filter(claimed_by=user)
+    if task_ids is not None:
+        tasks = tasks.filter(pk__in=task_ids)
+    return tasks.update(claimed_by=None, lease_expires_at=None)
+
+
+def claimed_items(user, kinds, limit=10):
+    """Claim tasks for user and load their items, as a dict of kind to list of instances in queue order"""
+    tasks = claim_tasks(user, kinds, limit)
+    items = {kind: [] for kind in kinds}
+    for kind in kinds:
+        ids = [task.object_id for task in tasks if task.kind == kind]
+        found = queue_model(kind).objects.in_bulk(ids)
+        for object_id in ids:
+            item = found.get(object_id)
+            if item is None or item.status != 'pending':
+                # Decided or deleted without a signal (e.g. a queryset update)
+                resolve(kind, object_id)
+                continue
+            items[kind].append(item)
+    return items
+
+
+def sync_queue():
+    """Enqueue pending items that have no task and drop tasks whose item is no longer pending"""
+    added = removed = 0
+    for kind in QUEUE_MODELS:
+        pending = set(queue_model(kind).objects.filter(status='pending').values_list('pk', flat=True))
+        queued = set(ApprovalTask.objects.filter(kind=kind).values_list('object_id', flat=True))
+        ApprovalTask.objects.bulk_create(
+            [ApprovalTask(kind=kind, object_id=pk, priority=PRIORITIES[kind]) for pk in pending - queued],
+            batch_size=1000, ignore_conflicts=True,
+        )
+        removed += ApprovalTask.objects.filter(kind=kind, object_id__in=queued - pending).delete()[0]
+        added += len(pending - queued)
+    return added, removed
+
+
+def item_saved(sender, instance, created, **kwargs):
+    if instance.status == 'pending':
+        enqueue(kind_of(sender), instance.pk)
+    elif not created:
+        resolve(kind_of(sender), instance.pk)
+
+
+def item_deleted(sender, instance, **kwargs):
+    resolve(kind_of(sender), instance.pk)
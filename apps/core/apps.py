@@ -3,4 +3,27 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.core'
\ No newline at end of file
+    name = 'apps.core'
+
+    def ready(self):
+        from django.db.models.signals import post_save, post_delete
+        from apps.accounts.models import Notification, Rewards
+        from apps.transactions.signals import transaction_posted
+        from . import approvals, counters, snapshots, unread
+
+        transaction_posted.connect(snapshots.transactions_posted, dispatch_uid='dashboard_transactions_posted')
+        post_save.connect(snapshots.notification_saved, sender=Notification, dispatch_uid='dashboard_notification')
+        post_save.connect(snapshots.rewards_saved, sender=Rewards, dispatch_uid='dashboard_rewards')
+        post_save.connect(unread.notification_saved, sender=Notification, dispatch_uid='unread_notification_saved')
+        post_delete.connect(unread.notification_deleted, sender=Notification, dispatch_uid='unread_notification_deleted')
+
+        # Rows inserted with bulk_create skip these; the posting path counts
+        # them itself and resync_counters corrects any remaining drift
+        for name, model in counters._counted_models().items():
+            post_save.connect(counters.row_saved, sender=model, dispatch_uid=f'counter_saved_{name}')
+            post_delete.connect(counters.row_deleted, sender=model, dispatch_uid=f'counter_deleted_{name}')
+
+        for kind in approvals.QUEUE_MODELS:
+            model = approvals.queue_model(kind)
+            post_save.connect(approvals.item_saved, sender=model, dispatch_uid=f'approval_saved_{kind}')
+            post_delete.connect(approvals.item_deleted, sender=model, dispatch_uid=f'approval_deleted_{kind}')
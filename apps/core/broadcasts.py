@@ -0,0 +1,160 @@
+# apps/core/broadcasts.py
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_EXCEPTION
+
+import django
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import Count, F, Max, Min, Sum
+from django.utils import timezone
+
+from .models import Broadcast, BroadcastShard
+
+CHUNK_SIZE = 1000
+PROGRESS_INTERVAL = 2  # seconds
+
+
+def _audience(broadcast):
+    from apps.accounts.models import User
+    users = User.objects.filter(is_active=True)
+    if broadcast.audience:
+        users = users.filter(role=broadcast.audience)
+    return users
+
+
+def create_broadcast(title, message, audience='customer', shards=8, notification_type='system',
+                     is_important=False, created_by=None):
+    """Record a broadcast and split its audience into user id ranges; nothing is sent yet.
+
+    The audience is fixed when the broadcast is created: users who sign up
+    afterwards fall outside the last range and are not notified.
+    """
+    with transaction.atomic():
+        broadcast = Broadcast.objects.create(
+            title=title, message=message, audience=audience, notification_type=notification_type,
+            is_important=is_important, created_by=created_by,
+        )
+        bounds = _audience(broadcast).aggregate(low=Min('pk'), high=Max('pk'), total=Count('pk'))
+        broadcast.total_users = bounds['total']
+        broadcast.save(update_fields=['total_users'])
+        if bounds['low'] is not None:
+            step = math.ceil((bounds['high'] - bounds['low'] + 1) / shards)
+            BroadcastShard.objects.bulk_create([
+                BroadcastShard(broadcast=broadcast, first_user_id=start, checkpoint=start - 1,
+                               last_user_id=min(start + step - 1, bounds['high']))
+                for start in range(bounds['low'], bounds['high'] + 1, step)
+            ])
+    return broadcast
+
+
+def _send_chunk(shard_id, chunk_size):
+    from apps.accounts.models import Notification
+    from .snapshots import invalidate_snapshots
+    from .unread import reset_unread
+
+    if not connection.features.has_select_for_update:
+        # SQLite: take the write lock up front, as lock_accounts does, so
+        # parallel workers wait on the busy timeout instead of failing
+        BroadcastShard.objects.filter(pk=shard_id).update(sent=F('sent'))
+    shard = BroadcastShard.objects.select_for_update().select_related('broadcast').get(pk=shard_id)
+    if shard.done:
+        return 0, True
+    broadcast = shard.broadcast
+    user_ids = list(
+        _audience(broadcast).filter(pk__gt=shard.checkpoint, pk__lte=shard.last_user_id)
+        .order_by('pk').values_list('pk', flat=True)[:chunk_size]
+    )
+    Notification.objects.bulk_create(
+        [
+            Notification(user_id=user_id, notification_type=broadcast.notification_type, title=broadcast.title,
+                         message=broadcast.message, is_important=broadcast.is_important)
+            for user_id in user_ids
+        ],
+        batch_size=chunk_size,
+    )
+    # The notifications and the checkpoint commit together, so a resumed
+    # fan-out never notifies anyone twice or skips anyone
+    if user_ids:
+        shard.checkpoint = user_ids[-1]
+    shard.sent += len(user_ids)
+    shard.done = len(user_ids) < chunk_size
+    shard.save(update_fields=['checkpoint', 'sent', 'done'])
+    # bulk_create sends no post_save
+    if user_ids:
+        transaction.on_commit(lambda: invalidate_snapshots(user_ids))
+        transaction.on_commit(lambda: reset_unread(user_ids))
+    return len(user_ids), shard.done
+
+
+def run_shard(shard_id, rows_per_second=None, chunk_size=CHUNK_SIZE):
+    """Fan out one shard from its checkpoint, a chunk per transaction, at most rows_per_second"""
+    from apps.transactions.services import run_with_retry
+
+    total = 0
+    while True:
+        started = time.monotonic()
+        sent, done = run_with_retry(_send_chunk, shard_id, chunk_size)
+        total += sent
+        if done:
+            return total
+        if rows_per_second:
+            time.sleep(max(0, sent / rows_per_second - (time.monotonic() - started)))
+
+
+def broadcast_progress(broadcast):
+    """Notifications sent so far and the audience size"""
+    sent = broadcast.shards.aggregate(sent=Sum('sent'))['sent'] or 0
+    return sent, broadcast.total_users
+
+
+def run_broadcast(broadcast, workers=None, rows_per_second=None, chunk_size=CHUNK_SIZE, progress=None):
+    """Send a broadcast, or resume it from its checkpoints, and return the number sent in this run.
+
+    Shards are fanned out in parallel by a pool of worker processes
+    (BROADCAST_WORKERS, or inline when 0). The total insert rate is capped
+    at BROADCAST_MAX_ROWS_PER_SECOND, split between the running workers.
+    progress, if given, is called with (sent, total, rows per second) every
+    few seconds and at the end.
+    """
+    if workers is None:
+        workers = getattr(settings, 'BROADCAST_WORKERS', 0)
+    if rows_per_second is None:
+        rows_per_second = getattr(settings, 'BROADCAST_MAX_ROWS_PER_SECOND', None)
+
+    shard_ids = list(broadcast.shards.filter(done=False).order_by('pk').values_list('pk', flat=True))
+    per_shard_rate = rows_per_second / max(1, min(workers, len(shard_ids))) if rows_per_second else None
+    Broadcast.objects.filter(pk=broadcast.pk).update(status='running')
+    already_sent, total = broadcast_progress(broadcast)
+    started = time.monotonic()
+
+    def report():
+        sent, total = broadcast_progress(broadcast)
+        if progress is not None:
+            progress(sent, total, (sent - already_sent) / max(time.monotonic() - started, 1e-9))
+        return sent
+
+    if workers:
+        # Spawned workers open their own database connections; forked ones
+        # would share the parent's
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=django.setup) as pool:
+            futures = [pool.submit(run_shard, shard_id, per_shard_rate, chunk_size) for shard_id in shard_ids]
+            while True:
+                finished, running = wait(futures, timeout=PROGRESS_INTERVAL, return_when=FIRST_EXCEPTION)
+                if not running or any(future.exception() for future in finished):
+                    break
+                report()
+            for future in futures:
+                future.result()
+    else:
+        for shard_id in shard_ids:
+            run_shard(shard_id, per_shard_rate, chunk_size)
+            report()
+
+    sent = report()
+    if not broadcast.shards.filter(done=False).exists():
+        Broadcast.objects.filter(pk=broadcast.pk).update(status='completed', finished_at=timezone.now())
+    return sent - already_sent
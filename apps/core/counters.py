@@ -0,0 +1,75 @@
+# apps/core/counters.py
+import random
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import Counter
+
+
+def _counted_models():
+    from apps.accounts.models import User, BankAccount
+    from apps.transactions.models import Transaction
+    return {'users': User, 'accounts': BankAccount, 'transactions': Transaction}
+
+
+def increment(name, delta=1):
+    """Add delta to a random shard of the counter.
+
+    Spreading writes over COUNTER_SHARDS rows keeps concurrent postings from
+    queueing on a single hot row. Call it inside the transaction that
+    inserts or deletes the rows being counted.
+    """
+    if not delta:
+        return
+    shard = random.randrange(getattr(settings, 'COUNTER_SHARDS', 8))
+    row = Counter.objects.filter(name=name, shard=shard)
+    if row.update(value=F('value') + delta):
+        return
+    try:
+        with transaction.atomic():
+            Counter.objects.create(name=name, shard=shard, value=delta)
+    except IntegrityError:
+        # A concurrent writer created the shard first
+        row.update(value=F('value') + delta)
+
+
+def read_counters(*names):
+    """Current values of the named counters, with one indexed query over their shards"""
+    totals = dict(
+        Counter.objects.filter(name__in=names).values('name').annotate(total=Sum('value'))
+        .values_list('name', 'total')
+    )
+    return {name: totals.get(name) or 0 for name in names}
+
+
+def resync_counters(names=None):
+    """Reset counters to exact COUNT(*) values and return them.
+
+    The shard rows are locked before counting. A writer whose rows are not
+    yet committed blocks on the lock when it increments, so its change lands
+    on top of the exact value instead of being lost or counted twice.
+    """
+    models = _counted_models()
+    exact = {}
+    for name in names or models:
+        with transaction.atomic():
+            list(Counter.objects.select_for_update().filter(name=name))
+            exact[name] = models[name].objects.count()
+            Counter.objects.filter(name=name).exclude(shard=0).update(value=0)
+            Counter.objects.update_or_create(name=name, shard=0, defaults={'value': exact[name]})
+    return exact
+
+
+def _name_for(model):
+    return next(name for name, counted in _counted_models().items() if counted is model)
+
+
+def row_saved(sender, instance, created, **kwargs):
+    if created:
+        increment(_name_for(sender))
+
+
+def row_deleted(sender, instance, **kwargs):
+    increment(_name_for(sender), -1)
@@ -0,0 +1,19 @@
+# apps/core/decorators.py
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user
+from django.http import JsonResponse
+
+
+def async_login_required(view):
+    """login_required for async views: resolves the session user off the event loop, 401 if anonymous"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await sync_to_async(get_user)(request)
+        if not user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+        request.user = user
+        return await view(request, *args, **kwargs)
+
+    return wrapper
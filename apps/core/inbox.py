@@ -0,0 +1,62 @@
+# apps/core/inbox.py
+from django.db import transaction
+from django.utils import timezone
+
+from apps.accounts.models import Notification
+from apps.transactions.pagination import keyset_paginate
+from .snapshots import invalidate_snapshot
+from .unread import adjust_unread
+
+INBOX_PAGE_SIZE = 20
+PURGE_BATCH_SIZE = 1000
+
+
+def inbox_page(user, cursor=None, per_page=INBOX_PAGE_SIZE, unread_only=False):
+    """One keyset page of the user's notifications, newest first"""
+    notifications = Notification.objects.filter(user=user)
+    if unread_only:
+        notifications = notifications.filter(is_read=False)
+    return keyset_paginate(notifications, cursor, per_page=per_page, field='created_at')
+
+
+def newest_notification_id(user_id):
+    """Id of the user's newest notification, 0 if they have none"""
+    return Notification.objects.filter(user_id=user_id).order_by('-id').values_list('pk', flat=True).first() or 0
+
+
+def acknowledge(user_id, ids=None, up_to=None):
+    """Mark the user's unread notifications as read with a single UPDATE; return how many changed.
+
+    Either give the ids to acknowledge, or up_to, the id of the newest
+    notification the user has seen: everything up to and including it is
+    acknowledged, while newer ones that arrived meanwhile stay unread.
+    Giving neither acknowledges everything.
+    """
+    unread = Notification.objects.filter(user_id=user_id, is_read=False)
+    if ids is not None:
+        unread = unread.filter(pk__in=ids)
+    if up_to is not None:
+        unread = unread.filter(pk__lte=up_to)
+
+    with transaction.atomic():
+        changed = unread.update(is_read=True, read_at=timezone.now())
+        if changed:
+            # update() sends no post_save; the UPDATE's row count is exactly
+            # how far the unread counter has to move
+            transaction.on_commit(lambda: adjust_unread(user_id, -changed))
+            transaction.on_commit(lambda: invalidate_snapshot(user_id))
+    return changed
+
+
+def purge_read_notifications(older_than, batch_size=PURGE_BATCH_SIZE):
+    """Delete read notifications created before older_than in short batches; return how many went"""
+    total = 0
+    while True:
+        ids = list(
+            Notification.objects.filter(is_read=True, created_at__lt=older_than)
+            .order_by('created_at').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return total
+        with transaction.atomic():
+            total += Notification.objects.filter(pk__in=ids, is_read=True).delete()[0]
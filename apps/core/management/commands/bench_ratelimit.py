@@ -0,0 +1,53 @@
+# apps/core/management/commands/bench_ratelimit.py
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from apps.core.middleware import RateLimitMiddleware
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class Command(BaseCommand):
+    help = 'Measure the time RateLimitMiddleware adds to each request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+        parser.add_argument('--clients', type=int, default=1000, help='Distinct client IPs for normal traffic')
+        parser.add_argument('--locmem', action='store_true', help='Use a local-memory cache instead of CACHES')
+
+    def handle(self, *args, **options):
+        if options['locmem']:
+            with override_settings(CACHES=LOCMEM_CACHE):
+                self.run(options)
+        else:
+            self.run(options)
+
+    def run(self, options):
+        factory = RequestFactory()
+        count = options['requests']
+        spread = []
+        for i in range(count):
+            client = i % options['clients']
+            request = factory.get(f'/transactions/{i}/', REMOTE_ADDR=f'10.{client // 65536}.{client // 256 % 256}.{client % 256}')
+            request.user = AnonymousUser()
+            spread.append(request)
+        flood = factory.get('/login/', REMOTE_ADDR='10.255.255.1')
+        flood.user = AnonymousUser()
+
+        for label, requests in (('normal traffic', spread), ('single-client flood', [flood] * count)):
+            try:
+                cache.clear()
+            except Exception as e:
+                self.stderr.write(f"Could not clear the cache: {e}")
+            middleware = RateLimitMiddleware(lambda request: None)
+            started = time.perf_counter()
+            rejected = sum(middleware.process_request(request) is not None for request in requests)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{label}: {elapsed / count * 1e6:.1f} us/request, "
+                f"{rejected} of {count} rejected"
+            )
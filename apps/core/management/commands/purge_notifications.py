@@ -0,0 +1,21 @@
+# apps/core/management/commands/purge_notifications.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.core.inbox import purge_read_notifications, PURGE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Delete read notifications older than the retention period in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90))
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted = purge_read_notifications(cutoff, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} read notifications older than {options["days"]} days.'))
@@ -1,5 +1,6 @@
 # apps/core/management/commands/seed_data.py
 from django.core.management.base import BaseCommand
+from django.core.management import call_command
 from django.contrib.auth import get_user_model
 from apps.accounts.models import BankAccount, Branch
 from apps.transactions.models import Transaction
@@ -120,6 +121,9 @@ class Command(BaseCommand):
                 timestamp=datetime.now() - timedelta(days=random.randint(1, 30))
             )
         
+        # Sample transactions bypass the posting path, so build their rollup rows
+        call_command('backfill_daily_spending', stdout=self.stdout)
+
         self.stdout.write(self.style.SUCCESS('Database seeded successfully!'))
         self.stdout.write('Login credentials:')
         self.stdout.write('Admin: username=admin, password=admin123')
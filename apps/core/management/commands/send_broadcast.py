@@ -0,0 +1,44 @@
+# apps/core/management/commands/send_broadcast.py
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.broadcasts import create_broadcast, run_broadcast, CHUNK_SIZE
+from apps.core.models import Broadcast
+
+
+class Command(BaseCommand):
+    help = 'Send a notification to every user of an audience, or resume an interrupted broadcast'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--title')
+        parser.add_argument('--message')
+        parser.add_argument('--audience', default='customer', help="User role to notify; '' for everyone")
+        parser.add_argument('--type', default='system', dest='notification_type')
+        parser.add_argument('--important', action='store_true')
+        parser.add_argument('--shards', type=int, default=8)
+        parser.add_argument('--resume', type=int, metavar='BROADCAST_ID')
+        parser.add_argument('--workers', type=int, help='Worker processes (default BROADCAST_WORKERS)')
+        parser.add_argument('--rate', type=float, help='Max notifications per second (default BROADCAST_MAX_ROWS_PER_SECOND)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            try:
+                broadcast = Broadcast.objects.get(pk=options['resume'])
+            except Broadcast.DoesNotExist:
+                raise CommandError(f"Broadcast {options['resume']} does not exist")
+        elif options['title'] and options['message']:
+            broadcast = create_broadcast(
+                options['title'], options['message'], audience=options['audience'], shards=options['shards'],
+                notification_type=options['notification_type'], is_important=options['important'],
+            )
+            self.stdout.write(f'Broadcast {broadcast.pk} to {broadcast.total_users} users.')
+        else:
+            raise CommandError('Give --title and --message, or --resume')
+
+        def progress(sent, total, rate):
+            percent = 100 * sent / total if total else 100
+            self.stdout.write(f'Sent {sent}/{total} ({percent:.1f}%) at {rate:.0f} notifications/s')
+
+        sent = run_broadcast(broadcast, workers=options['workers'], rows_per_second=options['rate'],
+                             chunk_size=options['chunk_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'Broadcast {broadcast.pk}: sent {sent} notifications in this run.'))
@@ -0,0 +1,12 @@
+# apps/core/management/commands/sync_approval_queue.py
+from django.core.management.base import BaseCommand
+
+from apps.core.approvals import sync_queue
+
+
+class Command(BaseCommand):
+    help = 'Reconcile the approval queue with pending transactions, loans and insurance policies'
+
+    def handle(self, *args, **options):
+        added, removed = sync_queue()
+        self.stdout.write(self.style.SUCCESS(f'Queued {added} pending items, dropped {removed} stale tasks.'))
@@ -0,0 +1,22 @@
+# apps/core/management/commands/sync_counters.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core.counters import resync_counters
+
+
+class Command(BaseCommand):
+    help = 'Reset the admin dashboard counters to exact row counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep re-syncing every --interval seconds')
+        parser.add_argument('--interval', type=int, default=3600)
+
+    def handle(self, *args, **options):
+        while True:
+            exact = resync_counters()
+            self.stdout.write(', '.join(f'{name}={value}' for name, value in exact.items()))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
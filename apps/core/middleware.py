@@ -1,6 +1,8 @@
+import math
 import time
 import json
-from django.core.cache import cache
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
 from django.utils.deprecation import MiddlewareMixin
 from django.contrib.auth import get_user_model
 from django.http import JsonResponse
@@ -40,46 +42,50 @@ class AuditLogMiddleware(MiddlewareMixin):
         return ip
 
 class RateLimitMiddleware(MiddlewareMixin):
-    """Middleware to implement rate limiting"""
+    """Sliding-window rate limiting per route group, per user and per client IP.
+
+    Must come after AuthenticationMiddleware so signed-in users get their
+    own limits; anonymous requests are limited by IP only.
+    """
+    
+    def __init__(self, get_response=None):
+        from .ratelimit import RateLimiter
+        if not getattr(settings, 'RATE_LIMIT_ENABLE', True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.limiter = RateLimiter()
     
     def process_request(self, request):
+        from .ratelimit import EXEMPT_PREFIXES, route_group
+        
         # Skip rate limiting for certain paths
-        if request.path.startswith('/admin/') or request.path.startswith('/static/'):
+        if request.path.startswith(EXEMPT_PREFIXES):
             return None
+        policy = route_group(request.path)
+        if policy is None:
+            return None
+        group, prefixes, per_user, per_ip = policy
         
-        # Get client IP
-        ip = self.get_client_ip(request)
-        
-        # Rate limiting rules
-        if request.path.startswith('/auth/login/'):
-            limit = 5  # 5 login attempts per minute
-            window = 60
-        elif request.path.startswith('/api/'):
-            limit = 100  # 100 API calls per minute
-            window = 60
-        else:
-            limit = 200  # 200 page requests per minute
-            window = 60
-        
-        # Check rate limit
-        cache_key = f"rate_limit_{ip}_{request.path}"
-        current_requests = cache.get(cache_key, 0)
-        
-        if current_requests >= limit:
-            return JsonResponse({
-                'error': 'Rate limit exceeded. Please try again later.',
-                'retry_after': window
-            }, status=429)
+        checks = []
+        user = getattr(request, 'user', None)
+        if per_user and user is not None and user.is_authenticated:
+            checks.append((f"{group}_user_{user.pk}", per_user))
+        if per_ip:
+            checks.append((f"{group}_ip_{self.get_client_ip(request)}", per_ip))
         
-        # Increment counter
-        cache.set(cache_key, current_requests + 1, window)
+        now = time.time()
+        for key, (limit, window) in checks:
+            retry_after = self.limiter.check(key, limit, window, now)
+            if retry_after:
+                response = JsonResponse({
+                    'error': 'Rate limit exceeded. Please try again later.',
+                    'retry_after': math.ceil(retry_after)
+                }, status=429)
+                response['Retry-After'] = str(math.ceil(retry_after))
+                return response
         
         return None
     
     def get_client_ip(self, request):
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip
\ No newline at end of file
+        from .ratelimit import client_ip
+        return client_ip(request)
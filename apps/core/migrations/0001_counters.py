@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:10
+
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    """Start every counter at the exact row count of its table"""
+    Counter = apps.get_model('core', 'Counter')
+    counted = {
+        'users': apps.get_model('accounts', 'User'),
+        'accounts': apps.get_model('accounts', 'BankAccount'),
+        'transactions': apps.get_model('transactions', 'Transaction'),
+    }
+    Counter.objects.bulk_create(
+        [Counter(name=name, shard=0, value=model.objects.count()) for name, model in counted.items()]
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0003_hot_query_indexes'),
+        ('transactions', '0009_daily_spending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'counters',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='counter',
+            constraint=models.UniqueConstraint(fields=('name', 'shard'), name='counter_name_shard_uniq'),
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def queue_pending_items(apps, schema_editor):
+    """Put every item that is already waiting for approval on the queue"""
+    ApprovalTask = apps.get_model('core', 'ApprovalTask')
+    queues = [
+        ('transaction', apps.get_model('transactions', 'Transaction'), 2),
+        ('loan', apps.get_model('loans', 'Loan'), 1),
+        ('insurance', apps.get_model('insurance', 'Insurance'), 0),
+    ]
+    for kind, model, priority in queues:
+        ApprovalTask.objects.bulk_create(
+            [
+                ApprovalTask(kind=kind, object_id=pk, priority=priority)
+                for pk in model.objects.filter(status='pending').values_list('pk', flat=True).iterator()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0001_counters'),
+        ('loans', '0002_hot_query_indexes'),
+        ('insurance', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApprovalTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('transaction', 'Transaction'), ('loan', 'Loan'), ('insurance', 'Insurance')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('priority', models.SmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('claimed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='approval_tasks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'approval_tasks',
+                'indexes': [models.Index(fields=['kind', '-priority', 'created_at'], name='approval_queue_idx'), models.Index(condition=models.Q(('claimed_by__isnull', False)), fields=['claimed_by', 'lease_expires_at'], name='approval_claimed_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='approvaltask',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='approval_task_uniq'),
+        ),
+        migrations.RunPython(queue_pending_items, migrations.RunPython.noop),
+    ]
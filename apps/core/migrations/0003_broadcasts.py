@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0002_approval_tasks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Broadcast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('notification_type', models.CharField(default='system', max_length=20)),
+                ('title', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('is_important', models.BooleanField(default=False)),
+                ('audience', models.CharField(blank=True, help_text='User role to notify; blank for everyone', max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed')], default='pending', max_length=20)),
+                ('total_users', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='broadcasts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'broadcasts',
+            },
+        ),
+        migrations.CreateModel(
+            name='BroadcastShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_user_id', models.BigIntegerField()),
+                ('last_user_id', models.BigIntegerField()),
+                ('checkpoint', models.BigIntegerField()),
+                ('sent', models.PositiveIntegerField(default=0)),
+                ('done', models.BooleanField(default=False)),
+                ('broadcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='core.broadcast')),
+            ],
+            options={
+                'db_table': 'broadcast_shards',
+            },
+        ),
+    ]
@@ -1 +1,99 @@
-from django.db import models
\ No newline at end of file
+from django.conf import settings
+from django.db import models
+
+
+class Counter(models.Model):
+    """One shard of a global row count; the count is the sum of its shards"""
+    name = models.CharField(max_length=50)
+    shard = models.PositiveSmallIntegerField()
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'counters'
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'shard'], name='counter_name_shard_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.name}[{self.shard}] = {self.value}"
+
+
+class ApprovalTask(models.Model):
+    """A pending transaction, loan or insurance policy waiting for a staff decision.
+
+    Staff claim tasks for a limited lease; a task whose lease ran out can be
+    claimed by someone else. Tasks are deleted once their item is decided.
+    """
+    KINDS = [
+        ('transaction', 'Transaction'),
+        ('loan', 'Loan'),
+        ('insurance', 'Insurance'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KINDS)
+    object_id = models.BigIntegerField()
+    priority = models.SmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='approval_tasks')
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'approval_tasks'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='approval_task_uniq'),
+        ]
+        indexes = [
+            # Queue order: highest priority, then oldest, within the kinds a reviewer handles
+            models.Index(fields=['kind', '-priority', 'created_at'], name='approval_queue_idx'),
+            # Only a small slice of the queue is claimed at any time
+            models.Index(fields=['claimed_by', 'lease_expires_at'], name='approval_claimed_idx',
+                         condition=models.Q(claimed_by__isnull=False)),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+
+class Broadcast(models.Model):
+    """A notification sent to every user of an audience, fanned out in resumable shards"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+    ]
+
+    notification_type = models.CharField(max_length=20, default='system')
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    is_important = models.BooleanField(default=False)
+    audience = models.CharField(max_length=20, blank=True, help_text='User role to notify; blank for everyone')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    total_users = models.PositiveIntegerField(default=0)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='broadcasts')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'broadcasts'
+
+    def __str__(self):
+        return f"{self.title} ({self.status})"
+
+
+class BroadcastShard(models.Model):
+    """A user id range of a broadcast and how far its fan-out has got"""
+    broadcast = models.ForeignKey(Broadcast, on_delete=models.CASCADE, related_name='shards')
+    first_user_id = models.BigIntegerField()
+    last_user_id = models.BigIntegerField()
+    # Highest user id already notified; fan-out resumes after it
+    checkpoint = models.BigIntegerField()
+    sent = models.PositiveIntegerField(default=0)
+    done = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = 'broadcast_shards'
+
+    def __str__(self):
+        return f"{self.broadcast_id} [{self.first_user_id}, {self.last_user_id}]"
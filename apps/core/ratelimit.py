@@ -0,0 +1,179 @@
+# apps/core/ratelimit.py
+import ipaddress
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# (route group, path prefixes, per-user limit, per-IP limit), first match wins.
+# Limits are (requests, window in seconds); None leaves that scope unlimited.
+DEFAULT_POLICIES = [
+    ('login', ('/login/', '/auth/login/', '/register/'), None, (5, 60)),
+    ('api', ('/api/',), (100, 60), (300, 60)),
+    ('pages', ('/',), (200, 60), (1000, 60)),
+]
+# Never limited: the admin, static files, and long-lived connections such as the
+# notification stream, whose reconnects are paced by the server's retry interval
+EXEMPT_PREFIXES = ('/admin/', '/static/', '/notifications/stream/')
+LOCAL_MAX_KEYS = 10000
+CACHE_RETRY_INTERVAL = 30  # seconds to skip the shared tier after a cache error
+
+
+def _trusted_proxies():
+    return [ipaddress.ip_network(proxy, strict=False)
+            for proxy in getattr(settings, 'RATE_LIMIT_TRUSTED_PROXIES', [])]
+
+
+def _is_trusted(address, proxies):
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in proxies)
+
+
+def client_ip(request):
+    """The address to rate limit a request by.
+
+    X-Forwarded-For is client-controlled, so it is only read when the
+    request came from one of RATE_LIMIT_TRUSTED_PROXIES. Even then it is
+    walked from the right, past the trusted hops, and the first address a
+    trusted proxy saw is used; anything further left could be spoofed.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR', '')
+    proxies = _trusted_proxies()
+    if not proxies or not _is_trusted(remote_addr, proxies):
+        return remote_addr
+    forwarded = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+    for hop in reversed(forwarded):
+        if not _is_trusted(hop, proxies):
+            return hop
+    return forwarded[0] if forwarded else remote_addr
+
+
+def policies():
+    return getattr(settings, 'RATE_LIMIT_POLICIES', DEFAULT_POLICIES)
+
+
+def route_group(path):
+    """The policy for a path, by prefix, so /transactions/<uuid>/ shares one bucket per group"""
+    for policy in policies():
+        if path.startswith(policy[1]):
+            return policy
+    return None
+
+
+def _estimate(previous, current, now, window):
+    # Sliding window: the previous fixed window counts in proportion to how
+    # much of it still lies inside the last `window` seconds
+    return previous * (1 - (now % window) / window) + current
+
+
+class LocalCounters:
+    """Per-process sliding-window counts and remembered rejections.
+
+    Each process only sees its own share of the traffic, so its counts never
+    exceed the shared ones: whatever it rejects would have been rejected by
+    the shared counter too, without the round trip.
+    """
+
+    def __init__(self, max_keys=LOCAL_MAX_KEYS):
+        self.max_keys = max_keys
+        self._counts = {}
+        self._blocked = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key, window, now):
+        index = int(now // window)
+        with self._lock:
+            if len(self._counts) >= self.max_keys and key not in self._counts:
+                self._prune(now)
+            last_index, previous, current = self._counts.get(key, (index, 0, 0))
+            if last_index != index:
+                previous = current if last_index == index - 1 else 0
+                current = 0
+            current += 1
+            self._counts[key] = (index, previous, current)
+        return _estimate(previous, current, now, window)
+
+    def block(self, key, until):
+        with self._lock:
+            self._blocked[key] = until
+
+    def blocked(self, key, now):
+        """Seconds until a remembered rejection lapses, 0 if there is none"""
+        until = self._blocked.get(key)
+        if until is None:
+            return 0
+        if until <= now:
+            with self._lock:
+                self._blocked.pop(key, None)
+            return 0
+        return until - now
+
+    def _prune(self, now):
+        self._blocked = {key: until for key, until in self._blocked.items() if until > now}
+        # Drop the older half rather than one key at a time
+        by_age = sorted(self._counts, key=lambda key: self._counts[key][0])
+        for key in by_age[:len(by_age) // 2 + 1]:
+            del self._counts[key]
+
+
+class RateLimiter:
+    """Sliding-window limits on the shared cache with an in-process tier in front.
+
+    A request is checked against the local counts first; only if they allow
+    it does the shared counter get an atomic incr and a read of the previous
+    window. A key the shared counter rejects is remembered locally until its
+    window ends, so a flood costs one cache round trip per window per process.
+    If the cache is down, only the local limits apply, and it is not tried
+    again for CACHE_RETRY_INTERVAL so requests don't each wait on a timeout.
+    """
+
+    def __init__(self, local=None):
+        self.local = local or LocalCounters()
+        self._cache_down_until = 0
+
+    def check(self, key, limit, window, now=None):
+        """Count a request against key; return 0 if allowed, else the seconds to wait"""
+        now = time.time() if now is None else now
+        retry_after = self.local.blocked(key, now)
+        if retry_after:
+            return retry_after
+
+        window_end = (now // window + 1) * window
+        if self.local.hit(key, window, now) > limit:
+            self.local.block(key, window_end)
+            return window_end - now
+
+        if now < self._cache_down_until:
+            return 0
+        try:
+            estimate = self._shared_hit(key, window, now)
+        except Exception as e:
+            self._cache_down_until = now + CACHE_RETRY_INTERVAL
+            logger.warning('Rate limit cache unavailable, applying per-process limits only: %s', e)
+            return 0
+        if estimate > limit:
+            self.local.block(key, window_end)
+            return window_end - now
+        return 0
+
+    def _shared_hit(self, key, window, now):
+        index = int(now // window)
+        current_key = f"rate_limit_{key}_{index}"
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            # add() is atomic: of two first hits, one creates the counter and
+            # the other falls back to incr
+            if cache.add(current_key, 1, window * 2):
+                current = 1
+            else:
+                current = cache.incr(current_key)
+        previous = cache.get(f"rate_limit_{key}_{index - 1}", 0)
+        return _estimate(previous, current, now, window)
@@ -0,0 +1,215 @@
+# apps/core/snapshots.py
+import logging
+import secrets
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+SPEND_TYPES = ('withdrawal', 'transfer', 'payment')
+RECENT_TRANSACTIONS = 5
+RECENT_NOTIFICATIONS = 5
+PATCH_FANOUT_LIMIT = 50
+DEFAULT_REWARDS = {'points': 0, 'points_earned': 0, 'points_redeemed': 0, 'tier': 'bronze'}
+
+
+def snapshot_key(user_id):
+    return f"dashboard_snapshot_{user_id}"
+
+
+def version_key(user_id):
+    return f"dashboard_version_{user_id}"
+
+
+def _transaction_data(txn):
+    return {
+        'transaction_id': txn.transaction_id,
+        'reference_number': txn.reference_number,
+        'description': txn.description,
+        'transaction_type': txn.transaction_type,
+        'amount': txn.amount,
+        'status': txn.status,
+        'timestamp': txn.timestamp,
+    }
+
+
+def _notification_data(notification):
+    return {
+        'id': notification.pk,
+        'notification_type': notification.notification_type,
+        'title': notification.title,
+        'message': notification.message,
+        'created_at': notification.created_at,
+    }
+
+
+def _rewards_data(rewards):
+    return {field: getattr(rewards, field) for field in DEFAULT_REWARDS}
+
+
+def build_customer_snapshot(user_id):
+    """Read everything the customer dashboard shows into plain data; never writes"""
+    from apps.accounts.models import BankAccount, Rewards, Notification
+    from apps.transactions.models import Transaction
+    from apps.transactions.rollups import spending_by_category
+
+    accounts = list(
+        BankAccount.objects.filter(user_id=user_id, status='active')
+        .values('id', 'account_number', 'account_type', 'balance')
+    )
+    recent = Transaction.objects.filter(from_account__user_id=user_id).order_by('-timestamp')[:RECENT_TRANSACTIONS]
+    rewards = Rewards.objects.filter(user_id=user_id).first()
+    notifications = Notification.objects.filter(user_id=user_id, is_read=False).order_by('-created_at')
+
+    return {
+        'accounts': accounts,
+        'recent_transactions': [_transaction_data(txn) for txn in recent],
+        'rewards': _rewards_data(rewards) if rewards else dict(DEFAULT_REWARDS),
+        'notifications': [_notification_data(n) for n in notifications[:RECENT_NOTIFICATIONS]],
+        'spending': spending_by_category(user_id),
+    }
+
+
+def _store(user_id, snapshot, version):
+    snapshot['version'] = version
+    cache.set(snapshot_key(user_id), snapshot, getattr(settings, 'DASHBOARD_SNAPSHOT_TTL', 3600))
+
+
+def customer_snapshot(user_id):
+    """Return the user's dashboard data with one cache read, rebuilding it on a miss.
+
+    Every change event bumps a per-user version counter. A snapshot is only
+    served if it was built or patched at the current version, so one built
+    from a read that raced with an event is never trusted.
+    """
+    try:
+        cached = cache.get_many([snapshot_key(user_id), version_key(user_id)])
+    except Exception as e:
+        logger.warning('Dashboard cache unavailable: %s', e)
+        return build_customer_snapshot(user_id)
+
+    version = cached.get(version_key(user_id), 0)
+    snapshot = cached.get(snapshot_key(user_id))
+    if snapshot is not None and snapshot['version'] == version:
+        return snapshot
+
+    snapshot = build_customer_snapshot(user_id)
+    try:
+        _store(user_id, snapshot, version)
+    except Exception as e:
+        logger.warning('Dashboard cache unavailable: %s', e)
+    return snapshot
+
+
+def _bump(user_id):
+    key = version_key(user_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        return cache.incr(key)
+
+
+def update_snapshot(user_id, patch):
+    """Apply patch(snapshot) to the cached snapshot, or invalidate it if that cannot be done safely.
+
+    The version is bumped in every case. The patched snapshot is only stored
+    if no other event bumped the version in between; otherwise it is left
+    stale and the next read rebuilds it.
+    """
+    try:
+        cached = cache.get_many([snapshot_key(user_id), version_key(user_id)])
+        version = cached.get(version_key(user_id), 0)
+        snapshot = cached.get(snapshot_key(user_id))
+        new_version = _bump(user_id)
+        if snapshot is not None and snapshot['version'] == version and new_version == version + 1:
+            patch(snapshot)
+            _store(user_id, snapshot, new_version)
+    except Exception as e:
+        logger.warning('Dashboard snapshot update failed for user %s: %s', user_id, e)
+
+
+def invalidate_snapshot(user_id):
+    """Make the next dashboard read rebuild the snapshot"""
+    try:
+        _bump(user_id)
+    except Exception as e:
+        logger.warning('Dashboard cache unavailable: %s', e)
+
+
+def invalidate_snapshots(user_ids):
+    """Make the next dashboard read of each user rebuild their snapshot"""
+    user_ids = list(user_ids)
+    if len(user_ids) <= PATCH_FANOUT_LIMIT:
+        for user_id in user_ids:
+            invalidate_snapshot(user_id)
+        return
+    # Bulk changes touch thousands of users; one write beats a round trip
+    # per user. Moving each version to a fresh random value rather than
+    # deleting the snapshots also rejects one being built concurrently from
+    # a read taken before the change, as a bump would.
+    version = secrets.randbits(62)
+    try:
+        cache.set_many({version_key(user_id): version for user_id in user_ids}, None)
+    except Exception as e:
+        logger.warning('Dashboard cache unavailable: %s', e)
+
+
+def transactions_posted(sender, transactions, **kwargs):
+    """Fold completed postings into the snapshots of the users on both sides"""
+    from apps.accounts.models import BankAccount
+
+    account_ids = {txn.from_account_id for txn in transactions} | {txn.to_account_id for txn in transactions}
+    owners = dict(BankAccount.objects.filter(pk__in=account_ids).values_list('pk', 'user_id'))
+
+    by_user = {}
+    for txn in transactions:
+        for user_id in {owners.get(txn.from_account_id), owners.get(txn.to_account_id)} - {None}:
+            by_user.setdefault(user_id, []).append(txn)
+
+    if len(by_user) > PATCH_FANOUT_LIMIT:
+        invalidate_snapshots(by_user)
+        return
+
+    for user_id, user_transactions in by_user.items():
+        def patch(snapshot, user_id=user_id, user_transactions=user_transactions):
+            accounts = {account['id']: account for account in snapshot['accounts']}
+            spending = snapshot['spending']
+            outgoing = []
+            for txn in user_transactions:
+                if txn.from_account_id in accounts:
+                    accounts[txn.from_account_id]['balance'] -= txn.amount
+                if txn.to_account_id in accounts:
+                    accounts[txn.to_account_id]['balance'] += txn.amount
+                if owners.get(txn.from_account_id) == user_id:
+                    outgoing.append(txn)
+                    if txn.transaction_type in SPEND_TYPES:
+                        spending[txn.transaction_type] = spending.get(txn.transaction_type, Decimal('0')) + txn.amount
+            newest = [_transaction_data(txn) for txn in reversed(outgoing[-RECENT_TRANSACTIONS:])]
+            snapshot['recent_transactions'] = (newest + snapshot['recent_transactions'])[:RECENT_TRANSACTIONS]
+
+        update_snapshot(user_id, patch)
+
+
+def notification_saved(sender, instance, created, **kwargs):
+    """Put a new unread notification at the top of the list"""
+    if not created or instance.is_read:
+        # A notification was read or edited; its place in the list is unknown
+        invalidate_snapshot(instance.user_id)
+        return
+
+    def patch(snapshot):
+        snapshot['notifications'].insert(0, _notification_data(instance))
+        del snapshot['notifications'][RECENT_NOTIFICATIONS:]
+
+    update_snapshot(instance.user_id, patch)
+
+
+def rewards_saved(sender, instance, **kwargs):
+    """Copy the new points and tier into the snapshot"""
+    def patch(snapshot):
+        snapshot['rewards'] = _rewards_data(instance)
+
+    update_snapshot(instance.user_id, patch)
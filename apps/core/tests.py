@@ -1,9 +1,20 @@
-from django.test import TestCase, Client
+import re
+from datetime import timedelta
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.utils import timezone
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Q, Sum
 
 User = get_user_model()
 
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
 class DashboardViewTest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -20,3 +31,491 @@ class DashboardViewTest(TestCase):
         self.assertTrue('recent_transactions' in response.context)
         self.assertTrue('chart_labels' in response.context)
         self.assertTrue('chart_data' in response.context)
+
+
+class QueryPlanTest(TestCase):
+    """Fail when a hot query stops using an index and falls back to a full table scan"""
+
+    def setUp(self):
+        from apps.accounts.models import BankAccount
+        self.user = User.objects.create_user(username='planner', password='password')
+        self.account = BankAccount.objects.create(account_number='100000000001', user=self.user,
+                                                  account_type='savings')
+        if connection.vendor == 'postgresql':
+            # Tiny test tables make sequential scans look cheapest; only allow
+            # them when no usable index exists
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+    def assertNoFullScan(self, queryset):
+        plan = queryset.explain()
+        if connection.vendor == 'postgresql':
+            full_scans = re.findall(r'Seq Scan on (\w+)', plan)
+        else:
+            full_scans = re.findall(r'\bSCAN (\w+)\b(?! USING (?:COVERING )?INDEX)', plan)
+        self.assertEqual(full_scans, [], f"Full table scan in plan:\n{plan}")
+
+    def test_transaction_queries(self):
+        from apps.transactions.models import Transaction
+        self.assertNoFullScan(Transaction.objects.filter(from_account__user=self.user).order_by('-timestamp', '-id'))
+        self.assertNoFullScan(Transaction.objects.filter(from_account=self.account).order_by('-timestamp', '-id'))
+        self.assertNoFullScan(
+            Transaction.objects.filter(Q(from_account=self.account) | Q(to_account=self.account)).order_by('-timestamp')
+        )
+        self.assertNoFullScan(Transaction.objects.filter(status='pending').order_by('-timestamp'))
+        self.assertNoFullScan(
+            Transaction.objects.filter(
+                from_account__user=self.user, transaction_type__in=['withdrawal', 'transfer', 'payment']
+            ).values('transaction_type').annotate(total=Sum('amount'))
+        )
+
+    def test_spending_rollup(self):
+        from apps.transactions.models import DailySpending
+        self.assertNoFullScan(
+            DailySpending.objects.filter(account__user=self.user, day__gte='2024-01-01', day__lte='2024-12-31')
+            .values('category').annotate(total=Sum('total'))
+        )
+
+    def test_approval_queue(self):
+        from .models import ApprovalTask
+        self.assertNoFullScan(
+            ApprovalTask.objects.filter(kind__in=['transaction'])
+            .filter(Q(claimed_by__isnull=True) | Q(lease_expires_at__lte=timezone.now()))
+            .order_by('-priority', 'created_at').values_list('pk', flat=True)[:10]
+        )
+        self.assertNoFullScan(ApprovalTask.objects.filter(claimed_by=self.user, lease_expires_at__gt=timezone.now()))
+
+    def test_rewards_accrual_queue(self):
+        from apps.transactions.models import Transaction
+        self.assertNoFullScan(
+            Transaction.objects.filter(status='completed', rewards_accrued=False).order_by('pk')
+            .values_list('pk', flat=True)[:1000]
+        )
+
+    def test_notification_inbox_and_retention(self):
+        from apps.accounts.models import Notification
+        self.assertNoFullScan(Notification.objects.filter(user=self.user).order_by('-created_at', '-id')[:21])
+        self.assertNoFullScan(
+            Notification.objects.filter(is_read=True, created_at__lt=timezone.now())
+            .order_by('created_at').values_list('pk', flat=True)[:1000]
+        )
+
+    def test_qr_expiry_sweep(self):
+        from django.utils import timezone
+        from apps.transactions.models import QRPayment
+        self.assertNoFullScan(
+            QRPayment.objects.filter(is_active=True, valid_until__lte=timezone.now()).values_list('pk', flat=True)[:1000]
+        )
+
+    def test_notification_and_audit_queries(self):
+        from apps.accounts.models import Notification, AuditLog
+        self.assertNoFullScan(Notification.objects.filter(user=self.user, is_read=False).order_by('-created_at'))
+        self.assertNoFullScan(Notification.objects.filter(user=self.user).order_by('-created_at'))
+        self.assertNoFullScan(AuditLog.objects.order_by('-timestamp')[:10])
+
+    def test_loan_card_and_insurance_queries(self):
+        from apps.loans.models import Loan
+        from apps.cards.models import Card
+        from apps.insurance.models import Insurance
+        self.assertNoFullScan(Loan.objects.filter(status='pending').order_by('-applied_date'))
+        self.assertNoFullScan(Loan.objects.filter(user=self.user).order_by('-applied_date'))
+        self.assertNoFullScan(Card.objects.filter(user=self.user, status='active'))
+        self.assertNoFullScan(Card.objects.filter(status='pending').order_by('-issued_date'))
+        self.assertNoFullScan(Insurance.objects.filter(status='pending').order_by('-applied_date'))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class DashboardSnapshotTest(TestCase):
+    def setUp(self):
+        from apps.accounts.models import BankAccount
+        cache.clear()
+        self.user = User.objects.create_user(username='snapshot', password='password')
+        self.source = BankAccount.objects.create(account_number='100000000001', user=self.user,
+                                                 account_type='savings', balance=Decimal('100.00'))
+        self.target = BankAccount.objects.create(account_number='100000000002', user=self.user,
+                                                 account_type='current')
+        self.client.login(username='snapshot', password='password')
+        self.client.get(reverse('core:dashboard'))
+
+    def test_warm_dashboard_runs_no_dashboard_queries(self):
+        # Only the session and user lookups remain
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('core:dashboard'))
+        self.assertEqual(response.context['total_balance'], Decimal('100.00'))
+
+    def test_events_patch_the_snapshot(self):
+        from apps.accounts.models import Notification
+        from apps.transactions.services import post_transfer
+        from .snapshots import build_customer_snapshot, customer_snapshot
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post_transfer(self.source, self.target, Decimal('30.00'), reference_number='TXN1',
+                          transaction_type='payment')
+        Notification.objects.create(user=self.user, notification_type='system', title='Hi', message='Hello')
+
+        snapshot = customer_snapshot(self.user.pk)
+        rebuilt = build_customer_snapshot(self.user.pk)
+        self.assertEqual(snapshot['version'], 2)
+        for section in ('accounts', 'recent_transactions', 'notifications', 'spending', 'rewards'):
+            self.assertEqual(snapshot[section], rebuilt[section])
+
+    def test_bulk_invalidation_rejects_a_snapshot_built_before_it(self):
+        from .snapshots import PATCH_FANOUT_LIMIT, _store, build_customer_snapshot, customer_snapshot, \
+            invalidate_snapshots, version_key
+
+        # A reader takes the version and builds, then the bulk change lands
+        # before it stores the snapshot
+        version = cache.get(version_key(self.user.pk), 0)
+        stale = build_customer_snapshot(self.user.pk)
+        invalidate_snapshots(range(self.user.pk, self.user.pk + PATCH_FANOUT_LIMIT + 1))
+        _store(self.user.pk, stale, version)
+
+        self.source.balance = Decimal('60.00')
+        self.source.save()
+        self.assertEqual(customer_snapshot(self.user.pk)['accounts'][0]['balance'], Decimal('60.00'))
+
+
+class CounterTest(TestCase):
+    def setUp(self):
+        from apps.accounts.models import BankAccount
+        self.user = User.objects.create_user(username='counted', password='password', role='admin')
+        self.source = BankAccount.objects.create(account_number='100000000001', user=self.user,
+                                                 account_type='business', balance=Decimal('100.00'))
+        self.target = BankAccount.objects.create(account_number='100000000002', user=self.user,
+                                                 account_type='current')
+
+    def assertCountersExact(self):
+        from apps.accounts.models import BankAccount
+        from apps.transactions.models import Transaction
+        from .counters import read_counters
+        self.assertEqual(read_counters('users', 'accounts', 'transactions'), {
+            'users': User.objects.count(),
+            'accounts': BankAccount.objects.count(),
+            'transactions': Transaction.objects.count(),
+        })
+
+    def test_counters_follow_inserts_deletes_and_batches(self):
+        from apps.transactions.batches import post_batch
+        from apps.transactions.services import post_transfer
+        post_transfer(self.source, self.target, Decimal('10.00'), reference_number='TXN1')
+        post_batch(self.source, [{'account_number': '100000000002', 'amount': '1.00'}] * 3)
+        self.assertCountersExact()
+
+        User.objects.create_user(username='leaver', password='password').delete()
+        self.assertCountersExact()
+
+    def test_resync_repairs_drift(self):
+        from .counters import increment, resync_counters
+        increment('users', 5)
+        resync_counters()
+        self.assertCountersExact()
+
+    def test_admin_dashboard_reads_the_counters(self):
+        self.client.login(username='counted', password='password')
+        response = self.client.get(reverse('core:dashboard'))
+        self.assertEqual(response.context['total_accounts'], 2)
+
+
+class ApprovalQueueTest(TestCase):
+    def setUp(self):
+        from apps.accounts.models import BankAccount
+        from apps.transactions.models import Transaction
+        customer = User.objects.create_user(username='customer', password='password')
+        account = BankAccount.objects.create(account_number='100000000001', user=customer, account_type='savings')
+        self.pending = [
+            Transaction.objects.create(from_account=account, to_account=account, transaction_type='withdrawal',
+                                       amount=Decimal('10.00'), reference_number=f'TXN{i}')
+            for i in range(5)
+        ]
+        self.alice = User.objects.create_user(username='alice', password='password', role='employee')
+        self.bob = User.objects.create_user(username='bob', password='password', role='employee')
+
+    def test_reviewers_claim_disjoint_tasks_in_queue_order(self):
+        from .approvals import claim_tasks
+        alice = claim_tasks(self.alice, ['transaction'], limit=3)
+        bob = claim_tasks(self.bob, ['transaction'], limit=3)
+        self.assertEqual([task.object_id for task in alice], [txn.pk for txn in self.pending[:3]])
+        self.assertEqual([task.object_id for task in bob], [txn.pk for txn in self.pending[3:]])
+
+        # Claiming again renews the same lease instead of taking more work
+        self.assertEqual(claim_tasks(self.alice, ['transaction'], limit=3), alice)
+
+    def test_expired_leases_return_to_the_queue(self):
+        from .approvals import claim_tasks
+        from .models import ApprovalTask
+        claim_tasks(self.alice, ['transaction'], limit=5)
+        ApprovalTask.objects.filter(claimed_by=self.alice).update(lease_expires_at=timezone.now())
+        self.assertEqual(len(claim_tasks(self.bob, ['transaction'], limit=5)), 5)
+
+    def test_decided_items_leave_the_queue(self):
+        from .approvals import claimed_items
+        from .models import ApprovalTask
+        self.pending[0].status = 'completed'
+        self.pending[0].save()
+        self.pending[1].delete()
+        self.assertEqual(ApprovalTask.objects.count(), 3)
+
+        # A queryset update sends no signal; the stale task is dropped on claim
+        type(self.pending[2]).objects.filter(pk=self.pending[2].pk).update(status='failed')
+        self.assertEqual(claimed_items(self.alice, ['transaction'])['transaction'], self.pending[3:])
+        self.assertEqual(ApprovalTask.objects.count(), 2)
+
+    def test_employee_dashboard_shows_claimed_transactions(self):
+        self.client.login(username='alice', password='password')
+        response = self.client.get(reverse('core:dashboard'))
+        self.assertEqual(list(response.context['pending_transactions']), self.pending)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BroadcastTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.customers = [User.objects.create_user(username=f'customer{i}', password='password') for i in range(7)]
+        User.objects.create_user(username='staff', password='password', role='employee')
+        User.objects.create_user(username='gone', password='password', is_active=False)
+
+    def test_fan_out_reaches_the_audience_once(self):
+        from apps.accounts.models import Notification
+        from .broadcasts import create_broadcast, run_broadcast
+        broadcast = create_broadcast('Maintenance', 'Back soon', shards=3)
+        self.assertEqual(broadcast.total_users, 7)
+        reports = []
+
+        self.assertEqual(run_broadcast(broadcast, workers=0, chunk_size=2, progress=lambda *args: reports.append(args)), 7)
+        self.assertEqual(sorted(Notification.objects.values_list('user_id', flat=True)),
+                         [user.pk for user in self.customers])
+        self.assertEqual(reports[-1][:2], (7, 7))
+        broadcast.refresh_from_db()
+        self.assertEqual(broadcast.status, 'completed')
+
+    def test_interrupted_fan_out_resumes_from_its_checkpoints(self):
+        from apps.accounts.models import Notification
+        from .broadcasts import create_broadcast, run_broadcast, _send_chunk
+        broadcast = create_broadcast('Maintenance', 'Back soon', shards=2)
+        _send_chunk(broadcast.shards.order_by('pk')[0].pk, 2)
+
+        self.assertEqual(run_broadcast(broadcast, workers=0, chunk_size=2), 5)
+        self.assertEqual(Notification.objects.count(), 7)
+        self.assertEqual(Notification.objects.values('user').distinct().count(), 7)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, NOTIFICATION_STREAM_INTERVAL=0.01, NOTIFICATION_STREAM_DURATION=0.05)
+class NotificationStreamTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', password='password')
+
+    def notify(self, title):
+        from apps.accounts.models import Notification
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(user=self.user, notification_type='system', title=title, message='')
+
+    def test_cached_count_follows_changes_without_queries(self):
+        from .unread import unread_count
+        self.notify('First')
+        self.assertEqual(unread_count(self.user.pk), 1)
+
+        self.notify('Second')
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(self.user.pk), 2)
+
+        self.client.login(username='reader', password='password')
+        newest_id = self.client.get(reverse('core:notifications')).context['newest_id']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('core:notifications'), {'action': 'mark_all_read', 'up_to': newest_id})
+        self.assertEqual(unread_count(self.user.pk), 0)
+
+    async def test_stream_sends_count_and_new_notifications(self):
+        first = await sync_to_async(self.notify)('Statement ready')
+        await sync_to_async(self.notify)('Card used abroad')
+        await sync_to_async(self.client.force_login)(self.user)
+        self.async_client.cookies = self.client.cookies
+
+        response = await self.async_client.get(reverse('core:notification_stream'), headers={'Last-Event-ID': str(first.pk)})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = ''.join([chunk.decode() async for chunk in response.streaming_content])
+        self.assertIn('event: unread\ndata: {"count": 2}', body)
+        self.assertIn('Card used abroad', body)
+        self.assertNotIn('Statement ready', body)
+
+    def test_wsgi_answers_one_poll_instead_of_streaming(self):
+        self.notify('Statement ready')
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('core:notification_stream'))
+        self.assertFalse(response.streaming)
+        body = response.content.decode()
+        self.assertTrue(body.startswith('retry: '))
+        watermark = re.search(r'id: (\d+)\nevent: unread\ndata: \{"count": 1\}', body).group(1)
+
+        # The browser reconnects with the watermark and gets what arrived since
+        self.notify('Card used abroad')
+        body = self.client.get(reverse('core:notification_stream'), headers={'Last-Event-ID': watermark}).content.decode()
+        self.assertIn('Card used abroad', body)
+        self.assertNotIn('Statement ready', body)
+
+    async def test_anonymous_stream_is_rejected(self):
+        response = await self.async_client.get(reverse('core:notification_stream'))
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class NotificationInboxTest(TestCase):
+    def setUp(self):
+        from apps.accounts.models import Notification
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', password='password')
+        self.client.login(username='reader', password='password')
+        self.notifications = [
+            Notification.objects.create(user=self.user, notification_type='system', title=f'N{i}', message=f'Message {i}')
+            for i in range(25)
+        ]
+
+    def test_inbox_pages_newest_first(self):
+        response = self.client.get(reverse('core:notifications'))
+        page = response.context['notifications']
+        self.assertEqual([n.pk for n in page], [n.pk for n in reversed(self.notifications)][:20])
+        self.assertEqual(response.context['newest_id'], self.notifications[-1].pk)
+
+        response = self.client.get(reverse('core:notifications'), {'cursor': page.next_cursor})
+        self.assertEqual([n.pk for n in response.context['notifications']],
+                         [n.pk for n in reversed(self.notifications[:5])])
+        # Later pages still carry the newest id, so "mark all read" stays bounded
+        self.assertEqual(response.context['newest_id'], self.notifications[-1].pk)
+
+    def test_acknowledge_by_ids_and_by_watermark(self):
+        from apps.accounts.models import Notification
+        from .unread import unread_count
+        self.assertEqual(unread_count(self.user.pk), 25)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('core:notifications'), {
+                'action': 'acknowledge', 'ids': [self.notifications[0].pk, self.notifications[1].pk],
+            })
+        self.assertEqual(response.json()['acknowledged'], 2)
+        self.assertEqual(unread_count(self.user.pk), 23)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('core:notifications'), {
+                'action': 'mark_all_read', 'up_to': self.notifications[9].pk,
+            })
+        self.assertEqual(response.json()['acknowledged'], 8)
+        self.assertEqual(unread_count(self.user.pk), 15)
+        self.assertFalse(Notification.objects.filter(is_read=True, read_at__isnull=True).exists())
+
+        response = self.client.post(reverse('core:notifications'), {'action': 'acknowledge', 'ids': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+        # "Mark all read" without the rendered watermark would take unseen ones too
+        response = self.client.post(reverse('core:notifications'), {'action': 'mark_all_read', 'up_to': ''})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(unread_count(self.user.pk), 15)
+
+    def test_retention_deletes_only_old_read_notifications(self):
+        from apps.accounts.models import Notification
+        from .inbox import acknowledge, purge_read_notifications
+        acknowledge(self.user.pk, up_to=self.notifications[19].pk)
+        old = timezone.now() - timedelta(days=100)
+        Notification.objects.filter(pk__lte=self.notifications[9].pk).update(created_at=old)
+        Notification.objects.filter(pk__gte=self.notifications[20].pk).update(created_at=old)
+
+        self.assertEqual(purge_read_notifications(timezone.now() - timedelta(days=90), batch_size=3), 10)
+        self.assertEqual(Notification.objects.count(), 15)
+        self.assertEqual(Notification.objects.filter(is_read=False).count(), 5)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, RATE_LIMIT_POLICIES=[
+    ('login', ('/login/',), None, (3, 60)),
+    ('pages', ('/',), (5, 60), (8, 60)),
+])
+class RateLimitTest(TestCase):
+    def setUp(self):
+        from django.test import RequestFactory
+        from .middleware import RateLimitMiddleware
+        cache.clear()
+        self.factory = RequestFactory()
+        self.middleware = RateLimitMiddleware(lambda request: None)
+
+    def request(self, path, user=None, ip='10.0.0.1'):
+        from django.contrib.auth.models import AnonymousUser
+        request = self.factory.get(path, REMOTE_ADDR=ip)
+        request.user = user or AnonymousUser()
+        return self.middleware.process_request(request)
+
+    def test_route_group_shares_one_bucket(self):
+        for i in range(3):
+            self.assertIsNone(self.request('/login/', ip='10.0.0.2'))
+        response = self.request('/login/?next=/dashboard/', ip='10.0.0.2')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(1 <= int(response['Retry-After']) <= 60)
+        self.assertIsNone(self.request('/login/', ip='10.0.0.3'))
+
+        user = User.objects.create_user(username='limited', password='password')
+        statuses = [self.request(f'/transactions/{i}/', user=user) for i in range(6)]
+        self.assertEqual(statuses[:5], [None] * 5)
+        self.assertEqual(statuses[5].status_code, 429)
+
+    def test_per_user_and_per_ip_limits(self):
+        first = User.objects.create_user(username='first', password='password')
+        second = User.objects.create_user(username='second', password='password')
+        allowed = [self.request('/dashboard/', user=user) is None for user in [first, second] * 5]
+        # Each user has 5, but the shared IP runs out after 8
+        self.assertEqual(allowed, [True] * 8 + [False] * 2)
+        # Another IP doesn't reset the user's own limit
+        self.assertEqual(self.request('/dashboard/', user=first, ip='10.0.0.9').status_code, 429)
+
+    def test_spoofed_forwarded_for_does_not_reset_the_limit(self):
+        from django.contrib.auth.models import AnonymousUser
+
+        def attempt(forwarded_for, remote_addr='10.0.0.1'):
+            request = self.factory.get('/login/', REMOTE_ADDR=remote_addr, HTTP_X_FORWARDED_FOR=forwarded_for)
+            request.user = AnonymousUser()
+            return self.middleware.process_request(request)
+
+        responses = [attempt(f'192.0.2.{i}') for i in range(5)]
+        self.assertEqual([response is None for response in responses], [True] * 3 + [False] * 2)
+
+        # Behind a trusted proxy the client is the last untrusted hop, not
+        # whatever the client prepended
+        with self.settings(RATE_LIMIT_TRUSTED_PROXIES=['10.1.0.0/16']):
+            responses = [attempt(f'192.0.2.{i}, 198.51.100.7', remote_addr='10.1.0.5') for i in range(5)]
+        self.assertEqual([response is None for response in responses], [True] * 3 + [False] * 2)
+
+    def test_notification_stream_is_exempt(self):
+        responses = [self.request('/notifications/stream/') for i in range(20)]
+        self.assertEqual(responses, [None] * 20)
+
+    def test_flood_is_absorbed_in_process(self):
+        from unittest import mock
+        with mock.patch.object(cache, 'incr', wraps=cache.incr) as incr:
+            responses = [self.request('/login/') for i in range(100)]
+        self.assertEqual(sum(response is None for response in responses), 3)
+        # One shared increment per allowed request; the rest never leave the process
+        self.assertEqual(incr.call_count, 3)
+
+    def test_limits_are_shared_between_processes(self):
+        from .middleware import RateLimitMiddleware
+        other = RateLimitMiddleware(lambda request: None)
+        self.assertIsNone(self.request('/login/'))
+        self.assertIsNone(self.request('/login/'))
+        from django.contrib.auth.models import AnonymousUser
+        request = self.factory.get('/login/', REMOTE_ADDR='10.0.0.1')
+        request.user = AnonymousUser()
+        self.assertIsNone(other.process_request(request))
+        self.assertEqual(other.process_request(request).status_code, 429)
+
+    def test_cache_outage_keeps_per_process_limits(self):
+        from unittest import mock
+        with mock.patch.object(cache, 'incr', side_effect=ConnectionError('down')), \
+                self.assertLogs('apps.core.ratelimit', 'WARNING'):
+            responses = [self.request('/login/') for i in range(5)]
+        self.assertEqual([response is None for response in responses], [True] * 3 + [False] * 2)
+
+    def test_sliding_window_counts_the_previous_window(self):
+        from .ratelimit import RateLimiter
+        limiter = RateLimiter()
+        for i in range(10):
+            self.assertFalse(limiter.check('key', 10, 60, now=6000 + i))
+        # A quarter into the next window, 3/4 of the previous 10 still count
+        self.assertFalse(limiter.check('key', 10, 60, now=6075))
+        self.assertFalse(limiter.check('key', 10, 60, now=6075))
+        self.assertEqual(limiter.check('key', 10, 60, now=6075), 45)
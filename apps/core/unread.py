@@ -0,0 +1,95 @@
+# apps/core/unread.py
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def unread_key(user_id):
+    return f"unread_count_{user_id}"
+
+
+def latest_key(user_id):
+    return f"latest_notification_{user_id}"
+
+
+def _count_from_db(user_id):
+    from apps.accounts.models import Notification
+    return Notification.objects.filter(user_id=user_id, is_read=False).count()
+
+
+def _seed(user_id):
+    count = _count_from_db(user_id)
+    # add() keeps a counter that a concurrent reader or writer put there first.
+    # The TTL bounds drift from an increment that raced with this seed.
+    cache.add(unread_key(user_id), count, getattr(settings, 'UNREAD_COUNT_TTL', 300))
+    return count
+
+
+def stream_state(user_id):
+    """(unread count, id of the newest notification or None) with one cache read.
+
+    The count is seeded from the partial unread index on a miss; after that
+    it is kept current by atomic increments and decrements.
+    """
+    try:
+        cached = cache.get_many([unread_key(user_id), latest_key(user_id)])
+        count = cached.get(unread_key(user_id))
+        if count is None:
+            count = _seed(user_id)
+        return max(count, 0), cached.get(latest_key(user_id))
+    except Exception as e:
+        logger.warning('Unread count cache unavailable: %s', e)
+        return _count_from_db(user_id), None
+
+
+def unread_count(user_id):
+    return stream_state(user_id)[0]
+
+
+def adjust_unread(user_id, delta):
+    """Atomically move the cached count by delta; a missing counter is left to be seeded on the next read"""
+    if not delta:
+        return
+    try:
+        if delta > 0:
+            cache.incr(unread_key(user_id), delta)
+        else:
+            cache.decr(unread_key(user_id), -delta)
+    except ValueError:
+        pass
+    except Exception as e:
+        logger.warning('Unread count cache unavailable: %s', e)
+
+
+def reset_unread(user_ids):
+    """Drop the cached counts so they are recounted, for changes whose effect on the count is unknown"""
+    try:
+        cache.delete_many([unread_key(user_id) for user_id in user_ids])
+    except Exception as e:
+        logger.warning('Unread count cache unavailable: %s', e)
+
+
+def _created(user_id, notification_id):
+    adjust_unread(user_id, 1)
+    try:
+        cache.set(latest_key(user_id), notification_id, getattr(settings, 'UNREAD_COUNT_TTL', 300))
+    except Exception as e:
+        logger.warning('Unread count cache unavailable: %s', e)
+
+
+def notification_saved(sender, instance, created, **kwargs):
+    if created and not instance.is_read:
+        transaction.on_commit(lambda: _created(instance.user_id, instance.pk))
+    else:
+        # Whether the saved row was unread before is not known here
+        transaction.on_commit(lambda: reset_unread([instance.user_id]))
+
+
+def notification_deleted(sender, instance, **kwargs):
+    # Deleting read notifications (e.g. the retention job) leaves the count alone
+    if not instance.is_read:
+        transaction.on_commit(lambda: reset_unread([instance.user_id]))
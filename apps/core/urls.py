@@ -22,6 +22,7 @@ urlpatterns = [
     
     # Profile & Settings
     path('notifications/', views.notifications_view, name='notifications'),
+    path('notifications/stream/', views.notification_stream, name='notification_stream'),
     
     # API Endpoints
     path('api/health/', views.api_health_check, name='api_health_check'),
@@ -8,9 +8,16 @@ from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.http import HttpResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.conf import settings
+from asgiref.sync import sync_to_async
+from .decorators import async_login_required
 from .forms import LoginForm, UserRegistrationForm
+import asyncio
 import json
 import json
+import time
 
 User = get_user_model()
 
@@ -53,52 +60,34 @@ class DashboardView(TemplateView):
     
     def get_customer_context(self, user):
         """Get context data for customer dashboard"""
-        from apps.accounts.models import BankAccount, Rewards, Notification
-        from apps.transactions.models import Transaction
-        from django.db.models import Sum
-        
-        accounts = BankAccount.objects.filter(user=user, status='active')
-        recent_transactions = Transaction.objects.filter(
-            from_account__user=user
-        ).order_by('-timestamp')[:5]
-        
-        try:
-            rewards = Rewards.objects.get(user=user)
-        except Rewards.DoesNotExist:
-            rewards = Rewards.objects.create(user=user)
-        
-        notifications = Notification.objects.filter(
-            user=user, is_read=False
-        ).order_by('-created_at')[:5]
-        
-        # Get spending data for the chart
-        spending_by_category = Transaction.objects.filter(
-            from_account__user=user,
-            transaction_type__in=['withdrawal', 'transfer', 'payment']
-        ).values('transaction_type').annotate(total=Sum('amount'))
+        from .snapshots import customer_snapshot
+
+        # One cache read; the snapshot is kept current by posting,
+        # notification and reward events
+        snapshot = customer_snapshot(user.pk)
+        spending_by_category = sorted(snapshot['spending'].items())
 
-        chart_labels = [item['transaction_type'] for item in spending_by_category]
-        chart_data = [float(item['total']) for item in spending_by_category]
+        chart_labels = [transaction_type for transaction_type, total in spending_by_category]
+        chart_data = [float(total) for transaction_type, total in spending_by_category]
 
         return {
-            'accounts': accounts,
-            'recent_transactions': recent_transactions,
-            'rewards': rewards,
-            'notifications': notifications,
-            'total_balance': sum(account.balance for account in accounts),
+            'accounts': snapshot['accounts'],
+            'recent_transactions': snapshot['recent_transactions'],
+            'rewards': snapshot['rewards'],
+            'notifications': snapshot['notifications'],
+            'total_balance': sum(account['balance'] for account in snapshot['accounts']),
             'chart_labels': json.dumps(chart_labels),
             'chart_data': json.dumps(chart_data),
         }
     
     def get_employee_context(self, user):
         """Get context data for employee dashboard"""
-        from apps.accounts.models import BankAccount, User
-        from apps.transactions.models import Transaction
+        from apps.accounts.models import User
+        from .approvals import claimed_items, EMPLOYEE_KINDS
         
-        # Get pending approvals
-        pending_transactions = Transaction.objects.filter(
-            status='pending'
-        ).order_by('-timestamp')[:10]
+        # Pending approvals leased to this employee, disjoint from other reviewers'
+        items = claimed_items(user, EMPLOYEE_KINDS)
+        pending_transactions = items['transaction']
         
         # Get recent customer registrations
         recent_customers = User.objects.filter(
@@ -112,39 +101,30 @@ class DashboardView(TemplateView):
     
     def get_manager_context(self, user):
         """Get context data for manager dashboard"""
-        from apps.accounts.models import BankAccount, User
-        from apps.transactions.models import Transaction
-        from apps.loans.models import Loan
-        from apps.insurance.models import Insurance
+        from .approvals import claimed_items, MANAGER_KINDS
         
-        # Get pending approvals
-        pending_loans = Loan.objects.filter(status='pending')[:10]
-        pending_insurance = Insurance.objects.filter(status='pending')[:10]
-        pending_transactions = Transaction.objects.filter(
-            status='pending'
-        ).order_by('-timestamp')[:10]
+        # Pending approvals leased to this manager, disjoint from other reviewers'
+        items = claimed_items(user, MANAGER_KINDS)
         
         return {
-            'pending_loans': pending_loans,
-            'pending_insurance': pending_insurance,
-            'pending_transactions': pending_transactions,
+            'pending_loans': items['loan'],
+            'pending_insurance': items['insurance'],
+            'pending_transactions': items['transaction'],
         }
     
     def get_admin_context(self, user):
         """Get context data for admin dashboard"""
-        from apps.accounts.models import BankAccount, User, AuditLog
-        from apps.transactions.models import Transaction
+        from apps.accounts.models import AuditLog
+        from .counters import read_counters
         
-        # System statistics
-        total_users = User.objects.count()
-        total_accounts = BankAccount.objects.count()
-        total_transactions = Transaction.objects.count()
+        # System statistics, kept up to date by the counters table
+        totals = read_counters('users', 'accounts', 'transactions')
         recent_audit_logs = AuditLog.objects.order_by('-timestamp')[:10]
         
         return {
-            'total_users': total_users,
-            'total_accounts': total_accounts,
-            'total_transactions': total_transactions,
+            'total_users': totals['users'],
+            'total_accounts': totals['accounts'],
+            'total_transactions': totals['transactions'],
             'recent_audit_logs': recent_audit_logs,
         }
 
@@ -205,25 +185,111 @@ def register_view(request):
 
 @login_required
 def notifications_view(request):
-    """Notifications management"""
-    from apps.accounts.models import Notification
-    
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
+    """Notifications inbox: keyset-paginated, with bulk acknowledge"""
+    from .inbox import inbox_page, acknowledge, newest_notification_id
     
     if request.method == 'POST':
-        notification_id = request.POST.get('notification_id')
         action = request.POST.get('action')
+        try:
+            ids = [int(pk) for pk in request.POST.getlist('ids') + request.POST.getlist('notification_id')]
+            up_to = int(request.POST['up_to']) if request.POST.get('up_to') else None
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Invalid notification id'}, status=400)
         
-        if action == 'mark_read':
-            notification = Notification.objects.get(id=notification_id, user=request.user)
-            notification.is_read = True
-            notification.save()
-        elif action == 'mark_all_read':
-            Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        if action in ('mark_read', 'acknowledge') and (ids or up_to is not None):
+            acknowledged = acknowledge(request.user.pk, ids=ids or None, up_to=up_to)
+        elif action == 'mark_all_read' and up_to is not None:
+            # up_to keeps notifications that arrived after the page was rendered unread
+            acknowledged = acknowledge(request.user.pk, up_to=up_to)
+        else:
+            return JsonResponse({'success': False, 'error': 'Invalid action'}, status=400)
         
-        return JsonResponse({'success': True})
+        return JsonResponse({'success': True, 'acknowledged': acknowledged})
     
-    return render(request, 'dashboard/notifications.html', {'notifications': notifications})
+    unread_only = request.GET.get('unread') == '1'
+    page = inbox_page(request.user, request.GET.get('cursor'), unread_only=unread_only)
+    return render(request, 'dashboard/notifications.html', {
+        'notifications': page,
+        # Newest notification as of this render, whichever page it is, for "mark all read"
+        'newest_id': newest_notification_id(request.user.pk),
+        'filter_query': 'unread=1' if unread_only else '',
+    })
+
+def _sse(event, data, event_id=None):
+    lines = [f"event: {event}", f"data: {json.dumps(data)}"]
+    if event_id is not None:
+        lines.insert(0, f"id: {event_id}")
+    return '\n'.join(lines) + '\n\n'
+
+@async_login_required
+async def notification_stream(request):
+    """Server-sent events with the user's unread count and new notifications.
+
+    Each poll is one cache read; the database is only queried when the
+    cached state shows something new. Under ASGI the stream ends after
+    NOTIFICATION_STREAM_DURATION and the browser reconnects, resuming from
+    the Last-Event-ID it was given. Under WSGI a streamed async response
+    would be buffered whole while holding a worker, so each request answers
+    a single poll and the browser's retry turns the stream into polling
+    every NOTIFICATION_STREAM_INTERVAL.
+    """
+    from apps.accounts.models import Notification
+    from .unread import stream_state
+
+    user_id = request.user.pk
+    interval = getattr(settings, 'NOTIFICATION_STREAM_INTERVAL', 2)
+    duration = getattr(settings, 'NOTIFICATION_STREAM_DURATION', 300)
+    notifications = Notification.objects.filter(user_id=user_id)
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    # A reconnecting client catches up on what it missed first
+    catch_up = last_event_id.isdigit()
+    if catch_up:
+        newest = int(last_event_id)
+    else:
+        newest = await notifications.order_by('-id').values_list('id', flat=True).afirst() or 0
+    last_count = last_latest = None
+
+    async def poll():
+        nonlocal catch_up, newest, last_count, last_latest
+        count, latest = await sync_to_async(stream_state)(user_id)
+        chunks = []
+        if catch_up or latest != last_latest or (last_count is not None and count > last_count):
+            async for item in notifications.filter(id__gt=newest).order_by('id').values(
+                'id', 'notification_type', 'title', 'message', 'is_important', 'created_at'
+            )[:10]:
+                item['created_at'] = item['created_at'].isoformat()
+                chunks.append(_sse('notification', item, item['id']))
+                newest = item['id']
+            last_latest, catch_up = latest, False
+        if count != last_count:
+            # The id carries the watermark, so a reconnect resumes from it
+            # even when no notification was sent
+            chunks.append(_sse('unread', {'count': count}, newest))
+            last_count = count
+        return chunks
+
+    retry = f"retry: {int(interval * 1000)}\n\n"
+    if not isinstance(request, ASGIRequest):
+        response = HttpResponse(retry + ''.join(await poll()), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    async def events():
+        yield retry
+        last_write = started = time.monotonic()
+        while time.monotonic() - started < duration:
+            chunks = await poll()
+            if not chunks and time.monotonic() - last_write > 15:
+                chunks.append(': keepalive\n\n')
+            if chunks:
+                last_write = time.monotonic()
+                yield ''.join(chunks)
+            await asyncio.sleep(interval)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 @csrf_exempt
 def api_health_check(request):
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('insurance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='insurance',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['applied_date'], name='ins_pending_applied_idx'),
+        ),
+    ]
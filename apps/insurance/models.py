@@ -43,6 +43,10 @@ class Insurance(models.Model):
     
     class Meta:
         db_table = 'insurance_policies'
+        indexes = [
+            models.Index(fields=['applied_date'], name='ins_pending_applied_idx',
+                         condition=models.Q(status='pending')),
+        ]
 
 class InsuranceClaim(models.Model):
     CLAIM_STATUS = [
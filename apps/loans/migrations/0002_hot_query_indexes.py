@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['user', 'applied_date'], name='loan_user_applied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['applied_date'], name='loan_pending_applied_idx'),
+        ),
+    ]
@@ -47,3 +47,8 @@ class Loan(models.Model):
     
     class Meta:
         db_table = 'loans'
+        indexes = [
+            models.Index(fields=['user', 'applied_date'], name='loan_user_applied_idx'),
+            models.Index(fields=['applied_date'], name='loan_pending_applied_idx',
+                         condition=models.Q(status='pending')),
+        ]
@@ -1,6 +1,6 @@
 # apps/transactions/admin.py
 from django.contrib import admin
-from .models import Transaction, QRPayment
+from .models import Transaction, QRPayment, LedgerEntry
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
@@ -11,5 +11,18 @@ class TransactionAdmin(admin.ModelAdmin):
 
 @admin.register(QRPayment)
 class QRPaymentAdmin(admin.ModelAdmin):
-    list_display = ['qr_code_id', 'account', 'amount', 'is_active', 'created_at']
-    list_filter = ['is_active', 'created_at']
\ No newline at end of file
+    list_display = ['qr_code_id', 'account', 'amount', 'is_active', 'used_count', 'max_uses', 'valid_until', 'created_at']
+    list_filter = ['is_active', 'created_at']
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ['account', 'entry_type', 'amount', 'balance_after', 'transaction', 'created_at']
+    list_filter = ['entry_type', 'created_at']
+    search_fields = ['account__account_number']
+    readonly_fields = ['account', 'transaction', 'entry_type', 'amount', 'balance_after', 'created_at']
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,208 @@
+# apps/transactions/batches.py
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, When, Value, DecimalField
+from django.utils import timezone
+
+from apps.accounts.models import BankAccount
+from apps.core.counters import increment
+from .models import Transaction, LedgerEntry
+from .references import next_reference
+from .rollups import record_spending
+from .signals import transaction_posted
+from .services import lock_accounts, run_with_retry, TransferError, InsufficientFunds, AccountUnavailable
+
+BATCH_SOURCE_TYPES = ('business', 'salary')
+CHUNK_SIZE = 500
+CENTS = Decimal('0.01')
+
+
+class BatchError(TransferError):
+    """The batch as a whole cannot be accepted"""
+
+
+def parse_batch(body, content_type):
+    """Turn a CSV or JSON upload into a list of line dicts.
+
+    CSV columns are account_number, amount and an optional description, with
+    or without a header row. JSON is either a list of objects with the same
+    keys or an object with a "lines" list.
+    """
+    if 'json' in content_type:
+        try:
+            data = json.loads(body)
+        except (ValueError, UnicodeDecodeError):
+            raise BatchError('Invalid JSON data')
+        if isinstance(data, dict):
+            data = data.get('lines', [])
+        if not isinstance(data, list):
+            raise BatchError('Expected a list of payment lines')
+        lines = [item if isinstance(item, dict) else {} for item in data]
+    else:
+        if isinstance(body, bytes):
+            try:
+                body = body.decode('utf-8-sig')
+            except UnicodeDecodeError:
+                raise BatchError('CSV must be UTF-8 encoded')
+        reader = csv.reader(io.StringIO(body))
+        lines = []
+        for row in reader:
+            if not row or (not lines and row[0].strip().lower() == 'account_number'):
+                continue
+            lines.append({
+                'account_number': row[0],
+                'amount': row[1] if len(row) > 1 else None,
+                'description': row[2] if len(row) > 2 else '',
+            })
+
+    max_lines = getattr(settings, 'BATCH_MAX_LINES', 20000)
+    if len(lines) > max_lines:
+        raise BatchError(f'A batch may contain at most {max_lines} lines')
+    return lines
+
+
+def validate_batch(source, lines):
+    """Check every line in one pass, resolving all payee accounts with chunked lookups.
+
+    Returns (valid, failures): valid lines carry the payee account id and a
+    Decimal amount; failures are {'line', 'error'} dicts with 1-based line
+    numbers.
+    """
+    numbers = {str(line.get('account_number', '')).strip() for line in lines}
+    numbers.discard('')
+    accounts = {}
+    numbers = sorted(numbers)
+    for i in range(0, len(numbers), CHUNK_SIZE):
+        for pk, number, status in BankAccount.objects.filter(
+            account_number__in=numbers[i:i + CHUNK_SIZE]
+        ).values_list('pk', 'account_number', 'status'):
+            accounts[number] = (pk, status)
+
+    valid, failures = [], []
+    for number, line in enumerate(lines, start=1):
+        account_number = str(line.get('account_number', '')).strip()
+        try:
+            amount = Decimal(str(line.get('amount'))).quantize(CENTS)
+        except (InvalidOperation, ValueError):
+            failures.append({'line': number, 'error': 'Invalid amount'})
+            continue
+        if not amount.is_finite() or amount <= 0:
+            failures.append({'line': number, 'error': 'Amount must be greater than zero'})
+        elif account_number not in accounts:
+            failures.append({'line': number, 'error': 'Account not found'})
+        elif accounts[account_number][1] != 'active':
+            failures.append({'line': number, 'error': 'Account is not active'})
+        elif accounts[account_number][0] == source.pk:
+            failures.append({'line': number, 'error': 'Cannot pay the source account'})
+        else:
+            valid.append({
+                'line': number,
+                'account_id': accounts[account_number][0],
+                'amount': amount,
+                'description': str(line.get('description') or '')[:500],
+            })
+    return valid, failures
+
+
+def _post_batch(source_id, valid, references, fields):
+    payee_ids = sorted({line['account_id'] for line in valid})
+    locked = lock_accounts(source_id, *payee_ids)
+    source = locked.get(source_id)
+    if source is None or source.status != 'active':
+        raise AccountUnavailable('Source account is not active.')
+
+    inactive = {pk for pk in payee_ids if pk not in locked or locked[pk].status != 'active'}
+    if inactive:
+        raise AccountUnavailable('A payee account was closed while the batch was posting.')
+
+    total = sum((line['amount'] for line in valid), Decimal('0'))
+    now = timezone.now()
+
+    # One conditional debit for the whole batch
+    debited = BankAccount.objects.filter(pk=source_id, balance__gte=total).update(
+        balance=F('balance') - total, last_transaction_date=now
+    )
+    if not debited:
+        raise InsufficientFunds('Insufficient balance for this batch.')
+
+    # Set-based credits: one UPDATE per chunk of payees
+    credits = {}
+    for line in valid:
+        credits[line['account_id']] = credits.get(line['account_id'], Decimal('0')) + line['amount']
+    money = DecimalField(max_digits=15, decimal_places=2)
+    for i in range(0, len(payee_ids), CHUNK_SIZE):
+        chunk = payee_ids[i:i + CHUNK_SIZE]
+        BankAccount.objects.filter(pk__in=chunk).update(
+            balance=F('balance') + Case(
+                *[When(pk=pk, then=Value(credits[pk])) for pk in chunk],
+                output_field=money,
+            ),
+            last_transaction_date=now,
+        )
+
+    transactions = Transaction.objects.bulk_create(
+        [
+            Transaction(
+                from_account_id=source_id,
+                to_account_id=line['account_id'],
+                transaction_type='transfer',
+                payment_method='online',
+                amount=line['amount'],
+                status='completed',
+                completed_at=now,
+                reference_number=reference,
+                description=line['description'] or fields.get('description', ''),
+                initiated_by=fields.get('initiated_by'),
+            )
+            for line, reference in zip(valid, references)
+        ],
+        batch_size=CHUNK_SIZE,
+    )
+
+    # Rows are locked, so running balances can be derived from the locked reads
+    running = {pk: account.balance for pk, account in locked.items()}
+    entries = []
+    for line, new_transaction in zip(valid, transactions):
+        running[source_id] -= line['amount']
+        running[line['account_id']] += line['amount']
+        entries.append(LedgerEntry(account_id=source_id, transaction=new_transaction, entry_type='debit',
+                                   amount=line['amount'], balance_after=running[source_id]))
+        entries.append(LedgerEntry(account_id=line['account_id'], transaction=new_transaction,
+                                   entry_type='credit', amount=line['amount'],
+                                   balance_after=running[line['account_id']]))
+    LedgerEntry.objects.bulk_create(entries, batch_size=CHUNK_SIZE)
+    record_spending(source_id, 'transfer', total, count=len(transactions), when=now)
+    # bulk_create sends no post_save, so count the new rows here
+    increment('transactions', len(transactions))
+    transaction.on_commit(lambda: transaction_posted.send(sender=Transaction, transactions=transactions))
+    return transactions, total
+
+
+def post_batch(source, lines, initiated_by=None, description=''):
+    """Validate and post a bulk payment from a business or salary account.
+
+    Invalid lines are reported and skipped; the valid ones are paid in a
+    single atomic block with one debit of the source account, set-based
+    credits and bulk-created transactions and ledger entries.
+    """
+    if source.account_type not in BATCH_SOURCE_TYPES:
+        raise BatchError('Bulk payments can only be made from business or salary accounts.')
+
+    valid, failures = validate_batch(source, lines)
+    result = {'paid': 0, 'total': Decimal('0.00'), 'failures': failures, 'transactions': []}
+    if not valid:
+        return result
+
+    # Allocate outside the atomic block so a rollback cannot hand a block back
+    references = [next_reference('PAY') for _ in valid]
+    transactions, total = run_with_retry(
+        _post_batch, source.pk, valid, references,
+        {'initiated_by': initiated_by, 'description': description},
+    )
+    result.update(paid=len(transactions), total=total, transactions=transactions)
+    return result
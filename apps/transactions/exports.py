@@ -0,0 +1,57 @@
+# apps/transactions/exports.py
+import csv
+
+from openpyxl import Workbook
+
+EXPORT_HEADER = ['Date', 'Reference', 'Description', 'Type', 'Amount', 'Status', 'From Account', 'To Account']
+EXPORT_FIELDS = [
+    'timestamp', 'reference_number', 'description', 'transaction_type', 'amount', 'status',
+    'from_account__account_number', 'to_account__account_number',
+]
+EXPORT_CHUNK_SIZE = 2000
+# Spreadsheets evaluate a cell starting with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    """File-like object that hands each written line straight back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def spreadsheet_text(value):
+    """Quote free text such as a counterparty's description so spreadsheets show it instead of running it"""
+    if value and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield export rows as plain tuples, fetched chunk by chunk"""
+    for row in queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size):
+        timestamp, reference, description, *rest = row
+        yield (timestamp.replace(tzinfo=None), reference, spreadsheet_text(description), *rest)
+
+
+def csv_lines(queryset):
+    """Yield the export as CSV lines, one row at a time"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for row in export_rows(queryset):
+        yield writer.writerow(row)
+
+
+def write_xlsx(queryset, fileobj):
+    """Write the export as an XLSX workbook to fileobj.
+
+    Write-only mode streams each appended row to a temporary file instead of
+    building the sheet in memory, so memory use does not grow with the
+    number of rows.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Transactions')
+    sheet.append(EXPORT_HEADER)
+    for row in export_rows(queryset):
+        sheet.append(row)
+    workbook.save(fileobj)
@@ -0,0 +1,223 @@
+# apps/transactions/idempotency.py
+import asyncio
+import hashlib
+import logging
+import threading
+from datetime import timedelta
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+def _cache_key(user_id, key):
+    return f"idempotency_{user_id}_{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+def _cache_get(cache_key):
+    # The database is the source of truth; a cache outage only costs a query
+    try:
+        return cache.get(cache_key)
+    except Exception as e:
+        logger.warning('Idempotency cache unavailable: %s', e)
+        return None
+
+
+def _cache_set(cache_key, value, timeout):
+    try:
+        cache.set(cache_key, value, timeout)
+    except Exception as e:
+        logger.warning('Idempotency cache unavailable: %s', e)
+
+
+def request_fingerprint(request):
+    """Hash of what the request asks for, so a key cannot be reused for a different request"""
+    digest = hashlib.sha256(f"{request.method}:{request.path}:".encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _replay(outcome):
+    response = HttpResponse(outcome['body'], status=outcome['status'], content_type='application/json')
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _stored_outcome(user_id, key, cache_key):
+    outcome = _cache_get(cache_key)
+    if outcome is not None:
+        return outcome
+    record = IdempotencyKey.objects.filter(
+        user_id=user_id, key=key, status='completed', expires_at__gt=timezone.now()
+    ).first()
+    if record is None:
+        return None
+    return {'hash': record.request_hash, 'status': record.response_status, 'body': record.response_body}
+
+
+def _claim(user_id, key, fingerprint, lease):
+    """Insert the processing marker; return its id, or None if another request already holds the key.
+
+    The marker expires after the lease rather than the key's TTL, so a key
+    whose worker died mid-request is taken over by a later retry instead of
+    staying blocked.
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            # An expired key, or a processing marker whose lease ran out, is free to be used again
+            IdempotencyKey.objects.filter(user_id=user_id, key=key, expires_at__lte=now).delete()
+            record = IdempotencyKey.objects.create(
+                user_id=user_id, key=key, request_hash=fingerprint, expires_at=now + timedelta(seconds=lease)
+            )
+        return record.pk
+    except IntegrityError:
+        return None
+
+
+def _outcome_response(claim):
+    """The response for a stored outcome of the claim's key, or None if there is none yet"""
+    outcome = _stored_outcome(claim['user_id'], claim['key'], claim['cache_key'])
+    if outcome is None:
+        return None
+    if outcome['hash'] != claim['fingerprint']:
+        return JsonResponse({'error': 'Idempotency-Key was used for a different request'}, status=422)
+    return _replay(outcome)
+
+
+def _begin(request):
+    """Claim the request's key, or return the response to send instead of running the view"""
+    key = request.headers.get('Idempotency-Key')
+    if len(key) > 255:
+        return JsonResponse({'error': 'Idempotency-Key is too long'}, status=400), None
+
+    claim = {
+        'user_id': request.user.pk, 'key': key, 'fingerprint': request_fingerprint(request),
+        'ttl': getattr(settings, 'IDEMPOTENCY_KEY_TTL', 86400),
+        'lease': getattr(settings, 'IDEMPOTENCY_LEASE_SECONDS', 30),
+    }
+    claim['cache_key'] = _cache_key(claim['user_id'], key)
+
+    response = _outcome_response(claim)
+    if response is not None:
+        return response, None
+    claim['pk'] = _claim(claim['user_id'], key, claim['fingerprint'], claim['lease'])
+    if claim['pk'] is not None:
+        return None, claim
+    # The holder may have finished between the two lookups
+    response = _outcome_response(claim)
+    if response is not None:
+        return response, None
+    # Don't hold a worker polling for the holder; the client retries
+    response = JsonResponse({'error': 'A request with this Idempotency-Key is in progress'}, status=409)
+    response['Retry-After'] = '1'
+    return response, None
+
+
+class _Heartbeat:
+    """Renew a claim's lease while its view runs.
+
+    The lease only has to outlive the time between two renewals, not the
+    view; it lapses, and a retry may take the key over, only once the
+    process holding it has died.
+    """
+
+    def __init__(self, claim):
+        self.claim = claim
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='idempotency-heartbeat', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        lease = self.claim['lease']
+        try:
+            while not self._stop.wait(lease / 3):
+                try:
+                    IdempotencyKey.objects.filter(pk=self.claim['pk'], status='processing').update(
+                        expires_at=timezone.now() + timedelta(seconds=lease)
+                    )
+                except Exception as e:
+                    logger.warning('Idempotency lease renewal failed: %s', e)
+        finally:
+            connection.close()
+
+
+def _release(claim):
+    IdempotencyKey.objects.filter(pk=claim['pk'], status='processing').delete()
+
+
+def _finish(claim, response):
+    """Record the view's outcome; 5xx responses are not recorded and release the key"""
+    if response.status_code >= 500:
+        _release(claim)
+        return response
+
+    body = response.content.decode()
+    # Matching on the marker's id leaves alone a request that took the key
+    # over after this one outran its lease
+    IdempotencyKey.objects.filter(pk=claim['pk'], status='processing').update(
+        status='completed', response_status=response.status_code, response_body=body,
+        expires_at=timezone.now() + timedelta(seconds=claim['ttl']),
+    )
+    _cache_set(claim['cache_key'], {'hash': claim['fingerprint'], 'status': response.status_code, 'body': body},
+               claim['ttl'])
+    return response
+
+
+def idempotent(view):
+    """Record the first outcome of a request carrying an Idempotency-Key header and replay it.
+
+    Concurrent duplicates get a 409 with Retry-After while the request that
+    claimed the key runs, instead of executing again, so a retry storm
+    moves money at most once. Works on
+    both sync and async views; the async wrapper runs the bookkeeping in a
+    worker thread.
+    """
+    if asyncio.iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method != 'POST' or not request.headers.get('Idempotency-Key'):
+                return await view(request, *args, **kwargs)
+            response, claim = await sync_to_async(_begin)(request)
+            if claim is None:
+                return response
+            try:
+                with _Heartbeat(claim):
+                    response = await view(request, *args, **kwargs)
+            except BaseException:
+                await sync_to_async(_release)(claim)
+                raise
+            return await sync_to_async(_finish)(claim, response)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'POST' or not request.headers.get('Idempotency-Key'):
+            return view(request, *args, **kwargs)
+        response, claim = _begin(request)
+        if claim is None:
+            return response
+        try:
+            with _Heartbeat(claim):
+                response = view(request, *args, **kwargs)
+        except BaseException:
+            _release(claim)
+            raise
+        return _finish(claim, response)
+
+    return wrapper
@@ -0,0 +1,97 @@
+# apps/transactions/limits.py
+import logging
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import DailySpending
+from .rollups import SPEND_TYPES
+from .services import TransferError
+
+logger = logging.getLogger(__name__)
+
+
+class DailyLimitExceeded(TransferError):
+    """The payment would take the account past its daily withdrawal limit"""
+
+
+def _cents(amount):
+    return int((Decimal(amount) * 100).to_integral_value())
+
+
+def _day_start():
+    return timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+
+
+def _bucket_key(account_id):
+    return f"daily_spend_{account_id}_{timezone.localdate():%Y%m%d}"
+
+
+def spent_today(account_id):
+    """What the account has paid out since local midnight, read from today's rollup rows"""
+    total = DailySpending.objects.filter(
+        account_id=account_id, day=timezone.localdate(), category__in=SPEND_TYPES
+    ).aggregate(total=Sum('total'))['total']
+    return Decimal(total or 0)
+
+
+def _reserve(account_id, cents):
+    key = _bucket_key(account_id)
+    try:
+        return cache.incr(key, cents)
+    except ValueError:
+        # No counter for today yet (new day or evicted): seed it from the
+        # database. add() is a no-op if a concurrent request seeded it first.
+        expires = _day_start() + timedelta(days=1) - timezone.now()
+        cache.add(key, _cents(spent_today(account_id)), int(expires.total_seconds()) + 60)
+        return cache.incr(key, cents)
+
+
+def reserve_daily_spend(account, amount):
+    """Count amount against today's limit of account, or raise DailyLimitExceeded.
+
+    The per-account counter lives in the cache under a key for the current
+    day, so a check is a single atomic increment. It is seeded from the
+    database on a miss and expires after the day is over.
+    """
+    account_id = getattr(account, 'pk', account)
+    limit = _cents(account.daily_withdrawal_limit)
+    cents = _cents(amount)
+    try:
+        total = _reserve(account_id, cents)
+    except Exception as e:
+        # Without the cache, fall back to checking against the database
+        logger.warning('Daily spend cache unavailable: %s', e)
+        if _cents(spent_today(account_id)) + cents > limit:
+            raise DailyLimitExceeded('Amount exceeds daily withdrawal limit')
+        return False
+
+    if total > limit:
+        release_daily_spend(account_id, amount)
+        raise DailyLimitExceeded('Amount exceeds daily withdrawal limit')
+    return True
+
+
+def release_daily_spend(account, amount):
+    """Give back a reservation whose payment did not go through"""
+    account_id = getattr(account, 'pk', account)
+    try:
+        cache.decr(_bucket_key(account_id), _cents(amount))
+    except Exception as e:
+        logger.warning('Daily spend cache unavailable: %s', e)
+
+
+@contextmanager
+def daily_spend(account, amount):
+    """Reserve amount against the daily limit for the duration of a payment; release it if the payment fails"""
+    reserved = reserve_daily_spend(account, amount)
+    try:
+        yield
+    except BaseException:
+        if reserved:
+            release_daily_spend(account, amount)
+        raise
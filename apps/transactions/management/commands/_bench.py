@@ -0,0 +1,58 @@
+# apps/transactions/management/commands/_bench.py
+"""Shared fixtures for the bench_* management commands"""
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.accounts.models import BankAccount
+from apps.transactions.models import Transaction
+
+User = get_user_model()
+
+
+def create_bench_history(total, prefix='BENCH'):
+    """Create a throwaway user with two accounts and total transfers between them.
+
+    Returns (user, source, target). Timestamps are spread over time in blocks
+    of 1000 so orderings see both distinct and tied values.
+    """
+    run_id = uuid.uuid4().hex[:8]
+    user = User.objects.create_user(username=f'bench_{run_id}', password=uuid.uuid4().hex,
+                                    first_name='Bench', last_name='User')
+    source = BankAccount.objects.create(account_number=f'B{run_id}0', user=user, account_type='current')
+    target = BankAccount.objects.create(account_number=f'B{run_id}1', user=user, account_type='current')
+
+    batch = []
+    for i in range(total):
+        batch.append(Transaction(
+            from_account=source,
+            to_account=target,
+            transaction_type='transfer',
+            amount=Decimal('1.00'),
+            status='completed',
+            reference_number=f'{prefix}{run_id}{i:010d}',
+            description=f'Benchmark transfer {i}',
+        ))
+        if len(batch) == 5000:
+            Transaction.objects.bulk_create(batch)
+            batch = []
+    Transaction.objects.bulk_create(batch)
+
+    # auto_now_add stamps every row at insert time
+    now = timezone.now()
+    first_pk = Transaction.objects.filter(from_account=source).order_by('pk').values_list('pk', flat=True)[0]
+    for offset in range(0, total, 1000):
+        Transaction.objects.filter(
+            from_account=source, pk__gte=first_pk + offset, pk__lt=first_pk + offset + 1000
+        ).update(timestamp=now - timedelta(hours=(total - offset) // 1000))
+
+    return user, source, target
+
+
+def delete_bench_history(user):
+    """Remove everything create_bench_history made for user"""
+    Transaction.objects.filter(from_account__user=user).delete()
+    user.delete()
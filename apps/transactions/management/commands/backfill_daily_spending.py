@@ -0,0 +1,28 @@
+# apps/transactions/management/commands/backfill_daily_spending.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.accounts.models import BankAccount
+from apps.transactions.models import DailySpending
+from apps.transactions.rollups import aggregate_spending
+from apps.transactions.services import lock_accounts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily spending rollup from completed transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Accounts rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        account_ids = list(BankAccount.objects.order_by('pk').values_list('pk', flat=True))
+        rows = 0
+        for i in range(0, len(account_ids), options['batch_size']):
+            chunk = account_ids[i:i + options['batch_size']]
+            with transaction.atomic():
+                # Postings lock their accounts too, so none can land between
+                # the aggregate read and the rewrite of these accounts' rows
+                lock_accounts(*chunk)
+                DailySpending.objects.filter(account_id__in=chunk).delete()
+                rows += len(DailySpending.objects.bulk_create(aggregate_spending(chunk), batch_size=500))
+        self.stdout.write(self.style.SUCCESS(f'Wrote {rows} rollup rows for {len(account_ids)} accounts.'))
@@ -0,0 +1,64 @@
+# apps/transactions/management/commands/bench_batch.py
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from apps.accounts.models import BankAccount
+from apps.transactions.batches import post_batch
+from apps.transactions.models import Transaction, LedgerEntry
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Post a payroll batch through the bulk payment service and check money is conserved'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=10000)
+        parser.add_argument('--keep', action='store_true', help='Keep benchmark rows afterwards')
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(username=f'bench_{run_id}', password=uuid.uuid4().hex)
+        source = BankAccount.objects.create(
+            account_number=f'B{run_id}S', user=user, account_type='salary',
+            balance=Decimal('1000.00') * options['lines'],
+        )
+        BankAccount.objects.bulk_create(
+            [
+                BankAccount(account_number=f'B{run_id}{i:06d}', user=user, account_type='savings')
+                for i in range(options['lines'])
+            ],
+            batch_size=1000,
+        )
+        account_ids = list(BankAccount.objects.filter(user=user).values_list('pk', flat=True))
+        lines = [
+            {'account_number': f'B{run_id}{i:06d}', 'amount': f'{500 + i % 1000}.25', 'description': 'Salary'}
+            for i in range(options['lines'])
+        ]
+
+        def total_balance():
+            return BankAccount.objects.filter(pk__in=account_ids).aggregate(total=Sum('balance'))['total']
+
+        total_before = total_balance()
+        started = time.perf_counter()
+        result = post_batch(source, lines, description='Benchmark payroll')
+        elapsed = time.perf_counter() - started
+        total_after = total_balance()
+
+        self.stdout.write(f"Lines: {options['lines']}, paid: {result['paid']}, failed: {len(result['failures'])}")
+        self.stdout.write(f"Elapsed: {elapsed:.2f}s ({result['paid'] / elapsed:.0f} lines/sec), total {result['total']}")
+        self.stdout.write(f'Total balance before: {total_before}, after: {total_after}')
+        if total_before == total_after:
+            self.stdout.write(self.style.SUCCESS('Money conserved across all accounts.'))
+        else:
+            self.stdout.write(self.style.ERROR('Money NOT conserved!'))
+
+        if not options['keep']:
+            LedgerEntry.objects.filter(account_id__in=account_ids).delete()
+            Transaction.objects.filter(from_account_id__in=account_ids).delete()
+            user.delete()
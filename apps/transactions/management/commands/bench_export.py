@@ -0,0 +1,71 @@
+# apps/transactions/management/commands/bench_export.py
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.transactions.exports import csv_lines, write_xlsx
+from apps.transactions.models import Transaction
+from ._bench import create_bench_history, delete_bench_history
+
+
+def _run_export(export_format, user_id, queue):
+    # Each export runs in a fresh child so its peak RSS is measured on its own
+    connections.close_all()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queryset = Transaction.objects.filter(from_account__user_id=user_id).order_by('-timestamp', '-id')
+
+    started = time.perf_counter()
+    if export_format == 'csv':
+        rows = -1  # header line
+        with open(os.devnull, 'w') as sink:
+            for line in csv_lines(queryset):
+                sink.write(line)
+                rows += 1
+    else:
+        with tempfile.TemporaryFile() as output:
+            write_xlsx(queryset, output)
+        rows = queryset.count()
+    elapsed = time.perf_counter() - started
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put({
+        'rows': rows,
+        'elapsed': elapsed,
+        'peak_kb': peak,
+        'growth_kb': peak - baseline,
+    })
+
+
+class Command(BaseCommand):
+    help = 'Measure CSV and XLSX export throughput and peak memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000)
+        parser.add_argument('--keep', action='store_true', help='Keep benchmark rows afterwards')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Creating {options['rows']} transactions...")
+        user, _, _ = create_bench_history(options['rows'], prefix='EXPORT')
+        connections.close_all()
+
+        context = multiprocessing.get_context('fork')
+        for export_format in ('csv', 'xlsx'):
+            queue = context.Queue()
+            process = context.Process(target=_run_export, args=(export_format, user.pk, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            self.stdout.write(
+                f"{export_format.upper():<5} {result['rows']} rows in {result['elapsed']:.2f}s "
+                f"({result['rows'] / result['elapsed']:.0f} rows/sec), "
+                f"peak RSS {result['peak_kb'] / 1024:.1f} MB "
+                f"(+{result['growth_kb'] / 1024:.1f} MB during export)"
+            )
+
+        if not options['keep']:
+            delete_bench_history(user)
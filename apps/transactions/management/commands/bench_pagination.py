@@ -0,0 +1,50 @@
+# apps/transactions/management/commands/bench_pagination.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+
+from apps.transactions.models import Transaction
+from apps.transactions.pagination import keyset_paginate, encode_cursor
+from ._bench import create_bench_history, delete_bench_history
+
+
+class Command(BaseCommand):
+    help = 'Compare keyset and OFFSET pagination latency on shallow and deep pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=5000, help='Depth of the deep page')
+        parser.add_argument('--per-page', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--keep', action='store_true', help='Keep benchmark rows afterwards')
+
+    def timed(self, func, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) / repeat * 1000
+
+    def handle(self, *args, **options):
+        per_page = options['per_page']
+        total = options['pages'] * per_page
+        self.stdout.write(f'Creating {total} transactions...')
+        user, source, target = create_bench_history(total, prefix='PAGE')
+
+        queryset = Transaction.objects.filter(from_account__user=user)
+        deep_row = queryset.order_by('-timestamp', '-id')[(options['pages'] - 1) * per_page - 1]
+        deep_cursor = encode_cursor('n', deep_row)
+        paginator = Paginator(queryset.order_by('-timestamp', '-id'), per_page)
+
+        repeat = options['repeat']
+        results = [
+            ('keyset page 1', self.timed(lambda: list(keyset_paginate(queryset, None, per_page)), repeat)),
+            (f"keyset page {options['pages']}",
+             self.timed(lambda: list(keyset_paginate(queryset, deep_cursor, per_page)), repeat)),
+            ('offset page 1', self.timed(lambda: list(paginator.page(1)), repeat)),
+            (f"offset page {options['pages']}", self.timed(lambda: list(paginator.page(options['pages'])), repeat)),
+        ]
+        for label, millis in results:
+            self.stdout.write(f'{label:<20} {millis:8.2f} ms')
+
+        if not options['keep']:
+            delete_bench_history(user)
@@ -0,0 +1,40 @@
+# apps/transactions/management/commands/bench_qr.py
+import tempfile
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from apps.transactions.qr import render_qr, stored_qr_image
+
+
+class Command(BaseCommand):
+    help = 'Measure QR rendering latency and storage growth with and without the image cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--codes', type=int, default=500)
+        parser.add_argument('--distinct', type=int, default=20, help='Distinct payloads among the codes')
+
+    def handle(self, *args, **options):
+        payloads = [
+            str({'account_number': f'{i % options["distinct"]:012d}', 'amount': '25.00', 'purpose': 'Payment'})
+            for i in range(options['codes'])
+        ]
+
+        for image_format in ('png', 'svg'):
+            started = time.perf_counter()
+            uncached_bytes = sum(len(render_qr(payload, image_format)) for payload in payloads)
+            uncached = time.perf_counter() - started
+
+            with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+                started = time.perf_counter()
+                names = {stored_qr_image(payload, image_format) for payload in payloads}
+                cached = time.perf_counter() - started
+                cached_bytes = sum(default_storage.size(name) for name in names)
+
+            self.stdout.write(
+                f"{image_format.upper()}: uncached {uncached / len(payloads) * 1000:.2f} ms/code, "
+                f"{uncached_bytes / 1024:.0f} KB; cached {cached / len(payloads) * 1000:.2f} ms/code, "
+                f"{cached_bytes / 1024:.0f} KB in {len(names)} files"
+            )
@@ -0,0 +1,74 @@
+# apps/transactions/management/commands/bench_references.py
+import multiprocessing
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.transactions.references import ReferenceAllocator
+
+
+def _allocate_in_process(name, block_size, threads, count, queue):
+    # Connections inherited from the parent process must not be shared
+    connections.close_all()
+    allocator = ReferenceAllocator(name=name, block_size=block_size)
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        refs = [allocator.next_reference('BENCH') for _ in range(count)]
+        with lock:
+            results.extend(refs)
+        connections.close_all()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    queue.put(results)
+
+
+class Command(BaseCommand):
+    help = 'Allocate reference numbers from several processes and threads and check for collisions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--count', type=int, default=5000, help='Allocations per thread')
+        parser.add_argument('--block-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        processes = [
+            context.Process(
+                target=_allocate_in_process,
+                args=('bench', options['block_size'], options['threads'], options['count'], queue),
+            )
+            for _ in range(options['processes'])
+        ]
+
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        references = []
+        for _ in processes:
+            references.extend(queue.get())
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        unique = len(set(references))
+        self.stdout.write(
+            f"Processes: {options['processes']}, threads each: {options['threads']}, "
+            f"block size: {options['block_size']}"
+        )
+        self.stdout.write(f'Allocated: {len(references)} in {elapsed:.2f}s ({len(references) / elapsed:.0f}/sec)')
+
+        if unique == len(references):
+            self.stdout.write(self.style.SUCCESS('No collisions.'))
+        else:
+            self.stdout.write(self.style.ERROR(f'{len(references) - unique} collisions!'))
@@ -0,0 +1,114 @@
+# apps/transactions/management/commands/bench_transfers.py
+import random
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Sum
+
+from apps.accounts.models import BankAccount
+from apps.transactions.models import Transaction, LedgerEntry
+from apps.transactions.services import post_transfer, TransferError
+from apps.transactions.references import next_reference
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Run concurrent transfers through the posting service and check money is conserved'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--transfers', type=int, default=200, help='Transfers per thread')
+        parser.add_argument('--accounts', type=int, default=10)
+        parser.add_argument('--keep', action='store_true', help='Keep benchmark rows afterwards')
+
+    def total_balance(self):
+        total = BankAccount.objects.aggregate(total=Sum('balance'))['total'] or Decimal('0')
+        return Decimal(total).quantize(Decimal('0.01'))
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(username=f'bench_{run_id}', password=uuid.uuid4().hex)
+        accounts = [
+            BankAccount.objects.create(
+                account_number=f'B{run_id}{i:04d}',
+                user=user,
+                account_type='current',
+                balance=Decimal('1000.00'),
+            )
+            for i in range(options['accounts'])
+        ]
+        account_ids = [account.pk for account in accounts]
+
+        total_before = self.total_balance()
+        results = {'completed': 0, 'rejected': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def worker():
+            counts = {'completed': 0, 'rejected': 0, 'errors': 0}
+            try:
+                for _ in range(options['transfers']):
+                    from_id, to_id = random.sample(account_ids, 2)
+                    try:
+                        post_transfer(
+                            from_id,
+                            to_id,
+                            Decimal(random.randint(1, 5000)) / 100,
+                            reference_number=next_reference('BENCH'),
+                            description='Benchmark transfer',
+                        )
+                        counts['completed'] += 1
+                    except TransferError:
+                        counts['rejected'] += 1
+                    except Exception:
+                        counts['errors'] += 1
+            finally:
+                connection.close()
+                with lock:
+                    for key, value in counts.items():
+                        results[key] += value
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        total_after = self.total_balance()
+        posted = Transaction.objects.filter(from_account_id__in=account_ids).count()
+
+        self.stdout.write(f"Threads: {options['threads']}, attempted: {options['threads'] * options['transfers']}")
+        self.stdout.write(
+            f"Completed: {results['completed']}, rejected: {results['rejected']}, errors: {results['errors']}"
+        )
+        self.stdout.write(f"Elapsed: {elapsed:.2f}s, throughput: {results['completed'] / elapsed:.1f} transfers/sec")
+        self.stdout.write(f'Total balance before: {total_before}, after: {total_after}')
+
+        if total_before == total_after and posted == results['completed']:
+            self.stdout.write(self.style.SUCCESS('Money conserved across all accounts.'))
+        else:
+            self.stdout.write(self.style.ERROR('Money NOT conserved!'))
+
+        # The last ledger entry of every account must match its materialized balance
+        drifted = [
+            account.account_number
+            for account in BankAccount.objects.filter(pk__in=account_ids)
+            if account.ledger_entries.exists()
+            and account.ledger_entries.order_by('-id').first().balance_after != account.balance
+        ]
+        if drifted:
+            self.stdout.write(self.style.ERROR(f"Ledger out of sync for: {', '.join(drifted)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS('Ledger matches materialized balances.'))
+
+        if not options['keep']:
+            LedgerEntry.objects.filter(account_id__in=account_ids).delete()
+            Transaction.objects.filter(from_account_id__in=account_ids).delete()
+            user.delete()
@@ -0,0 +1,38 @@
+# apps/transactions/management/commands/expire_qr_codes.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.transactions.models import QRPayment
+
+
+class Command(BaseCommand):
+    help = 'Deactivate expired QR codes in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping every --interval seconds')
+        parser.add_argument('--interval', type=int, default=60)
+
+    def sweep(self, batch_size):
+        now = timezone.now()
+        total = 0
+        while True:
+            # Each batch is a short indexed range read on (is_active, valid_until)
+            # and a short write, so payments are never blocked for long
+            ids = list(
+                QRPayment.objects.filter(is_active=True, valid_until__lte=now)
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                return total
+            total += QRPayment.objects.filter(pk__in=ids, is_active=True).update(is_active=False)
+
+    def handle(self, *args, **options):
+        while True:
+            expired = self.sweep(options['batch_size'])
+            self.stdout.write(f'Deactivated {expired} expired QR codes.')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,128 @@
+# apps/transactions/management/commands/loadtest_qr.py
+"""Load test for the QR payment endpoints against a running server.
+
+Compare the deployments under the same concurrency, for example:
+
+    gunicorn banking_project.wsgi -w 4 -b 127.0.0.1:8001
+    python manage.py loadtest_qr --url http://127.0.0.1:8001 --path /transactions/qr/process/
+
+    uvicorn banking_project.asgi:application --workers 4 --port 8002
+    python manage.py loadtest_qr --url http://127.0.0.1:8002 --path /transactions/qr/process/async/
+
+Pass --status to load the QR status lookup instead of payments.
+"""
+import http.client
+import json
+import secrets
+import threading
+import time
+import uuid
+from decimal import Decimal
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+
+from apps.accounts.models import BankAccount
+from apps.transactions.models import Transaction, LedgerEntry, QRPayment
+from apps.transactions.qr_payload import sign_qr_payment
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Measure requests/sec and latency percentiles of the QR payment endpoints on a running server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--path', default='/transactions/qr/process/')
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--status', action='store_true', help='Load the QR status lookup instead')
+        parser.add_argument('--keep', action='store_true', help='Keep load test rows afterwards')
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(username=f'load_{run_id}', password=uuid.uuid4().hex)
+        payer = BankAccount.objects.create(account_number=f'L{run_id}0', user=user, account_type='current',
+                                           balance=Decimal('1000000.00'), daily_withdrawal_limit=Decimal('1000000.00'))
+        merchant = BankAccount.objects.create(account_number=f'L{run_id}1', user=user, account_type='business')
+        qr_payment = QRPayment.objects.create(account=merchant, amount=Decimal('1.00'), purpose='Load test',
+                                              qr_code_image='qr_codes/load.png')
+
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+
+        csrf_token = secrets.token_hex(16)
+        headers = {
+            'Cookie': f'{settings.SESSION_COOKIE_NAME}={session.session_key}; csrftoken={csrf_token}',
+            'X-CSRFToken': csrf_token,
+            'Authorization': 'Bearer load-test',
+            'Content-Type': 'application/json',
+            'Referer': options['url'],
+        }
+        if options['status']:
+            method, path, body = 'GET', f'/transactions/qr/{qr_payment.qr_code_id}/status/', None
+        else:
+            method, path, body = 'POST', options['path'], json.dumps({'qr_data': sign_qr_payment(qr_payment)})
+
+        target = urlsplit(options['url'])
+        latencies, statuses = [], {}
+        lock = threading.Lock()
+        remaining = [options['requests']]
+
+        def client():
+            connection = http.client.HTTPConnection(target.hostname, target.port, timeout=60)
+            local, local_statuses = [], {}
+            while True:
+                with lock:
+                    if not remaining[0]:
+                        break
+                    remaining[0] -= 1
+                started = time.perf_counter()
+                try:
+                    connection.request(method, path, body=body, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    status = response.status
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    connection = http.client.HTTPConnection(target.hostname, target.port, timeout=60)
+                    status = 'error'
+                local.append(time.perf_counter() - started)
+                local_statuses[status] = local_statuses.get(status, 0) + 1
+            connection.close()
+            with lock:
+                latencies.extend(local)
+                for status, count in local_statuses.items():
+                    statuses[status] = statuses.get(status, 0) + count
+
+        threads = [threading.Thread(target=client) for _ in range(options['concurrency'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        self.stdout.write(f"{method} {path} x{len(latencies)} at concurrency {options['concurrency']}")
+        self.stdout.write(f"Statuses: {statuses}")
+        self.stdout.write(
+            f"Throughput: {len(latencies) / elapsed:.1f} req/s, "
+            f"p50 {percentile(0.50):.1f} ms, p99 {percentile(0.99):.1f} ms"
+        )
+
+        if not options['keep']:
+            session.delete()
+            LedgerEntry.objects.filter(account__user=user).delete()
+            Transaction.objects.filter(from_account=payer).delete()
+            user.delete()
@@ -0,0 +1,13 @@
+# apps/transactions/management/commands/purge_idempotency_keys.py
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.transactions.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Delete idempotency keys whose replay window has passed'
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired idempotency keys.'))
@@ -0,0 +1,56 @@
+# apps/transactions/management/commands/render_statements.py
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from apps.accounts.models import BankAccount
+from apps.transactions.pdf_statements import render_statement
+
+
+def _close_inherited_connections():
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Pre-render monthly PDF statements for all active accounts in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help='Defaults to the previous month')
+        parser.add_argument('--month', type=int)
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+
+    def handle(self, *args, **options):
+        year, month = options['year'], options['month']
+        if not year or not month:
+            today = timezone.now().date()
+            year, month = (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+
+        account_ids = list(BankAccount.objects.filter(status='active').values_list('pk', flat=True))
+        connections.close_all()
+        self.stdout.write(f"Rendering {len(account_ids)} statements for {year:04d}-{month:02d} "
+                          f"with {options['workers']} workers...")
+
+        started = time.perf_counter()
+        failed = 0
+        with ProcessPoolExecutor(
+            max_workers=options['workers'],
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_close_inherited_connections,
+        ) as pool:
+            futures = {pool.submit(render_statement, pk, year, month): pk for pk in account_ids}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'Account {futures[future]}: {e}')
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {len(account_ids) - failed} statements in {elapsed:.2f}s ({failed} failed)'
+        ))
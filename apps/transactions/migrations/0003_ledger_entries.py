@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def open_existing_accounts(apps, schema_editor):
+    """Seed every existing account with an opening entry at its current balance"""
+    BankAccount = apps.get_model('accounts', 'BankAccount')
+    LedgerEntry = apps.get_model('transactions', 'LedgerEntry')
+    LedgerEntry.objects.bulk_create(
+        [
+            LedgerEntry(account_id=pk, entry_type='opening', amount=balance, balance_after=balance)
+            for pk, balance in BankAccount.objects.values_list('pk', 'balance').iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_notification_rewards'),
+        ('transactions', '0002_remove_transaction_transaction_from_ac_43b72c_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entry_type', models.CharField(choices=[('debit', 'Debit'), ('credit', 'Credit'), ('opening', 'Opening Balance')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('balance_after', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='accounts.bankaccount')),
+                ('transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='ledger_entries', to='transactions.transaction')),
+            ],
+            options={
+                'db_table': 'ledger_entries',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['account', 'created_at'], name='ledger_account_created_idx')],
+            },
+        ),
+        migrations.RunPython(open_existing_accounts, migrations.RunPython.noop),
+    ]
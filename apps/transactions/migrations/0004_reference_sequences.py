@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0003_ledger_entries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+            options={
+                'db_table': 'reference_sequences',
+            },
+        ),
+    ]
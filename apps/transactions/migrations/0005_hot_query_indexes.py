@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_hot_query_indexes'),
+        ('transactions', '0004_reference_sequences'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='transaction',
+            name='from_account',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='sent_transactions', to='accounts.bankaccount'),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='to_account',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='received_transactions', to='accounts.bankaccount'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['from_account', 'timestamp', 'id'], name='txn_from_account_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['to_account', 'timestamp', 'id'], name='txn_to_account_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['timestamp'], name='txn_pending_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,124 @@
+from django.db import migrations
+
+# Search index over description, counterparty names and reference number.
+# It lives outside the ORM and is kept in sync by database triggers, so
+# every insert path (create, bulk_create, raw SQL) is indexed.
+
+COUNTERPARTY_SQLITE = (
+    "(SELECT group_concat(u.first_name || ' ' || u.last_name, ' ') "
+    "FROM bank_accounts a JOIN users u ON u.id = a.user_id "
+    "WHERE a.id IN (new.from_account_id, new.to_account_id))"
+)
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE transaction_search USING fts5("
+    "description, counterparty, reference_number, tokenize='unicode61')",
+    f"""
+    CREATE TRIGGER transaction_search_ai AFTER INSERT ON transactions BEGIN
+        INSERT INTO transaction_search (rowid, description, counterparty, reference_number)
+        VALUES (new.id, new.description, {COUNTERPARTY_SQLITE}, new.reference_number);
+    END
+    """,
+    f"""
+    CREATE TRIGGER transaction_search_au
+    AFTER UPDATE OF description, reference_number, from_account_id, to_account_id ON transactions BEGIN
+        DELETE FROM transaction_search WHERE rowid = old.id;
+        INSERT INTO transaction_search (rowid, description, counterparty, reference_number)
+        VALUES (new.id, new.description, {COUNTERPARTY_SQLITE}, new.reference_number);
+    END
+    """,
+    """
+    CREATE TRIGGER transaction_search_ad AFTER DELETE ON transactions BEGIN
+        DELETE FROM transaction_search WHERE rowid = old.id;
+    END
+    """,
+    """
+    INSERT INTO transaction_search (rowid, description, counterparty, reference_number)
+    SELECT t.id, t.description,
+           (SELECT group_concat(u.first_name || ' ' || u.last_name, ' ')
+            FROM bank_accounts a JOIN users u ON u.id = a.user_id
+            WHERE a.id IN (t.from_account_id, t.to_account_id)),
+           t.reference_number
+    FROM transactions t
+    """,
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS transaction_search_ai",
+    "DROP TRIGGER IF EXISTS transaction_search_au",
+    "DROP TRIGGER IF EXISTS transaction_search_ad",
+    "DROP TABLE IF EXISTS transaction_search",
+]
+
+POSTGRES_FORWARD = [
+    """
+    CREATE TABLE transaction_search (
+        transaction_id bigint PRIMARY KEY,
+        document tsvector NOT NULL
+    )
+    """,
+    "CREATE INDEX transaction_search_document_idx ON transaction_search USING GIN (document)",
+    """
+    CREATE FUNCTION transaction_search_refresh() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            DELETE FROM transaction_search WHERE transaction_id = OLD.id;
+            RETURN OLD;
+        END IF;
+        INSERT INTO transaction_search (transaction_id, document)
+        VALUES (NEW.id, to_tsvector('simple',
+            coalesce(NEW.description, '') || ' ' ||
+            coalesce((SELECT string_agg(u.first_name || ' ' || u.last_name, ' ')
+                      FROM bank_accounts a JOIN users u ON u.id = a.user_id
+                      WHERE a.id IN (NEW.from_account_id, NEW.to_account_id)), '') || ' ' ||
+            NEW.reference_number))
+        ON CONFLICT (transaction_id) DO UPDATE SET document = EXCLUDED.document;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER transaction_search_sync
+    AFTER INSERT OR DELETE OR UPDATE OF description, reference_number, from_account_id, to_account_id
+    ON transactions FOR EACH ROW EXECUTE FUNCTION transaction_search_refresh()
+    """,
+    """
+    INSERT INTO transaction_search (transaction_id, document)
+    SELECT t.id, to_tsvector('simple',
+        coalesce(t.description, '') || ' ' ||
+        coalesce((SELECT string_agg(u.first_name || ' ' || u.last_name, ' ')
+                  FROM bank_accounts a JOIN users u ON u.id = a.user_id
+                  WHERE a.id IN (t.from_account_id, t.to_account_id)), '') || ' ' ||
+        t.reference_number)
+    FROM transactions t
+    """,
+]
+
+POSTGRES_REVERSE = [
+    "DROP TRIGGER IF EXISTS transaction_search_sync ON transactions",
+    "DROP FUNCTION IF EXISTS transaction_search_refresh()",
+    "DROP TABLE IF EXISTS transaction_search",
+]
+
+
+def run_for_vendor(sqlite_statements, postgres_statements):
+    def operation(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        statements = {'sqlite': sqlite_statements, 'postgresql': postgres_statements}.get(vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0005_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(SQLITE_FORWARD, POSTGRES_FORWARD),
+            run_for_vendor(SQLITE_REVERSE, POSTGRES_REVERSE),
+        ),
+    ]
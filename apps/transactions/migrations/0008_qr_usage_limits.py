@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0007_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='qrpayment',
+            name='max_uses',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='qrpayment',
+            index=models.Index(fields=['is_active', 'valid_until'], name='qr_active_valid_until_idx'),
+        ),
+    ]
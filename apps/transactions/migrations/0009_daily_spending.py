@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_hot_query_indexes'),
+        ('transactions', '0008_qr_usage_limits'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySpending',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('category', models.CharField(choices=[('deposit', 'Deposit'), ('withdrawal', 'Withdrawal'), ('transfer', 'Transfer'), ('payment', 'Payment'), ('interest', 'Interest Credit'), ('fee', 'Service Fee')], max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_spending', to='accounts.bankaccount')),
+            ],
+            options={
+                'db_table': 'daily_spending',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyspending',
+            constraint=models.UniqueConstraint(fields=('account', 'day', 'category'), name='daily_spending_uniq'),
+        ),
+    ]
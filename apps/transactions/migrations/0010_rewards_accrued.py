@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:14
+
+import importlib
+
+from django.db import migrations, models
+
+search = importlib.import_module('apps.transactions.migrations.0006_transaction_search')
+
+# SQLite adds the column by rebuilding the table, which drops the search
+# index triggers; put them back after the rebuild in either direction
+SQLITE_TRIGGERS = search.SQLITE_REVERSE[:3] + search.SQLITE_FORWARD[1:4]
+restore_search_triggers = search.run_for_vendor(SQLITE_TRIGGERS, [])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0009_daily_spending'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        # Existing transactions predate accrual; marking them accrued keeps
+        # the first run from crediting the whole history
+        migrations.AddField(
+            model_name='transaction',
+            name='rewards_accrued',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='rewards_accrued',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('rewards_accrued', False), ('status', 'completed')), fields=['id'], name='txn_rewards_pending_idx'),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,99 @@
+import importlib
+
+from django.db import migrations
+
+search = importlib.import_module('apps.transactions.migrations.0006_transaction_search')
+
+# Adds the paying user to the search index as an owner token ("u<user id>"),
+# so a search ANDs the user's own posting list with the query terms and its
+# cost follows that user's rows instead of every match in the table.
+
+COUNTERPARTY_SQLITE = search.COUNTERPARTY_SQLITE
+OWNER_SQLITE = "(SELECT 'u' || a.user_id FROM bank_accounts a WHERE a.id = new.from_account_id)"
+
+SQLITE_FORWARD = search.SQLITE_REVERSE + [
+    "CREATE VIRTUAL TABLE transaction_search USING fts5("
+    "description, counterparty, reference_number, owner, tokenize='unicode61')",
+    f"""
+    CREATE TRIGGER transaction_search_ai AFTER INSERT ON transactions BEGIN
+        INSERT INTO transaction_search (rowid, description, counterparty, reference_number, owner)
+        VALUES (new.id, new.description, {COUNTERPARTY_SQLITE}, new.reference_number, {OWNER_SQLITE});
+    END
+    """,
+    f"""
+    CREATE TRIGGER transaction_search_au
+    AFTER UPDATE OF description, reference_number, from_account_id, to_account_id ON transactions BEGIN
+        DELETE FROM transaction_search WHERE rowid = old.id;
+        INSERT INTO transaction_search (rowid, description, counterparty, reference_number, owner)
+        VALUES (new.id, new.description, {COUNTERPARTY_SQLITE}, new.reference_number, {OWNER_SQLITE});
+    END
+    """,
+    search.SQLITE_FORWARD[3],
+    """
+    INSERT INTO transaction_search (rowid, description, counterparty, reference_number, owner)
+    SELECT t.id, t.description,
+           (SELECT group_concat(u.first_name || ' ' || u.last_name, ' ')
+            FROM bank_accounts a JOIN users u ON u.id = a.user_id
+            WHERE a.id IN (t.from_account_id, t.to_account_id)),
+           t.reference_number,
+           (SELECT 'u' || a.user_id FROM bank_accounts a WHERE a.id = t.from_account_id)
+    FROM transactions t
+    """,
+]
+
+SQLITE_REVERSE = search.SQLITE_REVERSE + search.SQLITE_FORWARD
+
+
+def postgres_document(row):
+    # The owner token gets weight A and everything else the default D, so a
+    # description that happens to contain "u123" never matches "u123:A"
+    return (
+        f"setweight(to_tsvector('simple', coalesce('u' || (SELECT a.user_id FROM bank_accounts a "
+        f"WHERE a.id = {row}.from_account_id), '')), 'A') || "
+        f"to_tsvector('simple', "
+        f"coalesce({row}.description, '') || ' ' || "
+        f"coalesce((SELECT string_agg(u.first_name || ' ' || u.last_name, ' ') "
+        f"FROM bank_accounts a JOIN users u ON u.id = a.user_id "
+        f"WHERE a.id IN ({row}.from_account_id, {row}.to_account_id)), '') || ' ' || "
+        f"{row}.reference_number)"
+    )
+
+
+POSTGRES_FORWARD = [
+    f"""
+    CREATE OR REPLACE FUNCTION transaction_search_refresh() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            DELETE FROM transaction_search WHERE transaction_id = OLD.id;
+            RETURN OLD;
+        END IF;
+        INSERT INTO transaction_search (transaction_id, document)
+        VALUES (NEW.id, {postgres_document('NEW')})
+        ON CONFLICT (transaction_id) DO UPDATE SET document = EXCLUDED.document;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    f"UPDATE transaction_search s SET document = {postgres_document('t')} "
+    f"FROM transactions t WHERE t.id = s.transaction_id",
+]
+
+POSTGRES_REVERSE = [
+    search.POSTGRES_FORWARD[2].replace('CREATE FUNCTION', 'CREATE OR REPLACE FUNCTION'),
+    "DELETE FROM transaction_search",
+    search.POSTGRES_FORWARD[4],
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0010_rewards_accrued'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            search.run_for_vendor(SQLITE_FORWARD, POSTGRES_FORWARD),
+            search.run_for_vendor(SQLITE_REVERSE, POSTGRES_REVERSE),
+        ),
+    ]
@@ -32,9 +32,11 @@ class Transaction(models.Model):
     ]
     
     transaction_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
-    from_account = models.ForeignKey(BankAccount, on_delete=models.PROTECT, 
+    # Lookups by account are served by the composite (account, timestamp, id)
+    # indexes in Meta, which also cover the ordering
+    from_account = models.ForeignKey(BankAccount, on_delete=models.PROTECT, db_index=False,
                                    related_name='sent_transactions', null=True, blank=True)
-    to_account = models.ForeignKey(BankAccount, on_delete=models.PROTECT, 
+    to_account = models.ForeignKey(BankAccount, on_delete=models.PROTECT, db_index=False,
                                  related_name='received_transactions', null=True, blank=True)
     transaction_type = models.CharField(max_length=20, choices=TRANSACTION_TYPES)
     amount = models.DecimalField(max_digits=15, decimal_places=2)
@@ -48,10 +50,21 @@ class Transaction(models.Model):
                                    related_name='approved_transactions', blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    rewards_accrued = models.BooleanField(default=False)
     
     class Meta:
         db_table = 'transactions'
         ordering = ['-timestamp']
+        indexes = [
+            # Account history, statements and keyset pagination
+            models.Index(fields=['from_account', 'timestamp', 'id'], name='txn_from_account_ts_idx'),
+            models.Index(fields=['to_account', 'timestamp', 'id'], name='txn_to_account_ts_idx'),
+            # Pending-approval queues only ever look at a small slice of the table
+            models.Index(fields=['timestamp'], name='txn_pending_ts_idx', condition=models.Q(status='pending')),
+            # Completed transactions the rewards engine has not picked up yet
+            models.Index(fields=['id'], name='txn_rewards_pending_idx',
+                         condition=models.Q(status='completed', rewards_accrued=False)),
+        ]
     
     def __str__(self):
         return f"{self.transaction_id} - {self.transaction_type} - ${self.amount}"
@@ -66,6 +79,106 @@ class QRPayment(models.Model):
     valid_until = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     used_count = models.IntegerField(default=0)
+    max_uses = models.PositiveIntegerField(null=True, blank=True)  # None = unlimited
     
     class Meta:
         db_table = 'qr_payments'
+        indexes = [
+            # Serves the expiry sweeper and keeps active-code lookups narrow
+            models.Index(fields=['is_active', 'valid_until'], name='qr_active_valid_until_idx'),
+        ]
+
+class ReferenceSequence(models.Model):
+    """Database-backed counter that reference numbers are allocated from in blocks"""
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField(default=1)
+
+    class Meta:
+        db_table = 'reference_sequences'
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+class LedgerEntry(models.Model):
+    """Append-only debit/credit posting against a single account.
+
+    Every completed transfer writes one debit and one credit entry. Each
+    entry stores the account balance right after it was applied, so any
+    entry doubles as a checkpoint for "balance as of" queries.
+    """
+    ENTRY_TYPES = [
+        ('debit', 'Debit'),
+        ('credit', 'Credit'),
+        ('opening', 'Opening Balance'),
+    ]
+
+    account = models.ForeignKey(BankAccount, on_delete=models.PROTECT, related_name='ledger_entries')
+    transaction = models.ForeignKey(Transaction, on_delete=models.PROTECT,
+                                    related_name='ledger_entries', null=True, blank=True)
+    entry_type = models.CharField(max_length=10, choices=ENTRY_TYPES)
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    balance_after = models.DecimalField(max_digits=15, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'ledger_entries'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['account', 'created_at'], name='ledger_account_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError('Ledger entries are append-only and cannot be modified.')
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError('Ledger entries are append-only and cannot be deleted.')
+
+    def __str__(self):
+        return f"{self.account_id} {self.entry_type} ${self.amount} -> ${self.balance_after}"
+
+class IdempotencyKey(models.Model):
+    """First outcome of a request sent with an Idempotency-Key header, replayed for retries"""
+    STATUS_CHOICES = [
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_keys')
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='processing')
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'idempotency_keys'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key} ({self.status})"
+
+class DailySpending(models.Model):
+    """Per-account, per-day, per-category total of completed outgoing transactions, kept up to date by the posting path"""
+    account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, related_name='daily_spending')
+    day = models.DateField()
+    category = models.CharField(max_length=20, choices=Transaction.TRANSACTION_TYPES)
+    total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'daily_spending'
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'day', 'category'], name='daily_spending_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.account_id} {self.day} {self.category}: ${self.total}"
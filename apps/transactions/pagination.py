@@ -0,0 +1,90 @@
+# apps/transactions/pagination.py
+import base64
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(direction, row, field='timestamp'):
+    """Build an opaque token pointing just past row in the given direction ('n' or 'p')"""
+    raw = f"{direction}|{getattr(row, field).isoformat()}|{row.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (direction, timestamp, id) or None for a missing or malformed token"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        direction, timestamp, pk = raw.split('|')
+        timestamp = parse_datetime(timestamp)
+        if direction not in ('n', 'p') or timestamp is None:
+            return None
+        return direction, timestamp, int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """A page of rows ordered newest first, with cursors to its neighbours"""
+
+    def __init__(self, rows, has_next, has_previous, field='timestamp'):
+        self.object_list = rows
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = encode_cursor('n', rows[-1], field) if rows and has_next else None
+        self.prev_cursor = encode_cursor('p', rows[0], field) if rows and has_previous else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def keyset_paginate(queryset, cursor=None, per_page=20, field='timestamp'):
+    """Paginate queryset on (field, id) descending; field is a datetime column.
+
+    Each page is a range scan that starts at the cursor row, so page 5000
+    costs the same as page 1 given an index on the ordering columns.
+    """
+    decoded = decode_cursor(cursor)
+
+    if decoded is None:
+        rows = list(queryset.order_by(f'-{field}', '-id')[:per_page + 1])
+        return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_previous=False, field=field)
+
+    direction, value, pk = decoded
+    if direction == 'n':
+        rows = list(
+            queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk}))
+            .order_by(f'-{field}', '-id')[:per_page + 1]
+        )
+        return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_previous=True, field=field)
+
+    rows = list(
+        queryset.filter(Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk}))
+        .order_by(field, 'id')[:per_page + 1]
+    )
+    has_previous = len(rows) > per_page
+    rows = rows[:per_page]
+    rows.reverse()
+    return KeysetPage(rows, has_next=True, has_previous=has_previous, field=field)
+
+
+def cached_count(queryset, key_parts, timeout=60):
+    """Count queryset, reusing the result for timeout seconds.
+
+    Totals are informational, so a slightly stale number is acceptable and
+    saves a full COUNT on every page view.
+    """
+    digest = hashlib.sha1(repr(key_parts).encode()).hexdigest()
+    cache_key = f"txn_count_{digest}"
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, timeout)
+    return count
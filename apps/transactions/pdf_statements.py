@@ -0,0 +1,187 @@
+# apps/transactions/pdf_statements.py
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Max, Q
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from apps.accounts.models import BankAccount
+from .models import Transaction
+from .statements import statement_rows, opening_balance
+
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def statement_period(year, month):
+    """Return the [start, end) datetimes of a calendar month in UTC"""
+    start = datetime(year, month, 1, tzinfo=dt_timezone.utc)
+    end = datetime(year + (month == 12), month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def ledger_watermark(account, start, end):
+    """Identify the exact set of completed rows in the period with one aggregate query"""
+    stats = Transaction.objects.filter(
+        Q(from_account=account) | Q(to_account=account),
+        status='completed', timestamp__gte=start, timestamp__lt=end,
+    ).aggregate(last_id=Max('id'), rows=Count('id'))
+    return f"{stats['last_id'] or 0}-{stats['rows']}"
+
+
+def cache_path(account, year, month):
+    """Location of the statement PDF for the current ledger state.
+
+    Every version of one account's month lives in the same directory, named
+    by its watermark. A closed month never changes, so its file is reused
+    forever; new postings in an open month move the watermark and produce a
+    new file, and render_statement removes the one it supersedes.
+    """
+    start, end = statement_period(year, month)
+    watermark = ledger_watermark(account, start, end)
+    key = hashlib.sha256(f"{account.pk}:{year:04d}-{month:02d}".encode()).hexdigest()
+    return Path(settings.STATEMENT_CACHE_DIR) / key[:2] / key / f"{watermark}.pdf"
+
+
+def prune_superseded(path):
+    """Delete the other versions of the statement at path"""
+    for old in path.parent.glob('*.pdf'):
+        if old != path:
+            old.unlink(missing_ok=True)
+
+
+def render_pdf(account, year, month, fileobj):
+    """Draw the statement for one month onto fileobj, streaming rows from the database"""
+    start, end = statement_period(year, month)
+    pdf = canvas.Canvas(fileobj, pagesize=A4)
+    height = A4[1]
+    columns = [15 * mm, 40 * mm, 85 * mm, 140 * mm, 160 * mm, 180 * mm]
+
+    def header():
+        pdf.setFont('Helvetica-Bold', 14)
+        pdf.drawString(15 * mm, height - 20 * mm, f"Statement {year:04d}-{month:02d}")
+        pdf.setFont('Helvetica', 9)
+        pdf.drawString(15 * mm, height - 26 * mm, f"Account {account.account_number}")
+        pdf.setFont('Helvetica-Bold', 8)
+        for x, title in zip(columns, ['Date', 'Reference', 'Description', 'Debit', 'Credit', 'Balance']):
+            pdf.drawString(x, height - 36 * mm, title)
+        pdf.setFont('Helvetica', 8)
+        return height - 42 * mm
+
+    y = header()
+    pdf.drawString(columns[2], y, 'Opening balance')
+    pdf.drawString(columns[5], y, str(opening_balance(account, start)))
+    y -= 5 * mm
+
+    for row in statement_rows(account, start, end):
+        # statement_rows includes its end bound; the period is half-open
+        if row['timestamp'] >= end:
+            break
+        if y < 20 * mm:
+            pdf.showPage()
+            y = header()
+        values = [
+            row['timestamp'].strftime('%Y-%m-%d'),
+            row['reference_number'][:22],
+            row['description'][:32],
+            str(row['debit'] or ''),
+            str(row['credit'] or ''),
+            str(row['balance']),
+        ]
+        for x, value in zip(columns, values):
+            pdf.drawString(x, y, value)
+        y -= 5 * mm
+
+    pdf.showPage()
+    pdf.save()
+
+
+def render_statement(account_id, year, month):
+    """Render one statement into the cache unless it is already there; return its path"""
+    account = BankAccount.objects.get(pk=account_id)
+    path = cache_path(account, year, month)
+    if path.exists():
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temporary file and rename, so readers never see a partial PDF
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as output:
+            render_pdf(account, year, month, output)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    prune_superseded(path)
+    return path
+
+
+def _render_in_thread(account_id, year, month):
+    try:
+        return render_statement(account_id, year, month)
+    finally:
+        connection.close()
+
+
+def get_executor():
+    """Process-wide pool that renders statements off the request thread.
+
+    Rendering is CPU-bound and holds the GIL, so on-demand renders go to a
+    pool of STATEMENT_RENDER_WORKERS processes. With 0 they run in a single
+    background thread instead, which only keeps the render off the request
+    and shares the web process's CPU; bulk rendering belongs to
+    `manage.py render_statements`.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = getattr(settings, 'STATEMENT_RENDER_WORKERS', 0)
+            if workers:
+                # Spawned, not forked: the web process has threads and open
+                # database connections
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=django.setup,
+                )
+            else:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='statement-render')
+        return _executor
+
+
+def cached_statement(account, year, month):
+    """Return the cached PDF path, or schedule a background render and return None.
+
+    Concurrent requests for the same statement share a single render.
+    """
+    path = cache_path(account, year, month)
+    if path.exists():
+        return path
+
+    with _in_flight_lock:
+        if path in _in_flight:
+            return None
+        executor = get_executor()
+        render = render_statement if isinstance(executor, ProcessPoolExecutor) else _render_in_thread
+        _in_flight[path] = future = executor.submit(render, account.pk, year, month)
+    # Outside the lock: a future that is already done runs the callback right here
+    future.add_done_callback(lambda future: _forget(path))
+    return None
+
+
+def _forget(path):
+    with _in_flight_lock:
+        _in_flight.pop(path, None)
@@ -0,0 +1,107 @@
+# apps/transactions/qr.py
+import hashlib
+import io
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import qrcode
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+QR_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+QR_BOX_SIZE = 10
+QR_BORDER = 4  # the quiet zone the QR spec requires
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def render_qr(payload, image_format='png'):
+    """Encode payload as a QR code and return the image bytes.
+
+    PNG output is an optimized 1-bit image; SVG output is a single vector
+    path that scales to any print resolution.
+    """
+    qr = qrcode.QRCode(
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
+        box_size=QR_BOX_SIZE,
+        border=QR_BORDER,
+    )
+    qr.add_data(payload)
+    qr.make(fit=True)
+
+    if image_format == 'svg':
+        return _svg_path(qr.get_matrix())
+
+    buffer = io.BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def _svg_path(matrix):
+    # One unit per module and one path segment per horizontal run, instead of
+    # a rect per module with fractional coordinates
+    size = len(matrix)
+    runs = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if row[x]:
+                start = x
+                while x < size and row[x]:
+                    x += 1
+                runs.append(f"M{start} {y}h{x - start}v1H{start}z")
+            else:
+                x += 1
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {size} {size}" '
+        f'width="{size * QR_BOX_SIZE}" height="{size * QR_BOX_SIZE}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/>'
+        f'<path d="{"".join(runs)}"/></svg>'
+    ).encode()
+
+
+def get_render_pool():
+    """Process pool for QR rendering, or None when QR_RENDER_WORKERS is 0.
+
+    Rendering is pure Python and CPU-bound, so separate processes are the
+    only way to run several renders in parallel.
+    """
+    global _pool
+    workers = getattr(settings, 'QR_RENDER_WORKERS', 0)
+    if not workers:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+        return _pool
+
+
+def qr_image_name(payload, image_format='png'):
+    """Content-addressed storage name: identical payloads share one file"""
+    digest = hashlib.sha256(f"{image_format}:{QR_BOX_SIZE}:{QR_BORDER}:{payload}".encode()).hexdigest()
+    return f"qr_codes/{digest[:2]}/{digest}.{image_format}"
+
+
+def stored_qr_image(payload, image_format='png'):
+    """Return the storage name of the QR image for payload, rendering it only on a miss"""
+    if image_format not in QR_FORMATS:
+        raise ValueError(f"Unsupported QR image format: {image_format}")
+
+    name = qr_image_name(payload, image_format)
+    if default_storage.exists(name):
+        return name
+
+    pool = get_render_pool()
+    if pool is None:
+        content = render_qr(payload, image_format)
+    else:
+        content = pool.submit(render_qr, payload, image_format).result()
+    # A concurrent render may have stored the same file meanwhile; both are identical
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, ContentFile(content))
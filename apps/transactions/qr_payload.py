@@ -0,0 +1,115 @@
+# apps/transactions/qr_payload.py
+import struct
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+PAYLOAD_PREFIX = 'BQ:'
+PAYLOAD_VERSION = 1
+KEY_SALT = 'apps.transactions.qr_payload'
+MAC_SIZE = 16
+# version, qr_code_id, amount in cents (0 = payer enters the amount), expiry as unix time (0 = never)
+HEADER = struct.Struct('>B16sQI')
+
+BASE45_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
+BASE45_INDEX = {char: value for value, char in enumerate(BASE45_ALPHABET)}
+
+
+class InvalidQRCode(ValueError):
+    """The scanned payload is malformed, forged or expired"""
+
+
+def b45encode(data):
+    """Base45 (RFC 9285): fits the QR alphanumeric mode, which stores 5.5 bits per character"""
+    chars = []
+    for i in range(0, len(data) - 1, 2):
+        value = data[i] * 256 + data[i + 1]
+        value, c = divmod(value, 45)
+        e, d = divmod(value, 45)
+        chars += [BASE45_ALPHABET[c], BASE45_ALPHABET[d], BASE45_ALPHABET[e]]
+    if len(data) % 2:
+        d, c = divmod(data[-1], 45)
+        chars += [BASE45_ALPHABET[c], BASE45_ALPHABET[d]]
+    return ''.join(chars)
+
+
+def b45decode(text):
+    """Inverse of b45encode; raises InvalidQRCode on malformed input"""
+    try:
+        values = [BASE45_INDEX[char] for char in text]
+    except KeyError:
+        raise InvalidQRCode('Invalid QR code')
+    if len(values) % 3 == 1:
+        raise InvalidQRCode('Invalid QR code')
+
+    data = bytearray()
+    for i in range(0, len(values), 3):
+        chunk = values[i:i + 3]
+        value = sum(v * 45 ** n for n, v in enumerate(chunk))
+        if len(chunk) == 3:
+            if value > 0xFFFF:
+                raise InvalidQRCode('Invalid QR code')
+            data += bytes(divmod(value, 256))
+        else:
+            if value > 0xFF:
+                raise InvalidQRCode('Invalid QR code')
+            data.append(value)
+    return bytes(data)
+
+
+def _mac(body):
+    secret = getattr(settings, 'QR_SIGNING_KEY', None) or settings.SECRET_KEY
+    return salted_hmac(KEY_SALT, body, secret=secret, algorithm='sha256').digest()[:MAC_SIZE]
+
+
+def encode_payload(qr_code_id, account_number, amount=None, valid_until=None):
+    """Build the signed text that goes into the QR code"""
+    cents = int((Decimal(amount) * 100).to_integral_value()) if amount else 0
+    expires = int(valid_until.timestamp()) if valid_until else 0
+    account = account_number.encode('ascii')
+    body = HEADER.pack(PAYLOAD_VERSION, uuid.UUID(str(qr_code_id)).bytes, cents, expires)
+    body += bytes([len(account)]) + account
+    return PAYLOAD_PREFIX + b45encode(body + _mac(body))
+
+
+def sign_qr_payment(qr_payment):
+    """Signed payload for a QRPayment row"""
+    return encode_payload(qr_payment.qr_code_id, qr_payment.account.account_number,
+                          qr_payment.amount, qr_payment.valid_until)
+
+
+def decode_payload(text, now=None):
+    """Verify a scanned payload without touching the database.
+
+    Checks the version, the HMAC and the expiry, and returns a dict with
+    qr_code_id, account_number, amount (None for open amounts) and
+    valid_until. Raises InvalidQRCode otherwise.
+    """
+    if not isinstance(text, str) or not text.startswith(PAYLOAD_PREFIX):
+        raise InvalidQRCode('Invalid QR code')
+    data = b45decode(text[len(PAYLOAD_PREFIX):])
+    if len(data) < HEADER.size + 1 + MAC_SIZE:
+        raise InvalidQRCode('Invalid QR code')
+
+    body, mac = data[:-MAC_SIZE], data[-MAC_SIZE:]
+    if not constant_time_compare(mac, _mac(body)):
+        raise InvalidQRCode('QR code signature is invalid')
+
+    version, qr_code_id, cents, expires = HEADER.unpack_from(body)
+    if version != PAYLOAD_VERSION:
+        raise InvalidQRCode('Unsupported QR code version')
+    if expires and expires <= (now or time.time()):
+        raise InvalidQRCode('QR code has expired')
+
+    account_length = body[HEADER.size]
+    account = body[HEADER.size + 1:HEADER.size + 1 + account_length]
+    return {
+        'qr_code_id': uuid.UUID(bytes=qr_code_id),
+        'account_number': account.decode('ascii'),
+        'amount': Decimal(cents).scaleb(-2) if cents else None,
+        'valid_until': datetime.fromtimestamp(expires, dt_timezone.utc) if expires else None,
+    }
@@ -0,0 +1,70 @@
+# apps/transactions/references.py
+import os
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ReferenceSequence
+from .services import run_with_retry
+
+
+class ReferenceAllocator:
+    """Hand out unique reference numbers from blocks reserved in the database.
+
+    Each block is claimed with a single atomic UPDATE on ReferenceSequence,
+    so blocks never overlap across threads, gunicorn workers or nodes, and
+    numbers inside a block are served from memory without a DB round trip.
+    Numbers are monotonic within a process; unused numbers from a block are
+    simply skipped when the process exits.
+    """
+
+    def __init__(self, name='transaction', block_size=None):
+        self.name = name
+        self.block_size = block_size or getattr(settings, 'REFERENCE_BLOCK_SIZE', 1000)
+        self._lock = threading.Lock()
+        self._pid = None
+        self._next = 0
+        self._end = 0
+
+    def _claim_block(self):
+        updated = ReferenceSequence.objects.filter(name=self.name).update(
+            next_value=F('next_value') + self.block_size
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    ReferenceSequence.objects.create(name=self.name, next_value=1 + self.block_size)
+                return 1
+            except IntegrityError:
+                # Another process created the row first; take a block from it
+                return self._claim_block()
+        end = ReferenceSequence.objects.values_list('next_value', flat=True).get(name=self.name)
+        return end - self.block_size
+
+    def allocate(self):
+        """Return the next sequence number"""
+        with self._lock:
+            # A forked worker must not reuse the block inherited from its parent
+            if self._pid != os.getpid() or self._next >= self._end:
+                start = run_with_retry(self._claim_block)
+                self._pid = os.getpid()
+                self._next = start
+                self._end = start + self.block_size
+            value = self._next
+            self._next += 1
+            return value
+
+    def next_reference(self, prefix):
+        """Return a reference such as TXN202610180000001234"""
+        return f"{prefix}{timezone.now().strftime('%Y%m%d')}{self.allocate():010d}"
+
+
+default_allocator = ReferenceAllocator()
+
+
+def next_reference(prefix):
+    """Allocate a new reference number with the given prefix (TXN, QR, ...)"""
+    return default_allocator.next_reference(prefix)
@@ -0,0 +1,77 @@
+# apps/transactions/rollups.py
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Transaction, DailySpending
+
+SPEND_TYPES = ('withdrawal', 'transfer', 'payment')
+
+
+def record_spending(account_id, category, amount, count=1, when=None):
+    """Add completed outgoing money to the account's rollup row for the day.
+
+    Must run inside the transaction that posts the money, so the rollup
+    commits or rolls back together with it. Categories outside SPEND_TYPES
+    are ignored.
+    """
+    if category not in SPEND_TYPES:
+        return
+    day = timezone.localdate(when or timezone.now())
+    row = DailySpending.objects.filter(account_id=account_id, day=day, category=category)
+    if row.update(total=F('total') + amount, count=F('count') + count):
+        return
+    try:
+        with transaction.atomic():
+            DailySpending.objects.create(account_id=account_id, day=day, category=category,
+                                         total=amount, count=count)
+    except IntegrityError:
+        # A concurrent posting created today's row first
+        row.update(total=F('total') + amount, count=F('count') + count)
+
+
+def aggregate_spending(account_ids):
+    """Compute rollup rows for the given accounts from the transactions table"""
+    rows = (
+        Transaction.objects.filter(from_account_id__in=account_ids, status='completed',
+                                   transaction_type__in=SPEND_TYPES)
+        .annotate(day=TruncDate('timestamp', tzinfo=timezone.get_current_timezone()))
+        .values('from_account_id', 'day', 'transaction_type')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    return [
+        DailySpending(account_id=row['from_account_id'], day=row['day'], category=row['transaction_type'],
+                      total=row['total'], count=row['count'])
+        for row in rows
+    ]
+
+
+def spending_by_category(user_id, start=None, end=None):
+    """Totals per spending category for the user's accounts, read from the rollup.
+
+    start and end are inclusive dates; either may be omitted. Reads one row
+    per account, day and category at most, whatever the transaction volume.
+    """
+    rows = DailySpending.objects.filter(account__user_id=user_id)
+    if start is not None:
+        rows = rows.filter(day__gte=start)
+    if end is not None:
+        rows = rows.filter(day__lte=end)
+    totals = rows.values('category').annotate(total=Sum('total')).order_by()
+    return {row['category']: Decimal(row['total']) for row in totals}
+
+
+def daily_spending_series(user_id, start, end):
+    """Per-day totals for charting, as a list of (day, {category: total}) in date order"""
+    rows = (
+        DailySpending.objects.filter(account__user_id=user_id, day__gte=start, day__lte=end)
+        .values('day', 'category').annotate(total=Sum('total')).order_by('day')
+    )
+    series = {}
+    for row in rows:
+        series.setdefault(row['day'], {})[row['category']] = Decimal(row['total'])
+    return list(series.items())
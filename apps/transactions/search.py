@@ -0,0 +1,73 @@
+# apps/transactions/search.py
+import re
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+AMOUNT_RE = re.compile(r'\d+(\.\d{1,2})?')
+
+# Matches up to this many rows are passed to the main query as a literal id list
+SEARCH_ID_LIMIT = 2000
+
+
+def tokenize(query):
+    """Split a search box query into plain word tokens"""
+    return TOKEN_RE.findall(query or '')[:10]
+
+
+def search_condition(tokens, user_id=None):
+    """Return a Q matching transactions whose search document has every token as a prefix.
+
+    Uses the FTS5 table on SQLite and the tsvector table on Postgres, both
+    maintained by triggers from migrations 0006 and 0011. Given user_id, the
+    match is ANDed with the paying user's owner token inside the index, so
+    common terms only cost as much as that user's own rows. Selective
+    queries are resolved to a short id list first, so the main query becomes
+    a primary key lookup; broad ones stay a subquery and let the account
+    index drive. Other backends fall back to a plain substring match on the
+    description.
+    """
+    if connection.vendor == 'sqlite':
+        sql = 'SELECT rowid FROM transaction_search WHERE transaction_search MATCH %s'
+        terms = [f'"{token}"*' for token in tokens]
+        if user_id is not None:
+            terms.insert(0, f'owner : "u{int(user_id)}"')
+        expression = ' AND '.join(terms)
+    elif connection.vendor == 'postgresql':
+        sql = "SELECT transaction_id FROM transaction_search WHERE document @@ to_tsquery('simple', %s)"
+        terms = [f'{token}:*' for token in tokens]
+        if user_id is not None:
+            terms.insert(0, f'u{int(user_id)}:A')
+        expression = ' & '.join(terms)
+    else:
+        condition = Q()
+        for token in tokens:
+            condition &= Q(description__icontains=token)
+        return condition
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'{sql} LIMIT %s', [expression, SEARCH_ID_LIMIT + 1])
+        ids = [row[0] for row in cursor.fetchall()]
+    if len(ids) <= SEARCH_ID_LIMIT:
+        return Q(id__in=ids)
+    return Q(id__in=RawSQL(sql, [expression]))
+
+
+def search_transactions(queryset, query, user_id=None):
+    """Filter queryset by a free-text query over description, counterparty and reference.
+
+    Pass user_id when queryset only holds transactions paid from that
+    user's accounts, to scope the index lookup the same way. A query that
+    is a plain number also matches transactions of exactly that amount.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset
+
+    condition = search_condition(tokens, user_id)
+    if AMOUNT_RE.fullmatch(query.strip()):
+        condition |= Q(amount=Decimal(query.strip()))
+    return queryset.filter(condition)
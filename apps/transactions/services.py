@@ -0,0 +1,164 @@
+# apps/transactions/services.py
+import random
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction, OperationalError
+from django.db.models import F
+from django.utils import timezone
+
+from apps.accounts.models import BankAccount
+from .models import Transaction, LedgerEntry
+from .rollups import record_spending
+from .signals import transaction_posted
+
+
+class TransferError(Exception):
+    """Base class for transfers that cannot be posted"""
+
+
+class InsufficientFunds(TransferError):
+    """Source account does not hold enough money for the transfer"""
+
+
+class AccountUnavailable(TransferError):
+    """Source or destination account is missing or not active"""
+
+
+def run_with_retry(func, *args, **kwargs):
+    """Run func in its own atomic block, retrying on lock or serialization conflicts.
+
+    OperationalError covers SQLite's "database is locked" as well as
+    Postgres deadlocks and serialization failures. Backoff is exponential
+    with full jitter and capped, so the worst-case wait stays bounded.
+    """
+    attempts = getattr(settings, 'TRANSFER_MAX_RETRIES', 10)
+    base_delay = getattr(settings, 'TRANSFER_RETRY_BASE_DELAY', 0.005)
+    max_delay = getattr(settings, 'TRANSFER_RETRY_MAX_DELAY', 0.2)
+
+    for attempt in range(attempts + 1):
+        try:
+            with transaction.atomic():
+                return func(*args, **kwargs)
+        except OperationalError:
+            if attempt == attempts:
+                raise
+            time.sleep(random.uniform(0, min(max_delay, base_delay * (2 ** attempt))))
+
+
+def lock_accounts(*account_ids):
+    """Lock the given account rows in ascending id order to avoid deadlocks"""
+    ids = sorted({pk for pk in account_ids if pk is not None})
+    if not connection.features.has_select_for_update:
+        # SQLite has no row locks. Take the database write lock up front with
+        # a no-op write so the busy timeout applies, instead of failing later
+        # when a read lock has to be upgraded.
+        BankAccount.objects.filter(pk__in=ids).update(balance=F('balance'))
+    return {
+        account.pk: account
+        for account in BankAccount.objects.select_for_update().filter(pk__in=ids).order_by('pk')
+    }
+
+
+def _post_transfer(from_account_id, to_account_id, amount, guard=None, **fields):
+    if guard is not None:
+        guard()
+    locked = lock_accounts(from_account_id, to_account_id)
+    if from_account_id not in locked or to_account_id not in locked:
+        raise AccountUnavailable('Account not found.')
+    if locked[from_account_id].status != 'active' or locked[to_account_id].status != 'active':
+        raise AccountUnavailable('Account is not active.')
+
+    now = timezone.now()
+
+    # Conditional single-statement debit: the balance check and the update
+    # happen in the database, so concurrent transfers cannot overdraw.
+    debited = BankAccount.objects.filter(
+        pk=from_account_id, balance__gte=amount
+    ).update(balance=F('balance') - amount, last_transaction_date=now)
+    if not debited:
+        raise InsufficientFunds('Insufficient balance for this transaction.')
+
+    BankAccount.objects.filter(pk=to_account_id).update(
+        balance=F('balance') + amount, last_transaction_date=now
+    )
+
+    fields.setdefault('transaction_type', 'transfer')
+    fields.setdefault('payment_method', 'online')
+    new_transaction = Transaction.objects.create(
+        from_account_id=from_account_id,
+        to_account_id=to_account_id,
+        amount=amount,
+        status='completed',
+        completed_at=now,
+        **fields
+    )
+
+    # Both rows are locked, so the balances read by lock_accounts are current
+    LedgerEntry.objects.bulk_create([
+        LedgerEntry(
+            account_id=from_account_id,
+            transaction=new_transaction,
+            entry_type='debit',
+            amount=amount,
+            balance_after=locked[from_account_id].balance - amount,
+        ),
+        LedgerEntry(
+            account_id=to_account_id,
+            transaction=new_transaction,
+            entry_type='credit',
+            amount=amount,
+            balance_after=locked[to_account_id].balance + amount,
+        ),
+    ])
+    record_spending(from_account_id, new_transaction.transaction_type, amount, when=now)
+    transaction.on_commit(
+        lambda: transaction_posted.send(sender=Transaction, transactions=[new_transaction])
+    )
+    return new_transaction
+
+
+def post_transfer(from_account, to_account, amount, guard=None, **fields):
+    """Move amount between two accounts and record the completed Transaction.
+
+    Accounts may be passed as instances or primary keys. Extra keyword
+    arguments are stored on the Transaction (reference_number, description,
+    initiated_by, transaction_type, payment_method, ...). guard, if given,
+    runs first inside the posting transaction; raising TransferError from
+    it aborts the transfer and rolls back whatever it wrote.
+    """
+    from_account_id = getattr(from_account, 'pk', from_account)
+    to_account_id = getattr(to_account, 'pk', to_account)
+    amount = Decimal(str(amount))
+
+    if amount <= 0:
+        raise TransferError('Amount must be greater than zero.')
+    if from_account_id == to_account_id:
+        raise TransferError('Cannot transfer to the same account.')
+
+    return run_with_retry(_post_transfer, from_account_id, to_account_id, amount, guard, **fields)
+
+
+def balance_as_of(account, when):
+    """Return the balance of account at time when, read from the ledger.
+
+    Every entry carries the balance right after it was applied, so this is a
+    single indexed lookup of the last entry at or before when.
+    """
+    account_id = getattr(account, 'pk', account)
+    entries = LedgerEntry.objects.filter(account_id=account_id)
+
+    latest = entries.filter(created_at__lte=when).order_by('-created_at', '-id').first()
+    if latest is not None:
+        return latest.balance_after
+
+    # Before the first recorded entry: undo that entry
+    first = entries.order_by('created_at', 'id').first()
+    if first is None:
+        return BankAccount.objects.values_list('balance', flat=True).get(pk=account_id)
+    if first.entry_type == 'debit':
+        return first.balance_after + first.amount
+    if first.entry_type == 'credit':
+        return first.balance_after - first.amount
+    return Decimal('0.00')
@@ -0,0 +1,106 @@
+# apps/transactions/settlement.py
+from decimal import Decimal
+
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from apps.accounts.models import BankAccount
+from .models import QRPayment
+from .limits import daily_spend
+from .qr_payload import InvalidQRCode, decode_payload
+from .references import next_reference
+from .services import post_transfer, TransferError, InsufficientFunds
+
+
+class QRCodeUnavailable(TransferError):
+    """The QR code is inactive, expired or has no uses left"""
+
+
+def claim_qr_use(qr_payment_id):
+    """Count one use of a QR code, enforcing activity, expiry and max_uses in a single UPDATE.
+
+    The conditions are evaluated by the database against the row being
+    updated, so concurrent payments can never exceed max_uses. The last
+    allowed use deactivates the code in the same statement.
+    """
+    claimed = QRPayment.objects.filter(
+        Q(valid_until__isnull=True) | Q(valid_until__gt=timezone.now()),
+        Q(max_uses__isnull=True) | Q(used_count__lt=F('max_uses')),
+        pk=qr_payment_id,
+        is_active=True,
+    ).update(
+        used_count=F('used_count') + 1,
+        is_active=Case(
+            When(max_uses__isnull=False, max_uses__lte=F('used_count') + 1, then=Value(False)),
+            default=Value(True),
+        ),
+    )
+    if not claimed:
+        raise QRCodeUnavailable('QR code is no longer active')
+
+
+def settle_qr_payment(user, data):
+    """Pay a scanned QR code from the user's active account.
+
+    Shared by the sync and async endpoints; returns (body, status) for a
+    JSON response.
+    """
+    # Integrity and expiry are checked from the signed payload alone
+    try:
+        qr_data = decode_payload(data.get('qr_data'))
+    except InvalidQRCode as e:
+        return {'error': str(e)}, 400
+
+    # Open-amount codes take the amount from the payer
+    amount = qr_data['amount'] or data.get('amount')
+    if not amount:
+        return {'error': 'Missing required field: amount'}, 400
+
+    # Validate amount is positive
+    try:
+        amount = Decimal(str(amount))
+        if amount <= 0:
+            return {'error': 'Amount must be positive'}, 400
+    except (ArithmeticError, ValueError, TypeError):
+        return {'error': 'Invalid amount format'}, 400
+
+    # Find source account (current user's account)
+    from_account = BankAccount.objects.filter(user=user, status='active').first()
+    if not from_account:
+        return {'error': 'No active account found'}, 400
+
+    # Settle against the code's row: it may have been deactivated since it was printed
+    try:
+        qr_payment = QRPayment.objects.select_related('account').get(
+            qr_code_id=qr_data['qr_code_id'], is_active=True
+        )
+    except QRPayment.DoesNotExist:
+        return {'error': 'QR code is no longer active'}, 400
+    to_account = qr_payment.account
+    purpose = qr_payment.purpose or 'QR Payment'
+
+    # Create transaction and move the money atomically; the amount counts
+    # against today's withdrawal limit only if the payment goes through
+    try:
+        with daily_spend(from_account, amount):
+            new_transaction = post_transfer(
+                from_account,
+                to_account,
+                amount,
+                transaction_type='payment',
+                payment_method='qr',
+                reference_number=next_reference('QR'),
+                description=purpose,
+                initiated_by=user,
+                guard=lambda: claim_qr_use(qr_payment.pk),
+            )
+    except InsufficientFunds:
+        return {'error': 'Insufficient balance'}, 400
+    except TransferError as e:
+        return {'error': str(e)}, 400
+
+    return {
+        'success': True,
+        'transaction_id': str(new_transaction.transaction_id),
+        'message': 'Payment processed successfully'
+    }, 200
@@ -0,0 +1,5 @@
+# apps/transactions/signals.py
+from django.dispatch import Signal
+
+# Sent after commit with transactions=[Transaction, ...] for every set of completed postings
+transaction_posted = Signal()
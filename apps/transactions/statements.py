@@ -0,0 +1,104 @@
+# apps/transactions/statements.py
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, Q, Sum, When, Window
+
+from apps.accounts.models import BankAccount
+from .models import LedgerEntry, Transaction
+
+MONEY = DecimalField(max_digits=15, decimal_places=2)
+CENTS = Decimal('0.01')
+
+
+def signed_amount(account):
+    """Expression for the transaction amount as seen by account: negative when money leaves it"""
+    return Case(
+        When(from_account=account, then=-F('amount')),
+        default=F('amount'),
+        output_field=MONEY,
+    )
+
+
+def statement_queryset(account, start=None, end=None):
+    """Completed debits and credits of account in posting order, with a running total.
+
+    running_total is a window SUM over the selected range, computed by the
+    database; adding opening_balance() for the same start gives the
+    balance after each row.
+    """
+    queryset = Transaction.objects.filter(Q(from_account=account) | Q(to_account=account), status='completed')
+    if start:
+        queryset = queryset.filter(timestamp__gte=start)
+    if end:
+        queryset = queryset.filter(timestamp__lte=end)
+    return (
+        queryset
+        .annotate(signed_amount=signed_amount(account))
+        .annotate(
+            running_total=Window(
+                Sum('signed_amount'),
+                order_by=[F('timestamp').asc(), F('id').asc()],
+                output_field=MONEY,
+            ),
+        )
+        .order_by('timestamp', 'id')
+    )
+
+
+def opening_balance(account, start=None):
+    """Balance of account just before start (or before its first transaction), read from the ledger.
+
+    Ledger entries are append-only and each carries the balance right after
+    it was applied, so the last entry before start is the answer. Postings
+    that commit while a statement streams cannot move it, unlike the
+    account's current balance. Transactions from before the ledger existed
+    have no entries and are undone from the account's first entry instead.
+    """
+    entries = LedgerEntry.objects.filter(account=account)
+    if start:
+        entry = entries.filter(created_at__lt=start).order_by('-created_at', '-id').first()
+        if entry is not None:
+            return entry.balance_after
+
+    first = entries.order_by('created_at', 'id').first()
+    if first is None:
+        balance = BankAccount.objects.values_list('balance', flat=True).get(pk=account.pk)
+    elif first.entry_type == 'debit':
+        balance = first.balance_after + first.amount
+    elif first.entry_type == 'credit':
+        balance = first.balance_after - first.amount
+    else:
+        # The opening entry carries the balance the pre-ledger transactions left
+        balance = first.balance_after
+
+    legacy = Transaction.objects.filter(
+        Q(from_account=account) | Q(to_account=account), status='completed', ledger_entries__isnull=True,
+    )
+    if start:
+        legacy = legacy.filter(timestamp__gte=start)
+    total = legacy.aggregate(total=Sum(signed_amount(account)))['total']
+    if first is None and entries.exists():
+        # A posting committed after the balance was read; anchor on its entry
+        return opening_balance(account, start)
+    return balance - Decimal(total or 0)
+
+
+def statement_rows(account, start=None, end=None, chunk_size=2000):
+    """Yield statement lines one at a time from a server-side cursor"""
+    opening = opening_balance(account, start)
+    rows = statement_queryset(account, start, end).values_list(
+        'timestamp', 'reference_number', 'description', 'transaction_type', 'signed_amount', 'running_total'
+    )
+    for timestamp, reference, description, transaction_type, amount, running_total in rows.iterator(
+        chunk_size=chunk_size
+    ):
+        amount = Decimal(amount).quantize(CENTS)
+        yield {
+            'timestamp': timestamp,
+            'reference_number': reference,
+            'description': description,
+            'transaction_type': transaction_type,
+            'debit': -amount if amount < 0 else None,
+            'credit': amount if amount > 0 else None,
+            'balance': (opening + Decimal(running_total)).quantize(CENTS),
+        }
@@ -0,0 +1,637 @@
+import io
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from django.db.models import Q
+from openpyxl import load_workbook
+
+from apps.accounts.models import BankAccount
+from .models import Transaction, LedgerEntry, QRPayment, DailySpending
+from .references import ReferenceAllocator
+from .pagination import keyset_paginate
+from .search import search_transactions
+from .statements import statement_rows
+from .pdf_statements import render_statement, cache_path
+from .batches import post_batch, BatchError
+from .limits import daily_spend, DailyLimitExceeded
+from .rollups import spending_by_category, daily_spending_series
+from .qr_payload import InvalidQRCode, b45decode, b45encode, decode_payload, encode_payload, sign_qr_payment
+from .services import post_transfer, balance_as_of, InsufficientFunds, AccountUnavailable
+
+User = get_user_model()
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class TransferTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='payer', password='password')
+        self.source = BankAccount.objects.create(
+            account_number='100000000001', user=self.user, account_type='savings', balance=Decimal('100.00')
+        )
+        self.target = BankAccount.objects.create(
+            account_number='100000000002', user=self.user, account_type='current', balance=Decimal('0.00')
+        )
+
+
+class PostTransferTest(TransferTestCase):
+    def test_transfer_moves_money_and_records_transaction(self):
+        txn = post_transfer(self.source, self.target, Decimal('40.00'), reference_number='TXN1')
+        self.source.refresh_from_db()
+        self.target.refresh_from_db()
+        self.assertEqual(self.source.balance, Decimal('60.00'))
+        self.assertEqual(self.target.balance, Decimal('40.00'))
+        self.assertEqual(txn.status, 'completed')
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_insufficient_funds_leaves_balances_untouched(self):
+        with self.assertRaises(InsufficientFunds):
+            post_transfer(self.source, self.target, Decimal('100.01'), reference_number='TXN1')
+        self.source.refresh_from_db()
+        self.assertEqual(self.source.balance, Decimal('100.00'))
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_inactive_destination_is_rejected(self):
+        self.target.status = 'frozen'
+        self.target.save()
+        with self.assertRaises(AccountUnavailable):
+            post_transfer(self.source, self.target, Decimal('10.00'), reference_number='TXN1')
+
+
+class LedgerTest(TransferTestCase):
+    def test_transfer_writes_balanced_entries(self):
+        txn = post_transfer(self.source, self.target, Decimal('25.00'), reference_number='TXN1')
+        debit = LedgerEntry.objects.get(transaction=txn, entry_type='debit')
+        credit = LedgerEntry.objects.get(transaction=txn, entry_type='credit')
+        self.assertEqual(debit.amount, credit.amount)
+        self.assertEqual(debit.balance_after, Decimal('75.00'))
+        self.assertEqual(credit.balance_after, Decimal('25.00'))
+
+    def test_entries_are_append_only(self):
+        post_transfer(self.source, self.target, Decimal('25.00'), reference_number='TXN1')
+        entry = LedgerEntry.objects.first()
+        entry.amount = Decimal('1.00')
+        with self.assertRaises(ValueError):
+            entry.save()
+        with self.assertRaises(ValueError):
+            entry.delete()
+
+    def test_balance_as_of(self):
+        before = timezone.now() - timedelta(seconds=1)
+        post_transfer(self.source, self.target, Decimal('10.00'), reference_number='TXN1')
+        post_transfer(self.source, self.target, Decimal('20.00'), reference_number='TXN2')
+        self.assertEqual(balance_as_of(self.source, before), Decimal('100.00'))
+        self.assertEqual(balance_as_of(self.source, timezone.now()), Decimal('70.00'))
+        self.assertEqual(balance_as_of(self.target, timezone.now()), Decimal('30.00'))
+
+
+class ReferenceAllocatorTest(TestCase):
+    def test_allocators_sharing_a_sequence_never_overlap(self):
+        first = ReferenceAllocator(name='test', block_size=5)
+        second = ReferenceAllocator(name='test', block_size=5)
+        values = [first.allocate() for _ in range(7)] + [second.allocate() for _ in range(7)]
+        self.assertEqual(len(set(values)), len(values))
+        self.assertEqual(values[:7], sorted(values[:7]))
+
+    def test_reference_format(self):
+        reference = ReferenceAllocator(name='test').next_reference('TXN')
+        self.assertRegex(reference, r'^TXN\d{8}\d{10}$')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TransactionListTest(TransferTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(25):
+            post_transfer(self.source, self.target, Decimal('1.00'), reference_number=f'TXN{i}')
+        self.client.login(username='payer', password='password')
+
+    def test_keyset_pages_walk_forward_and_back(self):
+        queryset = Transaction.objects.filter(from_account=self.source)
+        first = keyset_paginate(queryset, None, per_page=10)
+        second = keyset_paginate(queryset, first.next_cursor, per_page=10)
+        third = keyset_paginate(queryset, second.next_cursor, per_page=10)
+        self.assertEqual(len(third), 5)
+        self.assertFalse(third.has_next)
+        seen = [t.pk for page in (first, second, third) for t in page]
+        self.assertEqual(len(set(seen)), 25)
+        back = keyset_paginate(queryset, second.prev_cursor, per_page=10)
+        self.assertEqual([t.pk for t in back], [t.pk for t in first])
+        self.assertFalse(back.has_previous)
+
+    def test_list_view_uses_cursors(self):
+        response = self.client.get(reverse('transactions:transaction_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_transactions'], 25)
+        page = response.context['transactions']
+        self.assertEqual(len(page), 20)
+        response = self.client.get(reverse('transactions:transaction_list'), {'cursor': page.next_cursor})
+        self.assertEqual(len(response.context['transactions']), 5)
+
+    def test_csv_and_xlsx_export_use_list_filters(self):
+        response = self.client.get(reverse('transactions:transaction_export', args=['csv']),
+                                   {'q': 'TXN1'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:2], ['Date', 'Reference'])
+        self.assertEqual(len(lines), 1 + Transaction.objects.filter(reference_number__startswith='TXN1').count())
+
+        response = self.client.get(reverse('transactions:transaction_export', args=['xlsx']))
+        workbook = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)
+        self.assertEqual(len(list(workbook['Transactions'].iter_rows())), 26)
+
+
+class TransactionSearchTest(TransferTestCase):
+    def setUp(self):
+        super().setUp()
+        payee = User.objects.create_user(username='payee', first_name='Grace', last_name='Hopper')
+        self.payee_account = BankAccount.objects.create(
+            account_number='200000000001', user=payee, account_type='savings'
+        )
+        post_transfer(self.source, self.payee_account, Decimal('12.50'),
+                      reference_number='TXN202601010000000001', description='Electricity bill')
+        post_transfer(self.source, self.target, Decimal('30.00'),
+                      reference_number='TXN202601010000000002', description='Groceries')
+
+    def search(self, query):
+        queryset = Transaction.objects.filter(from_account__user=self.user)
+        return set(search_transactions(queryset, query, self.user.pk).values_list('description', flat=True))
+
+    def test_token_and_prefix_queries(self):
+        self.assertEqual(self.search('electricity'), {'Electricity bill'})
+        self.assertEqual(self.search('elec bi'), {'Electricity bill'})
+        self.assertEqual(self.search('groc'), {'Groceries'})
+        self.assertEqual(self.search('water'), set())
+
+    def test_counterparty_reference_and_amount(self):
+        self.assertEqual(self.search('hopper'), {'Electricity bill'})
+        self.assertEqual(self.search('TXN202601010000000002'), {'Groceries'})
+        self.assertEqual(self.search('30.00'), {'Groceries'})
+
+    def test_index_lookup_is_scoped_to_the_user(self):
+        from .search import search_condition
+        other = User.objects.create_user(username='other')
+        other_account = BankAccount.objects.create(account_number='300000000001', user=other,
+                                                   account_type='savings', balance=Decimal('50.00'))
+        theirs = post_transfer(other_account, self.payee_account, Decimal('5.00'),
+                               reference_number='TXN202601010000000003', description='Electricity bill')
+        mine = Transaction.objects.get(reference_number='TXN202601010000000001')
+
+        self.assertEqual(search_condition(['electricity'], self.user.pk), Q(id__in=[mine.pk]))
+        self.assertEqual(search_condition(['electricity'], other.pk), Q(id__in=[theirs.pk]))
+        self.assertEqual(search_condition(['electricity']), Q(id__in=[mine.pk, theirs.pk]))
+
+    def test_index_follows_updates(self):
+        Transaction.objects.filter(description='Groceries').update(description='Restaurant')
+        self.assertEqual(self.search('restaurant'), {'Restaurant'})
+        self.assertEqual(self.search('groceries'), set())
+
+
+class AccountStatementTest(TransferTestCase):
+    def setUp(self):
+        super().setUp()
+        post_transfer(self.source, self.target, Decimal('30.00'), reference_number='TXN1')
+        post_transfer(self.target, self.source, Decimal('10.00'), reference_number='TXN2')
+        post_transfer(self.source, self.target, Decimal('5.00'), reference_number='TXN3')
+        self.source.refresh_from_db()
+
+    def test_running_balance(self):
+        rows = list(statement_rows(self.source))
+        self.assertEqual([row['balance'] for row in rows], [Decimal('70.00'), Decimal('80.00'), Decimal('75.00')])
+        self.assertEqual(rows[0]['debit'], Decimal('30.00'))
+        self.assertEqual(rows[1]['credit'], Decimal('10.00'))
+
+    def test_date_range_keeps_running_balance(self):
+        second = Transaction.objects.get(reference_number='TXN2')
+        rows = list(statement_rows(self.source, start=second.timestamp))
+        self.assertEqual([row['balance'] for row in rows], [Decimal('80.00'), Decimal('75.00')])
+
+    def test_posting_after_the_account_was_read_keeps_balances_right(self):
+        stale = BankAccount.objects.get(pk=self.source.pk)
+        post_transfer(self.source, self.target, Decimal('20.00'), reference_number='TXN4')
+        rows = list(statement_rows(stale))
+        self.assertEqual([row['balance'] for row in rows],
+                         [Decimal('70.00'), Decimal('80.00'), Decimal('75.00'), Decimal('55.00')])
+
+    def test_malformed_dates_are_rejected_before_streaming(self):
+        self.client.login(username='payer', password='password')
+        url = reverse('transactions:account_statement', args=[self.source.account_number])
+        for params in ({'start_date': 'yesterday'}, {'end_date': '2026-13-01'}):
+            self.assertEqual(self.client.get(url, params).status_code, 400)
+        self.assertEqual(self.client.get(reverse('transactions:transaction_list'), {'start_date': 'x'}).status_code, 400)
+
+        response = self.client.get(url, {'start_date': '2000-01-01'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+
+    def test_csv_cells_cannot_start_formulas(self):
+        Transaction.objects.filter(reference_number='TXN2').update(description='=HYPERLINK("http://x")')
+        self.client.login(username='payer', password='password')
+        response = self.client.get(reverse('transactions:account_statement', args=[self.source.account_number]))
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('\'=HYPERLINK', content)
+        self.assertNotIn(',"=HYPERLINK', content)
+
+    def test_streaming_csv_endpoint(self):
+        self.client.login(username='payer', password='password')
+        response = self.client.get(reverse('transactions:account_statement', args=[self.source.account_number]))
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[-1].endswith(',75.00'))
+
+
+class PdfStatementTest(TransferTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        override = override_settings(STATEMENT_CACHE_DIR=self.cache_dir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        post_transfer(self.source, self.target, Decimal('30.00'), reference_number='TXN1')
+        self.now = timezone.now()
+
+    def test_render_is_cached_until_the_ledger_moves(self):
+        path = render_statement(self.source.pk, self.now.year, self.now.month)
+        self.assertTrue(path.read_bytes().startswith(b'%PDF'))
+        self.assertEqual(render_statement(self.source.pk, self.now.year, self.now.month), path)
+
+        post_transfer(self.source, self.target, Decimal('5.00'), reference_number='TXN2')
+        self.assertNotEqual(cache_path(self.source, self.now.year, self.now.month), path)
+
+        # The new render replaces the superseded file on disk
+        new_path = render_statement(self.source.pk, self.now.year, self.now.month)
+        self.assertTrue(new_path.exists())
+        self.assertFalse(path.exists())
+
+    def test_out_of_range_year_is_not_found(self):
+        self.client.login(username='payer', password='password')
+        for year in (0, 1899, self.now.year + 1, 10000):
+            response = self.client.get(
+                reverse('transactions:statement_pdf', args=[self.source.account_number, year, 1])
+            )
+            self.assertEqual(response.status_code, 404)
+
+
+class BatchPaymentTest(TransferTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source.account_type = 'salary'
+        self.source.save()
+        self.third = BankAccount.objects.create(
+            account_number='100000000003', user=self.user, account_type='savings', balance=Decimal('0.00')
+        )
+
+    def test_valid_lines_are_paid_and_failures_reported_per_line(self):
+        result = post_batch(self.source, [
+            {'account_number': '100000000002', 'amount': '10.00'},
+            {'account_number': '100000000003', 'amount': '15.50'},
+            {'account_number': '100000000002', 'amount': '4.50'},
+            {'account_number': '999999999999', 'amount': '1.00'},
+            {'account_number': '100000000003', 'amount': '-3'},
+        ])
+        self.assertEqual(result['paid'], 3)
+        self.assertEqual(result['total'], Decimal('30.00'))
+        self.assertEqual([f['line'] for f in result['failures']], [4, 5])
+
+        for account, balance in ((self.source, '70.00'), (self.target, '14.50'), (self.third, '15.50')):
+            account.refresh_from_db()
+            self.assertEqual(account.balance, Decimal(balance))
+            self.assertEqual(account.ledger_entries.order_by('-id').first().balance_after, account.balance)
+
+    def test_insufficient_funds_rolls_back_the_whole_batch(self):
+        with self.assertRaises(InsufficientFunds):
+            post_batch(self.source, [
+                {'account_number': '100000000002', 'amount': '60.00'},
+                {'account_number': '100000000003', 'amount': '60.00'},
+            ])
+        self.source.refresh_from_db()
+        self.assertEqual(self.source.balance, Decimal('100.00'))
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_only_business_and_salary_accounts_can_pay_batches(self):
+        with self.assertRaises(BatchError):
+            post_batch(self.target, [{'account_number': '100000000003', 'amount': '1.00'}])
+
+    def test_csv_upload(self):
+        self.client.login(username='payer', password='password')
+        body = 'account_number,amount,description\n100000000002,12.00,June salary\n100000000003,8.00,\n'
+        response = self.client.post(
+            reverse('transactions:batch_payment') + '?source_account=100000000001',
+            body, content_type='text/csv',
+        )
+        self.assertEqual(response.json()['paid'], 2)
+        self.assertEqual(Transaction.objects.get(to_account=self.target).description, 'June salary')
+
+    def test_csv_upload_that_is_not_utf8_is_rejected(self):
+        self.client.login(username='payer', password='password')
+        body = 'account_number,amount,description\n100000000002,12.00,Café\n'.encode('latin-1')
+        response = self.client.post(
+            reverse('transactions:batch_payment') + '?source_account=100000000001',
+            body, content_type='text/csv',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'CSV must be UTF-8 encoded')
+        self.assertFalse(Transaction.objects.exists())
+
+
+class QRGenerateTest(TransferTestCase):
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media_root.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media_root.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client.login(username='payer', password='password')
+
+    def generate(self, **extra):
+        data = {'account_number': '100000000001', 'amount': '25.00', 'purpose': 'Coffee', **extra}
+        return self.client.post(reverse('transactions:qr_generate'), data)
+
+    def test_regenerating_a_static_code_reuses_it(self):
+        self.generate()
+        self.generate()
+        qr_payment = QRPayment.objects.get()
+        self.assertTrue(qr_payment.qr_code_image.read().startswith(b'\x89PNG'))
+
+        self.generate(valid_minutes='10')
+        self.assertEqual(QRPayment.objects.count(), 2)
+
+    def test_svg_output(self):
+        self.generate(format='svg')
+        image = QRPayment.objects.get().qr_code_image
+        self.assertTrue(image.name.endswith('.svg'))
+        self.assertTrue(image.read().startswith(b'<svg'))
+
+
+class QRPaymentTestCase(TransferTestCase):
+    def setUp(self):
+        super().setUp()
+        self.qr_payment = QRPayment.objects.create(
+            account=self.target, amount=Decimal('12.50'), purpose='Lunch', qr_code_image='qr_codes/test.png'
+        )
+
+    def pay(self, **headers):
+        return self.client.post(
+            reverse('transactions:process_qr_payment'),
+            {'qr_data': sign_qr_payment(self.qr_payment)},
+            content_type='application/json',
+            HTTP_AUTHORIZATION='Bearer token',
+            **headers,
+        )
+
+
+class QRPayloadTest(QRPaymentTestCase):
+
+    def test_round_trip(self):
+        payload = sign_qr_payment(self.qr_payment)
+        self.assertTrue(payload.startswith('BQ:'))
+        decoded = decode_payload(payload)
+        self.assertEqual(decoded['qr_code_id'], self.qr_payment.qr_code_id)
+        self.assertEqual(decoded['account_number'], '100000000002')
+        self.assertEqual(decoded['amount'], Decimal('12.50'))
+        self.assertIsNone(decoded['valid_until'])
+
+    def test_tampered_and_expired_payloads_are_rejected(self):
+        body = b45decode(sign_qr_payment(self.qr_payment)[3:])
+        forged = 'BQ:' + b45encode(body[:20] + bytes([body[20] ^ 1]) + body[21:])
+        with self.assertRaises(InvalidQRCode):
+            decode_payload(forged)
+
+        expired = encode_payload(self.qr_payment.qr_code_id, '100000000002', valid_until=timezone.now())
+        with self.assertRaises(InvalidQRCode):
+            decode_payload(expired)
+
+    def test_payment_settles_against_the_code(self):
+        self.client.login(username='payer', password='password')
+        self.assertTrue(self.pay().json()['success'])
+        self.target.refresh_from_db()
+        self.assertEqual(self.target.balance, Decimal('12.50'))
+        self.assertEqual(Transaction.objects.get().description, 'Lunch')
+
+
+class QRUsageTest(QRPaymentTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.login(username='payer', password='password')
+
+    def test_max_uses_is_enforced_and_deactivates_the_code(self):
+        self.qr_payment.max_uses = 2
+        self.qr_payment.save()
+        self.assertEqual(self.pay().status_code, 200)
+        self.assertEqual(self.pay().status_code, 200)
+        self.assertEqual(self.pay().status_code, 400)
+
+        self.qr_payment.refresh_from_db()
+        self.assertEqual(self.qr_payment.used_count, 2)
+        self.assertFalse(self.qr_payment.is_active)
+        self.assertEqual(Transaction.objects.count(), 2)
+
+    def test_failed_payment_does_not_use_up_the_code(self):
+        self.source.balance = Decimal('1.00')
+        self.source.save()
+        self.assertEqual(self.pay().json()['error'], 'Insufficient balance')
+        self.qr_payment.refresh_from_db()
+        self.assertEqual(self.qr_payment.used_count, 0)
+
+    def test_sweeper_deactivates_expired_codes(self):
+        QRPayment.objects.filter(pk=self.qr_payment.pk).update(valid_until=timezone.now() - timedelta(minutes=1))
+        call_command('expire_qr_codes', batch_size=1, stdout=io.StringIO())
+        self.qr_payment.refresh_from_db()
+        self.assertFalse(self.qr_payment.is_active)
+
+class AsyncQRPaymentTest(QRPaymentTestCase):
+    async def test_async_payment_and_status(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.post(
+            reverse('transactions:process_qr_payment_async'),
+            {'qr_data': await sync_to_async(sign_qr_payment)(self.qr_payment)},
+            content_type='application/json',
+            AUTHORIZATION='Bearer token',
+        )
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(await Transaction.objects.acount(), 1)
+
+        response = await self.async_client.get(reverse('transactions:qr_status', args=[self.qr_payment.qr_code_id]))
+        self.assertTrue(response.json()['is_active'])
+
+    async def test_anonymous_requests_are_rejected(self):
+        response = await self.async_client.get(reverse('transactions:qr_status', args=[self.qr_payment.qr_code_id]))
+        self.assertEqual(response.status_code, 401)
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class IdempotencyTest(QRPaymentTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client.login(username='payer', password='password')
+
+    def test_retry_replays_the_first_outcome(self):
+        first = self.pay(HTTP_IDEMPOTENCY_KEY='retry-1')
+        second = self.pay(HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Transaction.objects.count(), 1)
+
+        # The database copy is used when the cache has lost the outcome
+        cache.clear()
+        self.assertEqual(self.pay(HTTP_IDEMPOTENCY_KEY='retry-1').json(), first.json())
+        self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_key_cannot_be_reused_for_a_different_request(self):
+        self.pay(HTTP_IDEMPOTENCY_KEY='retry-1')
+        response = self.client.post(
+            reverse('transactions:process_qr_payment'), {'qr_data': 'BQ:other'},
+            content_type='application/json', HTTP_AUTHORIZATION='Bearer token', HTTP_IDEMPOTENCY_KEY='retry-1',
+        )
+        self.assertEqual(response.status_code, 422)
+
+    def test_duplicate_of_a_running_request_gets_409_without_waiting(self):
+        from .models import IdempotencyKey
+        IdempotencyKey.objects.create(
+            user=self.user, key='retry-1', request_hash='running', expires_at=timezone.now() + timedelta(seconds=30)
+        )
+        started = time.monotonic()
+        response = self.pay(HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_key_left_processing_by_a_dead_worker_is_taken_over(self):
+        from .models import IdempotencyKey
+        IdempotencyKey.objects.create(
+            user=self.user, key='retry-1', request_hash='stale', expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        response = self.pay(HTTP_IDEMPOTENCY_KEY='retry-1')
+        self.assertEqual(response.status_code, 200)
+        record = IdempotencyKey.objects.get(user=self.user, key='retry-1')
+        self.assertEqual(record.status, 'completed')
+        self.assertGreater(record.expires_at, timezone.now() + timedelta(hours=23))
+        self.assertEqual(Transaction.objects.count(), 1)
+
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class DailyLimitTest(TransferTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.source.daily_withdrawal_limit = Decimal('50.00')
+        self.source.save()
+
+    def transfer(self, amount):
+        with daily_spend(self.source, amount):
+            post_transfer(self.source, self.target, amount, reference_number=f'TXN{amount}')
+
+    def test_limit_covers_the_whole_day(self):
+        self.transfer(Decimal('30.00'))
+        with self.assertRaises(DailyLimitExceeded):
+            self.transfer(Decimal('30.00'))
+
+        # A lost counter is rebuilt from today's postings
+        cache.clear()
+        with self.assertRaises(DailyLimitExceeded):
+            self.transfer(Decimal('25.00'))
+        self.transfer(Decimal('20.00'))
+
+    def test_failed_payment_releases_its_reservation(self):
+        BankAccount.objects.filter(pk=self.source.pk).update(balance=Decimal('10.00'))
+        with self.assertRaises(InsufficientFunds):
+            self.transfer(Decimal('40.00'))
+
+        BankAccount.objects.filter(pk=self.source.pk).update(balance=Decimal('100.00'))
+        self.transfer(Decimal('50.00'))
+
+
+class DailySpendingTest(TransferTestCase):
+    def test_postings_maintain_the_rollup(self):
+        post_transfer(self.source, self.target, Decimal('10.00'), reference_number='TXN1')
+        post_transfer(self.source, self.target, Decimal('5.00'), reference_number='TXN2', transaction_type='payment')
+        post_transfer(self.target, self.source, Decimal('1.00'), reference_number='TXN3')
+
+        today = timezone.localdate()
+        row = DailySpending.objects.get(account=self.source, day=today, category='transfer')
+        self.assertEqual((row.total, row.count), (Decimal('10.00'), 1))
+        self.assertEqual(spending_by_category(self.user.pk, start=today, end=today),
+                         {'transfer': Decimal('11.00'), 'payment': Decimal('5.00')})
+        self.assertEqual(spending_by_category(self.user.pk, start=today + timedelta(days=1)), {})
+        self.assertEqual(daily_spending_series(self.user.pk, today, today),
+                         [(today, {'transfer': Decimal('11.00'), 'payment': Decimal('5.00')})])
+
+    def test_failed_posting_leaves_the_rollup_alone(self):
+        with self.assertRaises(InsufficientFunds):
+            post_transfer(self.source, self.target, Decimal('500.00'), reference_number='TXN1')
+        self.assertFalse(DailySpending.objects.exists())
+
+    def test_backfill_matches_incremental_rollup(self):
+        post_transfer(self.source, self.target, Decimal('10.00'), reference_number='TXN1')
+        post_transfer(self.source, self.target, Decimal('2.50'), reference_number='TXN2')
+        Transaction.objects.create(from_account=self.source, to_account=self.target, transaction_type='withdrawal',
+                                   amount=Decimal('4.00'), status='completed', reference_number='TXN3')
+        Transaction.objects.create(from_account=self.source, to_account=self.target, transaction_type='withdrawal',
+                                   amount=Decimal('9.00'), status='pending', reference_number='TXN4')
+
+        call_command('backfill_daily_spending', stdout=io.StringIO())
+        self.assertEqual(
+            set(DailySpending.objects.values_list('category', 'total', 'count')),
+            {('transfer', Decimal('12.50'), 2), ('withdrawal', Decimal('4.00'), 1)},
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHE, REWARDS_POINTS_PER_DOLLAR=1)
+class RewardsAccrualTest(TransferTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.payee = User.objects.create_user(username='payee', password='password')
+        self.payee_account = BankAccount.objects.create(account_number='100000000003', user=self.payee,
+                                                        account_type='current')
+
+    def test_points_are_accrued_once_per_completed_transaction(self):
+        from apps.accounts.models import Rewards
+        from apps.accounts.rewards import accrue_rewards
+        post_transfer(self.source, self.payee_account, Decimal('10.99'), reference_number='TXN1')
+        post_transfer(self.source, self.payee_account, Decimal('5.50'), reference_number='TXN2',
+                      transaction_type='payment')
+        pending = Transaction.objects.create(from_account=self.source, to_account=self.payee_account,
+                                             transaction_type='payment', amount=Decimal('40.00'),
+                                             reference_number='TXN3')
+
+        self.assertEqual(accrue_rewards(batch_size=1), 2)
+        self.assertEqual(accrue_rewards(), 0)
+        rewards = Rewards.objects.get(user=self.user)
+        self.assertEqual((rewards.points, rewards.points_earned), (15, 15))
+        self.assertFalse(Rewards.objects.filter(user=self.payee).exists())
+
+        # A transaction completed later is picked up by the next run
+        Transaction.objects.filter(pk=pending.pk).update(status='completed')
+        self.assertEqual(accrue_rewards(), 1)
+        self.assertEqual(Rewards.objects.get(user=self.user).points, 55)
+
+    def test_nightly_tier_recalculation(self):
+        from apps.accounts.models import Rewards
+        from apps.accounts.rewards import recalculate_tiers
+        Rewards.objects.create(user=self.user, points_earned=25000)
+        Rewards.objects.create(user=self.payee, points_earned=100, tier='silver')
+
+        self.assertEqual(recalculate_tiers(chunk_size=1), 2)
+        self.assertEqual(dict(Rewards.objects.values_list('user__username', 'tier')),
+                         {'payer': 'gold', 'payee': 'bronze'})
+        self.assertEqual(recalculate_tiers(), 0)
+
+    def test_dashboard_read_does_not_create_rewards(self):
+        from apps.accounts.models import Rewards
+        self.client.login(username='payer', password='password')
+        self.client.get(reverse('core:dashboard'))
+        self.assertFalse(Rewards.objects.exists())
@@ -5,10 +5,17 @@ app_name = 'transactions'
 
 urlpatterns = [
     path('', views.transaction_list, name='transaction_list'),
+    path('export/<str:export_format>/', views.transaction_export, name='transaction_export'),
     path('<uuid:transaction_id>/', views.transaction_detail, name='transaction_detail'),
+    path('statement/<str:account_number>/', views.account_statement, name='account_statement'),
+    path('statement/<str:account_number>/<int:year>/<int:month>/pdf/', views.statement_pdf, name='statement_pdf'),
     path('transfer/', views.money_transfer, name='money_transfer'),
+    path('transfer/batch/', views.batch_payment, name='batch_payment'),
     path('qr/generate/', views.qr_generate, name='qr_generate'),
     path('qr/<uuid:qr_id>/', views.qr_payment, name='qr_payment'),
+    path('qr/<uuid:qr_id>/status/', views.qr_status, name='qr_status'),
     path('qr/scan/', views.qr_scan, name='qr_scan'),
+    path('qr/verify/', views.qr_verify, name='qr_verify'),
     path('qr/process/', views.process_qr_payment, name='process_qr_payment'),
+    path('qr/process/async/', views.process_qr_payment_async, name='process_qr_payment_async'),
 ]
@@ -4,58 +4,138 @@ from django.views.generic import ListView, DetailView, TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse, FileResponse, Http404
 from django.db import transaction
 from django.utils import timezone
-from django.core.paginator import Paginator
+from django.utils.dateparse import parse_date, parse_datetime
+from asgiref.sync import sync_to_async
 from .models import Transaction, QRPayment
 from apps.accounts.models import BankAccount
+from apps.core.decorators import async_login_required
 from apps.core.forms import MoneyTransferForm
-import qrcode
-import io
-from django.core.files.base import ContentFile
+from .services import post_transfer, TransferError
+from .references import next_reference
+from .limits import daily_spend
+from .pagination import keyset_paginate, cached_count
+from .search import search_transactions
+from .statements import statement_rows
+from .exports import Echo, csv_lines, spreadsheet_text, write_xlsx
+from .pdf_statements import cached_statement
+from .batches import parse_batch, post_batch
+from .qr import QR_FORMATS, stored_qr_image
+from .idempotency import idempotent
+from .qr_payload import InvalidQRCode, decode_payload, sign_qr_payment
+from .settlement import settle_qr_payment
+import csv
+import json
+import tempfile
 import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
 
-@login_required
-def transaction_list(request):
-    """List all transactions for the user with search and filtering"""
+def parse_date_param(value):
+    """Parse a start_date/end_date query value, a date or an ISO datetime, into an aware datetime.
+
+    Returns None for a missing value and raises ValueError for a malformed
+    one, so views can answer 400 before they start responding.
+    """
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Invalid date: {value}')
+        parsed = datetime.combine(day, datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+def filter_transactions(request):
+    """Apply the transaction_list search and filter parameters to the user's transactions.
+
+    Returns the filtered queryset and the tuple of filter values, which is
+    also used as the cache key for counts. Raises ValueError for a
+    malformed date.
+    """
     transactions = Transaction.objects.filter(
         from_account__user=request.user
     ).order_by('-timestamp')
-    
+
     # Search and filtering
     query = request.GET.get('q')
     transaction_type = request.GET.get('transaction_type')
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
+    start, end = parse_date_param(start_date), parse_date_param(end_date)
 
     if query:
-        transactions = transactions.filter(
-            models.Q(description__icontains=query) |
-            models.Q(amount__icontains=query)
-        )
+        transactions = search_transactions(transactions, query, request.user.pk)
 
     if transaction_type:
         transactions = transactions.filter(transaction_type=transaction_type)
 
-    if start_date:
-        transactions = transactions.filter(timestamp__gte=start_date)
+    if start:
+        transactions = transactions.filter(timestamp__gte=start)
 
-    if end_date:
-        transactions = transactions.filter(timestamp__lte=end_date)
+    if end:
+        transactions = transactions.filter(timestamp__lte=end)
+
+    return transactions, (request.user.pk, query, transaction_type, start_date, end_date)
+
+@login_required
+def transaction_list(request):
+    """List all transactions for the user with search and filtering"""
+    try:
+        transactions, filter_key = filter_transactions(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    # Keyset pagination on (timestamp, id) so deep pages stay as cheap as the first
+    page_obj = keyset_paginate(transactions, request.GET.get('cursor'), per_page=20)
+
+    # Cursor links keep the active filters
+    query_params = request.GET.copy()
+    query_params.pop('cursor', None)
 
-    # Pagination
-    paginator = Paginator(transactions, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
     context = {
         'transactions': page_obj,
-        'total_transactions': transactions.count(),
+        'total_transactions': cached_count(transactions, filter_key),
         'transaction_types': Transaction.TRANSACTION_TYPES,
+        'filter_query': query_params.urlencode(),
     }
     return render(request, 'transactions/transaction_list.html', context)
 
+@login_required
+def transaction_export(request, export_format):
+    """Export the filtered transaction list as CSV or XLSX without loading it into memory"""
+    if export_format not in ('csv', 'xlsx'):
+        raise Http404('Unsupported export format')
+
+    try:
+        transactions, _ = filter_transactions(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    transactions = transactions.order_by('-timestamp', '-id')
+    filename = f"transactions_{timezone.now().strftime('%Y%m%d')}.{export_format}"
+
+    if export_format == 'xlsx':
+        # Rows are spooled to disk by openpyxl; the finished file is streamed
+        # back in chunks and deleted when the response is closed
+        output = tempfile.TemporaryFile()
+        write_xlsx(transactions, output)
+        output.seek(0)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=filename,
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+
+    response = StreamingHttpResponse(csv_lines(transactions), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 @login_required
 def transaction_detail(request, transaction_id):
     """Detail view for a specific transaction"""
@@ -66,55 +146,101 @@ def transaction_detail(request, transaction_id):
     }
     return render(request, 'transactions/transaction_detail.html', context)
 
+@login_required
+def account_statement(request, account_number):
+    """Stream every completed debit and credit of an account with its running balance"""
+    account = get_object_or_404(BankAccount, account_number=account_number, user=request.user)
+    # Validate before streaming: once the header is out, an error can only truncate the download
+    try:
+        start_date = parse_date_param(request.GET.get('start_date'))
+        end_date = parse_date_param(request.GET.get('end_date'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield writer.writerow(['Date', 'Reference', 'Description', 'Type', 'Debit', 'Credit', 'Balance'])
+        for row in statement_rows(account, start_date, end_date):
+            yield writer.writerow([
+                row['timestamp'].isoformat(),
+                row['reference_number'],
+                spreadsheet_text(row['description']),
+                row['transaction_type'],
+                row['debit'] or '',
+                row['credit'] or '',
+                row['balance'],
+            ])
+
+    response = StreamingHttpResponse(lines(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="statement_{account.account_number}.csv"'
+    return response
+
+@login_required
+def statement_pdf(request, account_number, year, month):
+    """Serve a monthly PDF statement from the cache, rendering it in the background on a miss"""
+    account = get_object_or_404(BankAccount, account_number=account_number, user=request.user)
+    if not 1 <= month <= 12:
+        raise Http404('Invalid month')
+    if not 1900 <= year <= timezone.now().year:
+        raise Http404('Invalid year')
+
+    path = cached_statement(account, year, month)
+    try:
+        pdf = open(path, 'rb') if path is not None else None
+    except FileNotFoundError:
+        # Superseded by a newer render between the lookup and the open
+        pdf = None
+    if pdf is None:
+        response = JsonResponse({'status': 'rendering', 'message': 'Statement is being prepared.'}, status=202)
+        response['Retry-After'] = '5'
+        return response
+
+    return FileResponse(
+        pdf,
+        as_attachment=True,
+        filename=f"statement_{account.account_number}_{year:04d}-{month:02d}.pdf",
+        content_type='application/pdf',
+    )
+
 @login_required
 def money_transfer(request):
     """Money transfer form and processing"""
     if request.method == 'POST':
         form = MoneyTransferForm(request.user, request.POST)
         if form.is_valid():
+            from_account = form.cleaned_data['from_account']
+            to_account_number = form.cleaned_data['to_account_number']
+            amount = form.cleaned_data['amount']
+            description = form.cleaned_data.get('description', '')
+
             try:
-                with transaction.atomic():
-                    from_account = form.cleaned_data['from_account']
-                    to_account_number = form.cleaned_data['to_account_number']
-                    amount = form.cleaned_data['amount']
-                    transfer_type = form.cleaned_data['transfer_type']
-                    description = form.cleaned_data.get('description', '')
-                    
-                    # Check if account has sufficient balance
-                    if from_account.balance < amount:
-                        messages.error(request, 'Insufficient balance for this transaction.')
-                        return render(request, 'transactions/money_transfer.html', {'form': form})
-                    
-                    # Find destination account
-                    try:
-                        to_account = BankAccount.objects.get(account_number=to_account_number)
-                    except BankAccount.DoesNotExist:
-                        messages.error(request, 'Destination account not found.')
-                        return render(request, 'transactions/money_transfer.html', {'form': form})
-                    
-                    # Create transaction record
-                    new_transaction = Transaction.objects.create(
-                        from_account=from_account,
-                        to_account=to_account,
+                # Find destination account
+                try:
+                    to_account = BankAccount.objects.get(account_number=to_account_number)
+                except BankAccount.DoesNotExist:
+                    messages.error(request, 'Destination account not found.')
+                    return render(request, 'transactions/money_transfer.html', {'form': form})
+
+                # Balance check, row locking and both balance updates happen
+                # inside the posting service
+                with daily_spend(from_account, amount):
+                    new_transaction = post_transfer(
+                        from_account,
+                        to_account,
+                        amount,
                         transaction_type='transfer',
-                        amount=amount,
-                        status='completed',
                         payment_method='online',
-                        reference_number=f"TXN{timezone.now().strftime('%Y%m%d%H%M%S')}",
+                        reference_number=next_reference('TXN'),
                         description=description,
                         initiated_by=request.user,
-                        completed_at=timezone.now()
                     )
-                    
-                    # Update account balances
-                    from_account.balance -= amount
-                    to_account.balance += amount
-                    from_account.save()
-                    to_account.save()
-                    
-                    messages.success(request, f'Transfer of ${amount} completed successfully!')
-                    return redirect('transaction_detail', transaction_id=new_transaction.transaction_id)
-                    
+
+                messages.success(request, f'Transfer of ${amount} completed successfully!')
+                return redirect('transactions:transaction_detail', transaction_id=new_transaction.transaction_id)
+
+            except TransferError as e:
+                messages.error(request, str(e))
             except Exception as e:
                 messages.error(request, f'Transaction failed: {str(e)}')
     else:
@@ -122,6 +248,42 @@ def money_transfer(request):
     
     return render(request, 'transactions/money_transfer.html', {'form': form})
 
+@login_required
+def batch_payment(request):
+    """Pay many accounts at once from a business or salary account (CSV or JSON upload)"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Invalid request method'}, status=405)
+
+    account_number = request.POST.get('source_account') or request.GET.get('source_account')
+    if request.FILES.get('file'):
+        upload = request.FILES['file']
+        body, content_type = upload.read(), upload.content_type or 'text/csv'
+    elif request.content_type == 'multipart/form-data':
+        return JsonResponse({'success': False, 'message': 'No payment file uploaded'}, status=400)
+    else:
+        body, content_type = request.body, request.content_type or ''
+    if 'json' in content_type and not account_number:
+        try:
+            account_number = json.loads(body).get('source_account')
+        except (ValueError, AttributeError):
+            pass
+
+    source = get_object_or_404(BankAccount, account_number=account_number, user=request.user)
+    try:
+        lines = parse_batch(body, content_type)
+        result = post_batch(source, lines, initiated_by=request.user,
+                            description=request.POST.get('description', 'Bulk payment'))
+    except TransferError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'paid': result['paid'],
+        'total': str(result['total']),
+        'failures': result['failures'],
+        'references': [t.reference_number for t in result['transactions']],
+    })
+
 @login_required
 def qr_generate(request):
     """Generate QR code for payment"""
@@ -133,35 +295,33 @@ def qr_generate(request):
         try:
             account = BankAccount.objects.get(account_number=account_number, user=request.user)
             
-            # Generate QR code
-            qr_data = {
-                'account_number': account_number,
-                'amount': amount,
-                'purpose': purpose,
-                'timestamp': timezone.now().isoformat()
-            }
-            
-            qr = qrcode.QRCode(version=1, box_size=10, border=5)
-            qr.add_data(str(qr_data))
-            qr.make(fit=True)
-            
-            # Create QR code image
-            qr_image = qr.make_image(fill_color="black", back_color="white")
-            
-            # Save QR code
-            buffer = io.BytesIO()
-            qr_image.save(buffer, format='PNG')
-            qr_file = ContentFile(buffer.getvalue())
-            
-            qr_payment = QRPayment.objects.create(
-                account=account,
-                amount=amount if amount else None,
-                purpose=purpose,
-                qr_code_image=qr_file
-            )
+            amount = Decimal(amount) if amount else None
+            valid_minutes = request.POST.get('valid_minutes')
+            valid_until = timezone.now() + timedelta(minutes=int(valid_minutes)) if valid_minutes else None
+            max_uses = int(request.POST['max_uses']) if request.POST.get('max_uses') else None
+            image_format = request.POST.get('format', 'png')
+            if image_format not in QR_FORMATS:
+                image_format = 'png'
+
+            # Regenerating a static code (no expiry or use limit) hands back
+            # the existing one, so its signed payload and stored image are reused
+            qr_payment = None
+            if valid_until is None and max_uses is None:
+                qr_payment = QRPayment.objects.filter(
+                    account=account, amount=amount, purpose=purpose, is_active=True,
+                    valid_until__isnull=True, max_uses__isnull=True,
+                ).first()
+            if qr_payment is None:
+                qr_payment = QRPayment(account=account, amount=amount, purpose=purpose,
+                                       valid_until=valid_until, max_uses=max_uses)
+
+            image_name = stored_qr_image(sign_qr_payment(qr_payment), image_format)
+            if qr_payment.pk is None or qr_payment.qr_code_image.name != image_name:
+                qr_payment.qr_code_image.name = image_name
+                qr_payment.save()
             
             messages.success(request, 'QR code generated successfully!')
-            return redirect('qr_payment', qr_id=qr_payment.qr_code_id)
+            return redirect('transactions:qr_payment', qr_id=qr_payment.qr_code_id)
             
         except BankAccount.DoesNotExist:
             messages.error(request, 'Account not found.')
@@ -192,6 +352,23 @@ def qr_scan(request):
     return render(request, 'transactions/qr_scan.html')
 
 @login_required
+def qr_verify(request):
+    """Check a scanned code's signature and expiry without touching the database"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request method'}, status=405)
+    try:
+        qr_data = decode_payload(json.loads(request.body).get('qr_data'))
+    except (InvalidQRCode, ValueError, AttributeError) as e:
+        return JsonResponse({'valid': False, 'error': str(e) or 'Invalid QR code'}, status=400)
+    return JsonResponse({
+        'valid': True,
+        'account_number': qr_data['account_number'],
+        'amount': str(qr_data['amount']) if qr_data['amount'] else None,
+        'valid_until': qr_data['valid_until'].isoformat() if qr_data['valid_until'] else None,
+    })
+
+@login_required
+@idempotent
 def process_qr_payment(request):
     """Process QR code payment with enhanced security"""
     if request.method == 'POST':
@@ -202,74 +379,10 @@ def process_qr_payment(request):
                 return JsonResponse({'error': 'Unauthorized - Missing authentication token'}, status=401)
 
             # Parse JSON data
-            data = request.json()
-            qr_data = data.get('qr_data')
-
-            if not qr_data:
-                return JsonResponse({'error': 'Invalid QR data'}, status=400)
+            data = json.loads(request.body)
 
-            # Parse QR data
-            account_number = qr_data.get('account_number')
-            amount = qr_data.get('amount')
-            purpose = qr_data.get('purpose', 'QR Payment')
-
-            # Validate required fields
-            if not account_number or not amount:
-                return JsonResponse({'error': 'Missing required fields: account_number, amount'}, status=400)
-
-            # Validate amount is positive
-            try:
-                amount = float(amount)
-                if amount <= 0:
-                    return JsonResponse({'error': 'Amount must be positive'}, status=400)
-            except (ValueError, TypeError):
-                return JsonResponse({'error': 'Invalid amount format'}, status=400)
-
-            # Find source account (current user's account)
-            from_account = BankAccount.objects.filter(user=request.user, status='active').first()
-            if not from_account:
-                return JsonResponse({'error': 'No active account found'}, status=400)
-
-            # Find destination account
-            try:
-                to_account = BankAccount.objects.get(account_number=account_number)
-            except BankAccount.DoesNotExist:
-                return JsonResponse({'error': 'Destination account not found'}, status=400)
-
-            # Check balance
-            if from_account.balance < amount:
-                return JsonResponse({'error': 'Insufficient balance'}, status=400)
-
-            # Additional security: Check for suspicious activity
-            if amount > from_account.daily_withdrawal_limit:
-                return JsonResponse({'error': 'Amount exceeds daily withdrawal limit'}, status=400)
-
-            # Create transaction
-            with transaction.atomic():
-                new_transaction = Transaction.objects.create(
-                    from_account=from_account,
-                    to_account=to_account,
-                    transaction_type='payment',
-                    amount=amount,
-                    status='completed',
-                    payment_method='qr',
-                    reference_number=f"QR{timezone.now().strftime('%Y%m%d%H%M%S')}",
-                    description=purpose,
-                    initiated_by=request.user,
-                    completed_at=timezone.now()
-                )
-
-                # Update balances
-                from_account.balance -= amount
-                to_account.balance += amount
-                from_account.save()
-                to_account.save()
-
-            return JsonResponse({
-                'success': True,
-                'transaction_id': str(new_transaction.transaction_id),
-                'message': 'Payment processed successfully'
-            })
+            body, status = settle_qr_payment(request.user, data)
+            return JsonResponse(body, status=status)
 
         except json.JSONDecodeError:
             return JsonResponse({'error': 'Invalid JSON data'}, status=400)
@@ -277,3 +390,47 @@ def process_qr_payment(request):
             return JsonResponse({'error': f'Server error: {str(e)}'}, status=500)
 
     return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+@async_login_required
+@idempotent
+async def process_qr_payment_async(request):
+    """Async variant of process_qr_payment for ASGI deployments"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request method'}, status=405)
+
+    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not auth_header.startswith('Bearer '):
+        return JsonResponse({'error': 'Unauthorized - Missing authentication token'}, status=401)
+
+    try:
+        data = json.loads(request.body)
+        # Forged or expired codes are turned away without leaving the event loop
+        decode_payload(data.get('qr_data'))
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON data'}, status=400)
+    except InvalidQRCode as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    try:
+        # Posting needs transaction.atomic, which only exists on the sync side
+        body, status = await sync_to_async(settle_qr_payment)(request.user, data)
+    except Exception as e:
+        return JsonResponse({'error': f'Server error: {str(e)}'}, status=500)
+    return JsonResponse(body, status=status)
+
+@async_login_required
+async def qr_status(request, qr_id):
+    """Usage and validity of one of the user's QR codes"""
+    qr_payment = await QRPayment.objects.filter(qr_code_id=qr_id, account__user=request.user).values(
+        'is_active', 'used_count', 'max_uses', 'amount', 'valid_until'
+    ).afirst()
+    if qr_payment is None:
+        return JsonResponse({'error': 'QR code not found'}, status=404)
+    return JsonResponse({
+        'qr_code_id': str(qr_id),
+        'is_active': qr_payment['is_active'],
+        'used_count': qr_payment['used_count'],
+        'max_uses': qr_payment['max_uses'],
+        'amount': str(qr_payment['amount']) if qr_payment['amount'] is not None else None,
+        'valid_until': qr_payment['valid_until'].isoformat() if qr_payment['valid_until'] else None,
+    })
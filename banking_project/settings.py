@@ -42,10 +42,12 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Limits every route except apps.core.ratelimit.EXEMPT_PREFIXES (admin, static,
+    # the notification stream) by route group; RATE_LIMIT_ENABLE = False turns it off
+    'apps.core.middleware.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     # 'apps.core.middleware.AuditLogMiddleware',
-    # 'apps.core.middleware.RateLimitMiddleware',
 ]
 
 ROOT_URLCONF = 'banking_project.urls'
@@ -168,15 +170,78 @@ CACHES = {
     }
 }
 
+# Transfer posting: retries on lock/serialization conflicts with capped backoff
+TRANSFER_MAX_RETRIES = 10
+TRANSFER_RETRY_BASE_DELAY = 0.005  # seconds
+TRANSFER_RETRY_MAX_DELAY = 0.2  # seconds
+
+# Reference numbers are reserved from the database in blocks of this size
+REFERENCE_BLOCK_SIZE = 1000
+
+# Upper bound on the number of lines accepted by the bulk payment endpoint
+BATCH_MAX_LINES = 20000
+
+# Rendered PDF statements; kept outside MEDIA_ROOT so they are never served publicly
+STATEMENT_CACHE_DIR = BASE_DIR / 'statement_cache'
+# Processes rendering statements on demand; 0 renders in one background thread of the
+# web process, which only hides latency. Bulk renders use `manage.py render_statements`.
+STATEMENT_RENDER_WORKERS = 2
+
+# Idempotency-Key outcomes are replayed for this long; concurrent duplicates get a 409
+# with Retry-After while the first request runs
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24  # seconds
+# The running request renews its claim every third of this; if its process dies, a
+# retry takes the key over once the claim is this old
+IDEMPOTENCY_LEASE_SECONDS = 30
+
+# Cached customer dashboard snapshots; events keep them current, the TTL bounds memory use
+DASHBOARD_SNAPSHOT_TTL = 60 * 60  # seconds
+
+# Admin dashboard row counters are spread over this many rows to avoid a hot row;
+# run `manage.py sync_counters` periodically to reset them to exact counts
+COUNTER_SHARDS = 8
+
+# Approval tasks stay with the reviewer who claimed them for this long, then return to the queue
+APPROVAL_LEASE_SECONDS = 15 * 60
+
+# Reward points credited per whole dollar of completed payments and transfers
+REWARDS_POINTS_PER_DOLLAR = 1
+
+# Broadcast fan-out: worker processes (0 runs inline) and a cap on notification inserts
+# per second across all workers, to keep the primary database responsive
+BROADCAST_WORKERS = 4
+BROADCAST_MAX_ROWS_PER_SECOND = 20000
+
+# Notification stream: cached unread counters are recounted at least this often, clients
+# are polled from the cache every interval, and streams end (and reconnect) after duration
+UNREAD_COUNT_TTL = 5 * 60  # seconds
+NOTIFICATION_STREAM_INTERVAL = 2  # seconds
+NOTIFICATION_STREAM_DURATION = 5 * 60  # seconds
+
+# Read notifications older than this are deleted by `manage.py purge_notifications`
+NOTIFICATION_RETENTION_DAYS = 90
+
+# QR images are rendered inline when 0, otherwise in a pool of this many processes
+QR_RENDER_WORKERS = 0
+
 # Rate Limiting
 RATE_LIMIT_ENABLE = True
-RATE_LIMIT_USE_CACHE = 'default'
+# (route group, path prefixes, per-user limit, per-IP limit) for RateLimitMiddleware,
+# limits as (requests, window seconds); see apps/core/ratelimit.py for the defaults
+# RATE_LIMIT_POLICIES = [...]
+# Addresses or networks of the reverse proxies in front of the app; X-Forwarded-For
+# is only trusted on requests from these, otherwise clients could spoof their IP
+RATE_LIMIT_TRUSTED_PROXIES = []
 
 # File Upload Settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 
 # Logging
+# The log directory is not tracked; create it so the file handler can open its log
+LOG_DIR = BASE_DIR / 'logs'
+LOG_DIR.mkdir(exist_ok=True)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -190,7 +255,7 @@ LOGGING = {
         'file': {
             'level': 'INFO',
             'class': 'logging.FileHandler',
-            'filename': str(BASE_DIR / 'logs' / 'banking_system.log'),
+            'filename': str(LOG_DIR / 'banking_system.log'),
             'formatter': 'verbose',
         },
         'console': {